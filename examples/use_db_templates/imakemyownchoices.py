@@ -32,7 +32,9 @@ import jinja2
 import peewee
 
 
-webapp = itty3.App()
+# Rendered pages are cached on disk, so they survive restarts & are shared
+# between worker processes.
+webapp = itty3.App(cache_backend=itty3.SQLiteCache("cache.db"))
 db = peewee.SqliteDatabase("apps.db")
 env = jinja2.Environment(
     loader=jinja2.FileSystemLoader("./templates", followlinks=True),
@@ -50,7 +52,7 @@ class App(peewee.Model):
         database = db
 
 
-@webapp.get("/apps/")
+@webapp.get("/apps/", cache_ttl=60)
 def app_list(request):
     with db:
         apps = App.select()
@@ -5,18 +5,48 @@ itty3
 
 The itty-bitty Python web framework... **Now Rewritten For Python 3!**
 """
+import asyncio
+import collections
+import concurrent.futures
+import copy
+import dataclasses
+import datetime
+import email.utils
 import functools
+import gc
+import hashlib
 import http.cookies
+import importlib
+import inspect
 import io
 import json
 import logging
+import marshal
 import mimetypes
 import os
+import queue
+import random
 import re
+import select
+import signal
+import socket
+import socketserver
+import sqlite3
+import stat
 import sys
+import threading
+import time
 import urllib.parse
+import uuid
 import wsgiref.headers
+import wsgiref.simple_server
 import wsgiref.util
+import zlib
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
 __author__ = "Daniel Lindsley"
@@ -71,13 +101,21 @@ TRACE = "TRACE"
 PLAIN = "text/plain"
 HTML = "text/html"
 JSON = "application/json"
+NDJSON = "application/x-ndjson"
+EVENT_STREAM = "text/event-stream"
 FORM = "application/x-www-form-urlencoded"
 AJAX = "X-Requested-With"
 
 COOKIE_HEADER = "HTTP-COOKIE"
+GZIP = "gzip"
+DEFLATE = "deflate"
+X_ACCEL_REDIRECT = "X-Accel-Redirect"
+X_SENDFILE = "X-Sendfile"
 SAME_SITE_NONE = "None"
 SAME_SITE_LAX = "Lax"
 SAME_SITE_STRICT = "Strict"
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
 
 UUID_PATTERN = (
     r"[A-Fa-f0-9]{{8}}-"
@@ -87,6 +125,17 @@ UUID_PATTERN = (
     r"[A-Fa-f0-9]{{12}}"
 )
 
+# Content-types that are worth spending CPU to compress. Anything under
+# `text/` is also considered compressible (except event streams).
+COMPRESSIBLE_TYPES = [
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "application/x-javascript",
+    "application/xhtml+xml",
+    "image/svg+xml",
+]
+
 # Borrowed & modified from Django.
 RESPONSE_CODES = {
     100: "Continue",
@@ -159,6 +208,209 @@ class RouteNotFound(IttyException):
     pass
 
 
+class RequestTooLarge(IttyException):
+    """
+    Raised when a request body is larger than allowed.
+    """
+
+    pass
+
+
+class DeadlineExceeded(IttyException):
+    """
+    Raised when a request runs past its deadline.
+    """
+
+    pass
+
+
+class DeadlinePoolExhausted(IttyException):
+    """
+    Raised when every thread for running views with a deadline is busy.
+    """
+
+    pass
+
+
+# JSON
+class JSONEncoder(json.JSONEncoder):
+    """
+    A `json.JSONEncoder` that also understands dataclasses, dates/times &
+    UUIDs.
+    """
+
+    def default(self, o):
+        if dataclasses.is_dataclass(o) and not isinstance(o, type):
+            return dataclasses.asdict(o)
+
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+
+        if isinstance(o, uuid.UUID):
+            return str(o)
+
+        return super().default(o)
+
+
+class JSONBackend(object):
+    """
+    Encodes data to JSON `bytes`, using the stdlib `json` module.
+
+    Subclass this to plug in a different JSON library (see `OrjsonBackend`)
+    & provide it as `App(json_backend=...)`.
+
+    Args:
+        encoder_class (json.JSONEncoder, Optional): The encoder to use.
+            Default is `itty3.JSONEncoder`.
+        chunk_size (int, Optional): Roughly how many bytes to buffer before
+            yielding a chunk when streaming. Default is `16384`.
+    """
+
+    def __init__(self, encoder_class=JSONEncoder, chunk_size=16384):
+        self.encoder_class = encoder_class
+        self.chunk_size = int(chunk_size)
+        self._encoders = {}
+
+    def __str__(self):
+        return "<{}>".format(self.__class__.__name__)
+
+    def __repr__(self):
+        return str(self)
+
+    def get_encoder(self, pretty=False):
+        # Encoders are stateless once built, so reuse them.
+        if pretty not in self._encoders:
+            kwargs = {"indent": 4} if pretty else {}
+            self._encoders[pretty] = self.encoder_class(**kwargs)
+
+        return self._encoders[pretty]
+
+    def dumps(self, data, pretty=False):
+        """
+        Encodes data as JSON.
+
+        Args:
+            data (Any): The data to encode
+            pretty (bool, Optional): If the output should be indented.
+                Default is `False`.
+
+        Returns:
+            bytes: The encoded JSON
+        """
+        return self.get_encoder(pretty).encode(data).encode("utf-8")
+
+    def iter_value(self, data, pretty=False):
+        """
+        Encodes a single value as JSON, in pieces.
+
+        Args:
+            data (Any): The data to encode
+            pretty (bool, Optional): If the output should be indented.
+                Default is `False`.
+
+        Returns:
+            iterable: `str` or `bytes` pieces of the JSON
+        """
+        return self.get_encoder(pretty).iterencode(data)
+
+    def is_array_like(self, data):
+        """
+        Identifies data that should be streamed as a JSON array.
+
+        Args:
+            data (Any): The data to check
+
+        Returns:
+            bool: True for lists, tuples, generators & other iterators.
+        """
+        if isinstance(data, (dict, str, bytes)):
+            return False
+
+        return hasattr(data, "__iter__")
+
+    def iterencode(self, data, pretty=False):
+        """
+        Encodes data as JSON, in `bytes` chunks.
+
+        Arrays (including generators) are encoded an item at a time, so
+        the full output never needs to be held in memory at once.
+
+        Args:
+            data (Any): The data to encode
+            pretty (bool, Optional): If the output should be indented.
+                Default is `False`.
+
+        Returns:
+            generator: Chunks of roughly `chunk_size` bytes
+        """
+        if self.is_array_like(data):
+            pieces = self._iter_array(data, pretty)
+        else:
+            pieces = self.iter_value(data, pretty)
+
+        buffer, size = [], 0
+
+        for piece in pieces:
+            if isinstance(piece, str):
+                piece = piece.encode("utf-8")
+
+            buffer.append(piece)
+            size += len(piece)
+
+            if size >= self.chunk_size:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+
+        if buffer:
+            yield b"".join(buffer)
+
+    def _iter_array(self, items, pretty):
+        separator = ",\n" if pretty else ","
+        yield "["
+
+        for offset, item in enumerate(items):
+            if offset:
+                yield separator
+
+            for piece in self.iter_value(item, pretty):
+                yield piece
+
+        yield "]"
+
+
+class OrjsonBackend(JSONBackend):
+    """
+    Encodes data to JSON `bytes`, using `orjson`.
+
+    Dataclasses, dates/times & UUIDs are handled natively by `orjson`.
+    Requires `orjson` to be installed.
+
+    Args:
+        chunk_size (int, Optional): Roughly how many bytes to buffer before
+            yielding a chunk when streaming. Default is `16384`.
+
+    Raises:
+        IttyException: If `orjson` isn't installed.
+    """
+
+    def __init__(self, chunk_size=16384):
+        if orjson is None:
+            raise IttyException("OrjsonBackend requires `orjson`.")
+
+        super().__init__(chunk_size=chunk_size)
+
+    def _default(self, o):
+        # Only consulted for the types `orjson` doesn't know.
+        return self.get_encoder().default(o)
+
+    def dumps(self, data, pretty=False):
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(data, default=self._default, option=option)
+
+    def iter_value(self, data, pretty=False):
+        return [self.dumps(data, pretty=pretty)]
+
+
 # Request/Response bits
 class QueryDict(object):
     """
@@ -319,6 +571,8 @@ class HttpRequest(object):
         self.request_protocol = request_protocol
         self._cookies = cookies or http.cookies.SimpleCookie()
         self.COOKIES = {}
+        # When handling must be done by (on the `time.monotonic` clock).
+        self.deadline = None
 
         # For caching.
         self._GET, self._POST, self._PUT = None, None, None
@@ -359,6 +613,31 @@ class HttpRequest(object):
             self.method, self.path, self.request_protocol
         )
 
+    def set_deadline(self, seconds):
+        """
+        Sets how long handling the request may take, starting now.
+
+        Args:
+            seconds (int/float): The time budget, in seconds
+        """
+        self.deadline = time.monotonic() + seconds
+
+    def deadline_remaining(self):
+        """
+        Returns how much of the request's time budget is left.
+
+        Views can use this to skip optional work (or to pass on as a
+        timeout to upstream calls) when time is running short.
+
+        Returns:
+            float: The seconds left (never below `0`), or `None` if the
+                request has no deadline
+        """
+        if self.deadline is None:
+            return None
+
+        return max(self.deadline - time.monotonic(), 0.0)
+
     def split_uri(self, full_uri):
         """
         Breaks a URI down into components.
@@ -451,6 +730,84 @@ class HttpRequest(object):
             cookies=cookies,
         )
 
+    @classmethod
+    def from_asgi(cls, scope, body=b""):
+        """
+        Builds a new HttpRequest from the provided ASGI (`http`) `scope`.
+
+        Args:
+            scope (dict): The connection scope from the ASGI server
+            body (bytes, Optional): The full request body, as read from the
+                `receive` channel. Default is `b""`.
+
+        Returns:
+            HttpRequest: A fleshed out request object, based on what was
+                present.
+        """
+        headers = {}
+        cookies = {}
+
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper()
+            value = raw_value.decode("latin-1")
+
+            if name == "COOKIE":
+                if not cookies:
+                    cookies = http.cookies.SimpleCookie()
+
+                cookies.load(value)
+            elif name in headers:
+                # Repeated headers get folded together, as the WSGI
+                # servers do.
+                headers[name] = "{}, {}".format(headers[name], value)
+            else:
+                headers[name] = value
+
+        scheme = scope.get("scheme", "http")
+        server_name, port = scope.get("server") or ("", 80)
+
+        if port is None:
+            # A Unix domain socket, where the "name" is the path.
+            server_name = "localhost"
+            port = 443 if scheme == "https" else 80
+        host = headers.get("HOST")
+
+        if not host:
+            host = server_name
+
+            if (scheme, str(port)) not in (("http", "80"), ("https", "443")):
+                host = "{}:{}".format(host, port)
+
+        path = scope.get("raw_path")
+
+        if path:
+            path = path.decode("latin-1")
+        else:
+            path = urllib.parse.quote(
+                scope.get("root_path", "") + scope.get("path", "/"),
+                safe="/;=,",
+            )
+
+        uri = "{}://{}{}".format(scheme, host, path)
+        query_string = scope.get("query_string", b"").decode("latin-1")
+
+        if query_string:
+            uri = "{}?{}".format(uri, query_string)
+
+        return cls(
+            uri=uri,
+            method=scope.get("method", GET),
+            headers=headers,
+            body=body,
+            scheme=scheme,
+            port=str(port),
+            content_length=len(body),
+            request_protocol="HTTP/{}".format(
+                scope.get("http_version", "1.1")
+            ),
+            cookies=cookies,
+        )
+
     def content_type(self):
         """
         Returns the received Content-Type header.
@@ -561,9 +918,20 @@ class HttpResponse(object):
 
     A lightly-internal `start_response` attribute must be manually set on the
     response object when in a WSGI environment in order to send the response.
+    Similarly, a `file_wrapper` attribute can be set to the server's
+    `wsgi.file_wrapper`, allowing file bodies to be sent without copying
+    them through Python.
+
+    The `body` may be a `str`, `bytes`, a file-like object opened in binary
+    mode, or any iterable of `str`/`bytes` chunks. Files & iterables are
+    streamed to the client a chunk at a time.
+
+    Work that the client doesn't need to wait on can be added with
+    `HttpResponse.add_background`.
 
     Args:
-        body (str, Optional): The body of the response. Defaults to "".
+        body (str/bytes/file/iterable, Optional): The body of the response.
+            Defaults to "".
         status_code (int, Optional): The HTTP status code (without the
             reason). Default is `200`.
         headers (dict, Optional): The headers to supply with the response.
@@ -572,6 +940,9 @@ class HttpResponse(object):
             Default is `text/plain`.
     """
 
+    # How much of a file body to read at a time.
+    block_size = 64 * 1024
+
     def __init__(
         self, body="", status_code=200, headers=None, content_type=PLAIN,
     ):
@@ -581,6 +952,8 @@ class HttpResponse(object):
         self.content_type = content_type
         self._cookies = http.cookies.SimpleCookie()
         self.start_response = None
+        self.file_wrapper = None
+        self.background = []
 
         self.set_header("Content-Type", self.content_type)
 
@@ -606,6 +979,164 @@ class HttpResponse(object):
         if name.lower() == "content-type":
             self.content_type = value
 
+    def get_header(self, name, default=None):
+        """
+        Fetches a header from the response, ignoring case.
+
+        Args:
+            name (str): The name of the header.
+            default (Any, Optional): The value to return if the header isn't
+                present. Default is `None`.
+
+        Returns:
+            Any: The value of the header, or the `default`.
+        """
+        lower_name = name.lower()
+
+        for key, value in self.headers.items():
+            if key.lower() == lower_name:
+                return value
+
+        return default
+
+    def remove_header(self, name):
+        """
+        Removes a header from the response, ignoring case.
+
+        Succeeds regardless of whether the header was set or not.
+
+        Args:
+            name (str): The name of the header.
+        """
+        lower_name = name.lower()
+
+        for key in list(self.headers.keys()):
+            if key.lower() == lower_name:
+                del self.headers[key]
+
+    def add_vary(self, name):
+        """
+        Adds a header name to the `Vary` header of the response.
+
+        Args:
+            name (str): The name of the request header the response varies
+                on.
+        """
+        existing = self.get_header("Vary", "")
+        names = [bit.strip() for bit in existing.split(",") if bit.strip()]
+
+        if name.lower() in [bit.lower() for bit in names]:
+            return
+
+        names.append(name)
+        self.remove_header("Vary")
+        self.set_header("Vary", ", ".join(names))
+
+    def add_background(self, func, *args, **kwargs):
+        """
+        Adds a task to run once the response has been sent, such as audit
+        logging or cache warming.
+
+        Tasks run in order on `App.background` (see `BackgroundQueue`), off
+        of the client's critical path. Exceptions they raise are logged.
+
+        Args:
+            func (callable): The task
+            *args (Any): The positional arguments to call it with
+            **kwargs (Any): The keyword arguments to call it with
+        """
+        self.background.append((func, args, kwargs))
+
+    def copy(self):
+        """
+        Creates an independent copy of the response.
+
+        The headers & cookies are copied, so they can be changed without
+        affecting the original. The body itself is shared. Background tasks
+        aren't copied, so that they only run once.
+
+        Returns:
+            HttpResponse: The new response
+        """
+        resp = copy.copy(self)
+        resp.headers = dict(self.headers)
+        resp._cookies = copy.deepcopy(self._cookies)
+        resp.start_response = None
+        resp.background = []
+        return resp
+
+    def is_offloaded(self):
+        """
+        Identifies if the body is to be sent by the front-end server (via
+        `X-Accel-Redirect` or `X-Sendfile`).
+
+        Returns:
+            bool: True if offloaded, False otherwise
+        """
+        for name in (X_ACCEL_REDIRECT, X_SENDFILE):
+            if self.get_header(name) is not None:
+                return True
+
+        return False
+
+    def is_streaming(self):
+        """
+        Identifies if the body is an iterable to be streamed.
+
+        Returns:
+            bool: True if the body is streamed, False if it's a `str`/`bytes`
+        """
+        return not isinstance(self.body, (str, bytes))
+
+    def get_body_bytes(self):
+        """
+        Returns the (non-streaming) body encoded as bytes.
+
+        Returns:
+            bytes: The encoded body
+        """
+        if isinstance(self.body, bytes):
+            return self.body
+
+        return self.body.encode("utf-8")
+
+    def iter_content(self):
+        """
+        Iterates over the body as encoded chunks.
+
+        If the body has a `close` method, it is called once iteration
+        finishes (or is abandoned by the server).
+
+        Returns:
+            iterator: The body, as `bytes` chunks
+        """
+        if not self.is_streaming():
+            return iter([self.get_body_bytes()])
+
+        # Hand the current body off, so that the body can safely be replaced
+        # by something wrapping this iterator.
+        return self._iter_chunks(self.body)
+
+    def _iter_chunks(self, body):
+        chunks = body
+
+        if hasattr(body, "read"):
+            # Iterating a file gives lines, which can be tiny (or huge).
+            chunks = iter(functools.partial(body.read, self.block_size), b"")
+
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+
+                if chunk:
+                    yield chunk
+        finally:
+            close = getattr(body, "close", None)
+
+            if close is not None:
+                close()
+
     def set_cookie(
         self,
         key,
@@ -674,6 +1205,41 @@ class HttpResponse(object):
 
         self._cookies[key] = morsel
 
+    def set_etag(self, value, weak=False):
+        """
+        Sets the `ETag` header on the response.
+
+        Args:
+            value (str): The entity tag. Quotes are added if not present.
+            weak (bool, Optional): If the tag should be marked as a weak
+                validator. Default is `False`.
+        """
+        if not value.startswith('"') and not value.startswith("W/"):
+            value = '"{}"'.format(value)
+
+        if weak and not value.startswith("W/"):
+            value = "W/{}".format(value)
+
+        self.set_header("ETag", value)
+
+    def set_last_modified(self, when):
+        """
+        Sets the `Last-Modified` header on the response.
+
+        Args:
+            when (datetime or int/float): A `datetime` (assumed UTC if
+                naive) or a Unix timestamp of when the content last changed.
+        """
+        if hasattr(when, "timestamp"):
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=datetime.timezone.utc)
+
+            when = when.timestamp()
+
+        self.set_header(
+            "Last-Modified", email.utils.formatdate(when, usegmt=True)
+        )
+
     def delete_cookie(self, key, path="/", domain=None):
         """
         Removes a cookie.
@@ -697,6 +1263,23 @@ class HttpResponse(object):
             domain=domain,
         )
 
+    def get_header_list(self):
+        """
+        Returns the headers to send, including any `Set-Cookie` headers.
+
+        Returns:
+            list: A list of `(name, value)` tuples
+        """
+        headers = [(k, v) for k, v in self.headers.items()]
+        possible_cookies = self._cookies.output()
+
+        # Update the headers to include the cookies.
+        if possible_cookies:
+            for line in possible_cookies.splitlines():
+                headers.append(tuple(line.split(": ", 1)))
+
+        return headers
+
     def write(self):
         """
         Begins the transmission of the response.
@@ -723,30 +1306,251 @@ class HttpResponse(object):
             self.status_code,
             RESPONSE_CODES.get(self.status_code, RESPONSE_CODES[500]),
         )
-        headers = [(k, v) for k, v in self.headers.items()]
-        possible_cookies = self._cookies.output()
+        self.start_response(status, self.get_header_list())
 
-        # Update the headers to include the cookies.
-        if possible_cookies:
-            for line in possible_cookies.splitlines():
-                headers.append(tuple(line.split(": ", 1)))
+        if self.file_wrapper is not None and hasattr(self.body, "read"):
+            # Lets the server send the file efficiently (e.g. `sendfile`).
+            return self.file_wrapper(self.body, self.block_size)
 
-        self.start_response(status, headers)
-        return [self.body.encode("utf-8")]
+        if self.is_streaming():
+            return self.iter_content()
 
+        return [self.get_body_bytes()]
 
-# Routing
-class Route(object):
-    """
-    Handles setting up a given route. Composed of a HTTP method, a URI path
-    & "view" (a callable function that takes a `request` & returns a
-    `response` object) for handling a matching request.
 
-    Variables can be added to the path using a `<type:variable_name>` syntax.
-    For instance, if you wanted to capture a UUID & an integer in a URI, you
-    could provide the following `path`::
+class ServerSentEvent(object):
+    """
+    A single event for a `text/event-stream` response.
 
-        "/app/<uuid:app_id>/version/<int:major_version>/"
+    See `App.render_sse`.
+
+    Args:
+        data (str): The event's data. May contain newlines.
+        event (str, Optional): The event type. Default is `None` (a plain
+            "message" event).
+        id (str, Optional): The event ID, which the browser sends back as
+            `Last-Event-ID` when reconnecting. Default is `None`.
+        retry (int, Optional): How many milliseconds the browser should wait
+            before reconnecting. Default is `None`.
+    """
+
+    def __init__(self, data, event=None, id=None, retry=None):
+        self.data = data
+        self.event = event
+        self.id = id
+        self.retry = retry
+
+    def __str__(self):
+        return "<ServerSentEvent: {}>".format(self.event or "message")
+
+    def __repr__(self):
+        return str(self)
+
+    def encode(self):
+        """
+        Encodes the event in the wire format.
+
+        Returns:
+            bytes: The encoded event, including the trailing blank line
+        """
+        lines = []
+
+        if self.event is not None:
+            lines.append("event: {}".format(self.event))
+
+        if self.id is not None:
+            lines.append("id: {}".format(self.id))
+
+        if self.retry is not None:
+            lines.append("retry: {}".format(int(self.retry)))
+
+        for line in str(self.data).splitlines() or [""]:
+            lines.append("data: {}".format(line))
+
+        return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class HeartbeatStream(object):
+    """
+    Streams a (slow) iterable, emitting keep-alives while it's idle.
+
+    The iterable is consumed on its own background thread. If nothing
+    arrives for `heartbeat` seconds, `keepalive` is sent instead, so that
+    proxies don't time out the connection.
+
+    Iterating blocks between items (fine for WSGI, where each request has
+    its own thread). `App.asgi` uses `aiter` instead, which waits on the
+    event loop, so idle streams don't tie up executor threads.
+
+    When the consumer stops (for instance, the client disconnected & the
+    server closed the response), the source is closed as soon as it next
+    yields.
+
+    Args:
+        iterable (iterable): The source of items
+        heartbeat (int/float): Seconds of idleness between keep-alives
+        keepalive (bytes): What to send when idle
+        queue_size (int, Optional): How many items the source may produce
+            ahead of the consumer. Default is `16`.
+    """
+
+    def __init__(self, iterable, heartbeat, keepalive, queue_size=16):
+        self.iterable = iterable
+        self.heartbeat = heartbeat
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self.started = False
+        self.stop = threading.Event()
+
+    def __str__(self):
+        return "<HeartbeatStream: {}>".format(self.iterable)
+
+    def __repr__(self):
+        return str(self)
+
+    def __iter__(self):
+        items = queue.Queue(maxsize=self.queue_size)
+        self.start(functools.partial(self._put, items))
+
+        try:
+            while True:
+                try:
+                    kind, item = items.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield self.keepalive
+                    continue
+
+                if kind == "done":
+                    return
+
+                yield item
+        finally:
+            self.stop.set()
+
+    async def aiter(self):
+        """
+        Iterates over the stream from a running event loop.
+
+        Waiting for the next item (& timing out into a keep-alive) happens
+        on the loop, via `asyncio.wait_for`.
+
+        Returns:
+            async generator: The items, interspersed with keep-alives
+        """
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        # Bounds the queue, as with the blocking iterator.
+        credits = threading.Semaphore(self.queue_size)
+
+        def put(item):
+            while not self.stop.is_set():
+                if credits.acquire(timeout=0.5):
+                    try:
+                        loop.call_soon_threadsafe(items.put_nowait, item)
+                    except RuntimeError:
+                        # The loop has been closed.
+                        self.stop.set()
+
+                    return
+
+        self.start(put)
+
+        try:
+            while True:
+                try:
+                    kind, item = await asyncio.wait_for(
+                        items.get(), self.heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield self.keepalive
+                    continue
+
+                credits.release()
+
+                if kind == "done":
+                    return
+
+                yield item
+        finally:
+            self.stop.set()
+
+    def start(self, put):
+        """
+        Starts consuming the source on a background thread.
+
+        Args:
+            put (callable): Called with each `(kind, item)` pair. Should
+                block while the consumer is behind, but give up once
+                `HeartbeatStream.stop` is set.
+        """
+        self.started = True
+        producer = threading.Thread(
+            target=self.produce,
+            args=(put,),
+            name="itty3-stream",
+            daemon=True,
+        )
+        producer.start()
+
+    def produce(self, put):
+        """
+        Consumes the source, closing it once done or stopped.
+
+        Args:
+            put (callable): See `HeartbeatStream.start`
+        """
+        try:
+            for item in self.iterable:
+                if self.stop.is_set():
+                    break
+
+                put(("item", item))
+        except Exception:
+            log.exception("Streaming source {} failed!".format(self.iterable))
+        finally:
+            self._close_source()
+            put(("done", None))
+
+    def _put(self, items, item):
+        # Don't block forever if the consumer has gone away.
+        while not self.stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _close_source(self):
+        close = getattr(self.iterable, "close", None)
+
+        if close is not None:
+            close()
+
+    def close(self):
+        """
+        Stops the stream.
+
+        If it was never iterated (say, for a `HEAD` request), the source is
+        closed right away.
+        """
+        self.stop.set()
+
+        if not self.started:
+            self._close_source()
+
+
+# Routing
+class Route(object):
+    """
+    Handles setting up a given route. Composed of a HTTP method, a URI path
+    & "view" (a callable function that takes a `request` & returns a
+    `response` object) for handling a matching request.
+
+    Variables can be added to the path using a `<type:variable_name>` syntax.
+    For instance, if you wanted to capture a UUID & an integer in a URI, you
+    could provide the following `path`::
+
+        "/app/<uuid:app_id>/version/<int:major_version>/"
 
     These would be added onto the call to the view as additional arguments.
     In the case of the previous `path`, the view's signature should look
@@ -754,6 +1558,9 @@ class Route(object):
 
         def app_info(request, app_id, major_version): ...
 
+    The view may also be an `async def` function. This is detected once,
+    here, & exposed as `Route.is_async`.
+
     Supported types include:
 
     * `str`
@@ -766,6 +1573,31 @@ class Route(object):
         method (str): The HTTP method
         path (str): The URI path to match against
         func (callable): The view function to handle a matching request
+        cache_ttl (int/float, Optional): If provided, `GET` responses from
+            the view are cached for this many seconds. Default is `None`
+            (no caching).
+        coalesce (bool, Optional): If `True`, concurrent identical `GET`
+            requests share a single call to the view. Default is `False`.
+        max_concurrency (int, Optional): If provided, at most this many
+            requests run the view at once (see `ConcurrencyLimiter`). The
+            rest get a `503`. Default is `None` (no limit).
+        concurrency_queue (int, Optional): With `max_concurrency`, how many
+            requests may wait for a turn. Default is `0`.
+        concurrency_timeout (int/float, Optional): With
+            `concurrency_queue`, how many seconds a request waits. Default
+            is `None` (wait indefinitely).
+        priority (str, Optional): The priority class of the route, either
+            `PRIORITY_NORMAL` (`"normal"`) or `PRIORITY_HIGH` (`"high"`).
+            High priority requests are first in line for a slot & can use
+            the capacity reserved for them (see `ConcurrencyLimiter`).
+            Default is `PRIORITY_NORMAL`.
+        deadline (int/float, Optional): How many seconds a request to this
+            route may take, overriding `App`'s `deadline`. Past it, the
+            view is abandoned & the request gets a `504`. Default is `None`
+            (the `App`'s `deadline` applies).
+
+    Raises:
+        IttyException: If the `priority` isn't known
     """
 
     known_types = [
@@ -776,10 +1608,39 @@ class Route(object):
         "slug",
     ]
 
-    def __init__(self, method, path, func):
+    def __init__(
+        self,
+        method,
+        path,
+        func,
+        cache_ttl=None,
+        coalesce=False,
+        max_concurrency=None,
+        concurrency_queue=0,
+        concurrency_timeout=None,
+        priority=PRIORITY_NORMAL,
+        deadline=None,
+    ):
+        if priority not in (PRIORITY_HIGH, PRIORITY_NORMAL):
+            raise IttyException("Unknown priority '{}'".format(priority))
+
         self.method = method.upper()
         self.path = path
         self.func = func
+        self.cache_ttl = cache_ttl
+        self.coalesce = coalesce
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.priority = priority
+        self.deadline = deadline
+        self.limiter = None
+
+        if max_concurrency:
+            self.limiter = ConcurrencyLimiter(
+                max_concurrency,
+                queue_size=concurrency_queue,
+                timeout=concurrency_timeout,
+            )
+
         self._regex, self._type_conversions = self.create_re(self.path)
 
     def __str__(self):
@@ -925,459 +1786,6335 @@ class Route(object):
         return matches
 
 
-# App!
-class App(object):
+# Caching
+class MemoryCache(object):
     """
-    An orchestration object that handles routing & request processing.
+    A thread-safe, in-process cache with TTLs & LRU eviction.
+
+    Memory is bounded by both the number of entries & the (approximate)
+    total size of the cached values. When either limit is exceeded, the
+    least-recently-used entries are evicted first.
+
+    This is the default storage backend for `ResponseCache`.
 
     Args:
-        debug (bool): Allows for controlling a debugging mode.
+        max_entries (int, Optional): The most entries to hold. Default is
+            `1000`.
+        max_bytes (int, Optional): The most bytes of values to hold.
+            Default is `64 * 1024 * 1024` (64Mb).
     """
 
-    def __init__(self, debug=False):
-        self._routes = []
-        self.debug = debug
-        self.static_root = None
-        self.static_url_path = None
-        self.log = self.get_log()
-
-    def get_log(self):
-        """
-        Returns a `logging.Logger` instance.
+    def __init__(self, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.total_bytes = 0
+        self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
 
-        By default, we return the `itty3` module-level logger. Users are
-        free to override this to meet their needs.
+    def __str__(self):
+        return "<MemoryCache: {} entries>".format(len(self._data))
 
-        Returns:
-            logging.Logger: The module-level logger
-        """
-        return log
+    def __repr__(self):
+        return str(self)
 
-    def __call__(self, environ, start_response):
-        # Allows providing the `App` instance as the WSGI handler to
-        # many WSGI servers.
-        return self.process_request(environ, start_response)
+    def __len__(self):
+        return len(self._data)
 
-    def add_route(self, method, path, func):
+    def get_size(self, value):
         """
-        Adds a given HTTP method, URI path & view to the routing.
+        Approximates the size of a value in bytes.
 
         Args:
-            method (str): The HTTP method to handle
-            path (str): The URI path to handle
-            func (callable): The view function to process a matching request
+            value (Any): The value to measure
+
+        Returns:
+            int: The approximate size
         """
-        route = Route(method, path, func)
-        self._routes.append(route)
-        self.log.debug("Added {} - {}".format(route, func.__name__))
+        if isinstance(value, (bytes, str)):
+            return len(value)
 
-    def find_route(self, method, path):
+        if isinstance(value, (list, tuple)):
+            return sum([self.get_size(v) for v in value])
+
+        return 0
+
+    def get(self, key, default=None):
         """
-        Determines the routing offset for a given HTTP method & URI path.
+        Fetches a value from the cache.
 
         Args:
-            method (str): The HTTP method to handle
-            path (str): The URI path to handle
+            key (str): The key to look up
+            default (Any, Optional): The value to return if the key isn't
+                present (or has expired). Default is `None`.
 
         Returns:
-            int: The offset of the matching route
-
-        Raises:
-            RouteNotFound: If a matching route is not found
+            Any: The cached value, or the `default`.
         """
-        for offset, route in enumerate(self._routes):
-            if route.method == method:
-                if route.path == path:
-                    return offset
+        with self._lock:
+            entry = self._data.get(key)
 
-        raise RouteNotFound()
+            if entry is None:
+                return default
 
-    def remove_route(self, method, path):
-        """
-        Removes a route from the routing.
+            expires, size, value = entry
 
-        Args:
-            method (str): The HTTP method to handle
-            path (str): The URI path to handle
-        """
-        try:
-            offset = self.find_route(method, path)
-            old_route = self._routes.pop(offset)
-            self.log.debug("Removed {}".format(old_route))
-        except RouteNotFound:
-            pass
+            if expires is not None and expires <= time.monotonic():
+                self._remove(key)
+                return default
 
-    def render(
-        self, request, body, status_code=200, content_type=HTML, headers=None,
-    ):
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
         """
-        A convenience method for creating a `HttpResponse` object.
+        Stores a value in the cache.
 
         Args:
-            request (HttpRequest): The request being handled
-            body (str): The body of the response
-            status_code (int, Optional): The HTTP status to return. Defaults
-                to `200`.
-            content_type (str, Optional): The `Content-Type` header to return
-                with the response. Defaults to `text/html`.
-            headers (dict, Optional): The HTTP headers to include on the
-                response. Defaults to empty headers.
-
-        Returns:
-            HttpResponse: The populated response object
+            key (str): The key to store under
+            value (Any): The value to store
+            ttl (int/float, Optional): How many seconds the value is valid
+                for. Default is `None` (until evicted).
         """
-        return HttpResponse(
-            body=body,
-            status_code=status_code,
-            headers=headers,
-            content_type=content_type,
-        )
+        size = self.get_size(value)
 
-    def render_json(
-        self, request, data, status_code=200, content_type=JSON, headers=None,
-    ):
-        """
-        A convenience method for creating a JSON `HttpResponse` object.
+        # Don't let a single huge value flush everything else out.
+        if size > self.max_bytes:
+            return
 
-        Args:
-            request (HttpRequest): The request being handled
-            data (dict/list): The Python data structure to be encoded as JSON
-            status_code (int, Optional): The HTTP status to return. Defaults
-                to `200`.
-            content_type (str, Optional): The `Content-Type` header to return
-                with the response. Defaults to `text/html`.
-            headers (dict, Optional): The HTTP headers to include on the
-                response. Defaults to empty headers.
+        expires = None
 
-        Returns:
-            HttpResponse: The populated response object
-        """
-        kwargs = {}
+        if ttl is not None:
+            expires = time.monotonic() + ttl
 
-        if self.debug:
-            kwargs["indent"] = 4
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
 
-        return self.render(
-            request,
-            json.dumps(data, **kwargs),
-            status_code=status_code,
-            content_type=content_type,
-            headers=headers,
-        )
+            self._data[key] = (expires, size, value)
+            self.total_bytes += size
 
-    def redirect(self, request, url, permanent=False):
+            while self._data and (
+                len(self._data) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key):
         """
-        A convenience function for supplying a HTTP redirect.
+        Removes a value from the cache.
 
-        Args:
-            request (HttpRequest): The request being handled
-            url (str): A path or full URL to redirect the user to
-            permanent (bool, Optional): Whether the redirect should be
-                considered permanent or not. Defaults to `False` (temporary
-                redirect).
+        Succeeds regardless of whether the key was present or not.
 
-        Returns:
-            HttpResponse: The populated response object
+        Args:
+            key (str): The key to remove
         """
-        status_code = 302
+        with self._lock:
+            self._remove(key)
 
-        if permanent:
-            status_code = 301
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
 
-        return self.render(
-            request,
-            body="",
-            headers={"Location": url},
-            status_code=status_code,
-            content_type=PLAIN,
-        )
+        if entry is not None:
+            self.total_bytes -= entry[1]
 
-    def render_static(self, request, asset_path):
+    def clear(self):
         """
-        Handles serving static assets.
-
-        WARNING: This should really only be used in development!
-
-        It's slow (compared to nginx, Apache or whatever), it hasn't gone
-        through any security assessments (which means potential security
-        holes), it's imperfect w/ regard to mimetypes.
+        Removes everything from the cache.
+        """
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
 
-        Args:
-            request (HttpRequest): The request being handled
-            asset_path (str): A path of the asset to be served
+    def stats(self):
+        """
+        Returns information about the cache's memory use.
 
         Returns:
-            HttpResponse: The populated response object
+            dict: The `entries`, `bytes` & `evictions` counts
         """
-        if not self.static_root:
-            return self.error_404(request)
+        return {
+            "entries": len(self._data),
+            "bytes": self.total_bytes,
+            "evictions": self.evictions,
+        }
 
-        # First, we remove any relative nonsense from the path.
-        cleaned_path = os.path.normpath(asset_path)
-        cleaned_static_root = os.path.abspath(self.static_root)
-        # Then force it under the static root, so that escaping outside
-        # the static root shouldn't be do-able.
-        path = os.path.join(cleaned_static_root, cleaned_path)
 
-        # If it doesn't exist, immediately return a 404.
-        if not os.path.exists(path):
-            return self.error_404(request)
+class SQLiteCache(object):
+    """
+    A persistent cache, stored in a SQLite database on disk.
 
-        # Attempt to work out the content-type.
-        content_type = PLAIN
-        mtype, menc = mimetypes.guess_type(asset_path)
+    Unlike `MemoryCache`, entries survive restarts & are shared between
+    processes on the same host (such as prefork workers). Keys are stored as
+    16-byte hashes & values are `marshal`-ed (then `zlib`-compressed when
+    large enough to benefit).
 
-        if mtype is not None:
-            content_type = mtype
+    Values must be built from basic types (`str`, `bytes`, numbers,
+    `list`, `tuple`, `dict`, `None`).
 
-        # Actually read the file & decode it to bytes.
-        with open(path, "rb") as raw_file:
-            content = raw_file.read()
-            content_length = len(content)
+    Memory is bounded by both the number of entries & the total size of the
+    stored values, evicting the least-recently-used entries first. Expired
+    entries are purged in a background thread.
 
-            if content_type.startswith(
-                "application"
-            ) or content_type.startswith("text"):
-                content = content.decode("utf-8")
+    Args:
+        path (str): The filesystem path of the database file.
+        max_entries (int, Optional): The most entries to hold. Default is
+            `10000`.
+        max_bytes (int, Optional): The most bytes of values to hold.
+            Default is `256 * 1024 * 1024` (256Mb).
+        purge_interval (int/float, Optional): How many seconds between
+            purges of expired entries. Default is `60`. `None` disables
+            background purging.
+        compress_min_size (int, Optional): Values at least this many bytes
+            are `zlib`-compressed. Default is `1024`.
+    """
 
-        # Approximate the content-length.
-        headers = {
-            "Content-Length": str(content_length),
+    table_name = "itty3_cache"
+
+    def __init__(
+        self,
+        path,
+        max_entries=10000,
+        max_bytes=256 * 1024 * 1024,
+        purge_interval=60,
+        compress_min_size=1024,
+    ):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.purge_interval = purge_interval
+        self.compress_min_size = int(compress_min_size)
+        self.evictions = 0
+        self._local = threading.local()
+        self._purger = None
+        self._purger_pid = None
+        self._stop = threading.Event()
+        self._setup()
+
+    def __str__(self):
+        return "<SQLiteCache: {}>".format(self.path)
+
+    def __repr__(self):
+        return str(self)
+
+    def _setup(self):
+        conn = self.get_connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS {} ("
+            "key BLOB PRIMARY KEY, "
+            "value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "expires REAL, "
+            "accessed REAL NOT NULL"
+            ") WITHOUT ROWID".format(self.table_name)
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_accessed "
+            "ON {0} (accessed)".format(self.table_name)
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS {0}_expires "
+            "ON {0} (expires)".format(self.table_name)
+        )
+
+        # Running totals, kept up to date by triggers, so that checking the
+        # limits doesn't mean scanning the whole table on every write.
+        # Being in the database, they're shared by every process using it.
+        conn.execute("BEGIN IMMEDIATE")
+
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS {}_totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "entries INTEGER NOT NULL, "
+                "bytes INTEGER NOT NULL"
+                ")".format(self.table_name)
+            )
+            # Counts up anything stored before the totals existed.
+            conn.execute(
+                "INSERT OR IGNORE INTO {0}_totals (id, entries, bytes) "
+                "SELECT 0, COUNT(*), COALESCE(SUM(size), 0) "
+                "FROM {0}".format(self.table_name)
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS {0}_inserted "
+                "AFTER INSERT ON {0} BEGIN "
+                "UPDATE {0}_totals SET entries = entries + 1, "
+                "bytes = bytes + NEW.size WHERE id = 0; "
+                "END".format(self.table_name)
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS {0}_deleted "
+                "AFTER DELETE ON {0} BEGIN "
+                "UPDATE {0}_totals SET entries = entries - 1, "
+                "bytes = bytes - OLD.size WHERE id = 0; "
+                "END".format(self.table_name)
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS {0}_updated "
+                "AFTER UPDATE OF size ON {0} BEGIN "
+                "UPDATE {0}_totals SET bytes = bytes - OLD.size + NEW.size "
+                "WHERE id = 0; "
+                "END".format(self.table_name)
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_connection(self):
+        """
+        Returns a SQLite connection for the current thread & process.
+
+        Connections can't be shared across threads, nor survive a `fork`,
+        so one is lazily opened per thread (per process).
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None and self._local.pid == pid:
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        # WAL lets readers in other processes proceed during writes.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Makes the deletes from `INSERT OR REPLACE` fire triggers, keeping
+        # the running totals right.
+        conn.execute("PRAGMA recursive_triggers=ON")
+        self._local.conn = conn
+        self._local.pid = pid
+        return conn
+
+    def _ensure_purger(self):
+        # Threads don't survive a `fork`, so (re)start one per process.
+        if not self.purge_interval or self._purger_pid == os.getpid():
+            return
+
+        self._purger_pid = os.getpid()
+        self._stop.clear()
+        self._purger = threading.Thread(
+            target=self._purge_forever, name="itty3-cache-purge", daemon=True
+        )
+        self._purger.start()
+
+    def _purge_forever(self):
+        while not self._stop.wait(self.purge_interval):
+            try:
+                self.purge()
+            except sqlite3.Error:
+                log.exception("Purging {} failed!".format(self))
+
+    def make_key(self, key):
+        """
+        Hashes a key down to a compact, fixed-size form.
+
+        Args:
+            key (str): The key
+
+        Returns:
+            bytes: The 16-byte hashed key
+        """
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def encode(self, value):
+        """
+        Serializes a value for storage.
+
+        Args:
+            value (Any): The value to serialize
+
+        Returns:
+            bytes: The serialized value
+        """
+        data = marshal.dumps(value)
+
+        if len(data) >= self.compress_min_size:
+            compressed = zlib.compress(data, 1)
+
+            if len(compressed) < len(data):
+                return b"z" + compressed
+
+        return b"m" + data
+
+    def decode(self, data):
+        """
+        Deserializes a stored value.
+
+        Args:
+            data (bytes): The serialized value
+
+        Returns:
+            Any: The value
+        """
+        data = bytes(data)
+
+        if data[:1] == b"z":
+            return marshal.loads(zlib.decompress(data[1:]))
+
+        return marshal.loads(data[1:])
+
+    def get(self, key, default=None):
+        """
+        Fetches a value from the cache.
+
+        Args:
+            key (str): The key to look up
+            default (Any, Optional): The value to return if the key isn't
+                present (or has expired). Default is `None`.
+
+        Returns:
+            Any: The cached value, or the `default`.
+        """
+        self._ensure_purger()
+        conn = self.get_connection()
+        hashed = self.make_key(key)
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires FROM {} WHERE key = ?".format(
+                self.table_name
+            ),
+            (hashed,),
+        ).fetchone()
+
+        if row is None:
+            return default
+
+        if row[1] is not None and row[1] <= now:
+            self.delete(key)
+            return default
+
+        try:
+            value = self.decode(row[0])
+        except (ValueError, EOFError, TypeError, zlib.error):
+            # A truncated or corrupt row is just a miss.
+            log.warning("Dropping unreadable entry from {}".format(self))
+            self.delete(key)
+            return default
+
+        # Only bother writing the access time once a second, to keep hot
+        # keys from turning every read into a write.
+        conn.execute(
+            "UPDATE {} SET accessed = ? WHERE key = ? AND accessed < ?".format(
+                self.table_name
+            ),
+            (now, hashed, now - 1),
+        )
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a value in the cache.
+
+        Args:
+            key (str): The key to store under
+            value (Any): The value to store
+            ttl (int/float, Optional): How many seconds the value is valid
+                for. Default is `None` (until evicted).
+        """
+        self._ensure_purger()
+        data = self.encode(value)
+
+        # Don't let a single huge value flush everything else out.
+        if len(data) > self.max_bytes:
+            return
+
+        now = time.time()
+        expires = None
+
+        if ttl is not None:
+            expires = now + ttl
+
+        conn = self.get_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO {} (key, value, size, expires, accessed) "
+            "VALUES (?, ?, ?, ?, ?)".format(self.table_name),
+            (self.make_key(key), data, len(data), expires, now),
+        )
+        self._enforce_limits(conn)
+
+    def _get_totals(self, conn):
+        return conn.execute(
+            "SELECT entries, bytes FROM {}_totals WHERE id = 0".format(
+                self.table_name
+            )
+        ).fetchone()
+
+    def _enforce_limits(self, conn):
+        while True:
+            entries, total_bytes = self._get_totals(conn)
+
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                return
+
+            overflow = entries - self.max_entries
+
+            if overflow <= 0:
+                # Over on bytes. Evict in batches, rather than re-counting
+                # after every row.
+                overflow = max(entries // 20, 1)
+
+            cursor = conn.execute(
+                "DELETE FROM {0} WHERE key IN ("
+                "SELECT key FROM {0} ORDER BY accessed LIMIT ?"
+                ")".format(self.table_name),
+                (overflow,),
+            )
+            self.evictions += cursor.rowcount
+
+    def delete(self, key):
+        """
+        Removes a value from the cache.
+
+        Succeeds regardless of whether the key was present or not.
+
+        Args:
+            key (str): The key to remove
+        """
+        self.get_connection().execute(
+            "DELETE FROM {} WHERE key = ?".format(self.table_name),
+            (self.make_key(key),),
+        )
+
+    def purge(self):
+        """
+        Removes all expired entries.
+
+        Returns:
+            int: The number of entries removed
+        """
+        cursor = self.get_connection().execute(
+            "DELETE FROM {} WHERE expires IS NOT NULL AND expires <= ?".format(
+                self.table_name
+            ),
+            (time.time(),),
+        )
+        return cursor.rowcount
+
+    def clear(self):
+        """
+        Removes everything from the cache.
+        """
+        self.get_connection().execute(
+            "DELETE FROM {}".format(self.table_name)
+        )
+
+    def close(self):
+        """
+        Stops background purging & closes this thread's connection.
+        """
+        self._stop.set()
+        conn = getattr(self._local, "conn", None)
+
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def stats(self):
+        """
+        Returns information about the cache's disk use.
+
+        Returns:
+            dict: The `entries`, `bytes` & `evictions` counts
+        """
+        entries, total_bytes = self._get_totals(self.get_connection())
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class ResponseCache(object):
+    """
+    Caches fully-rendered responses for views.
+
+    Responses are keyed on the HTTP method, path, the (sorted) query string
+    & the values of any request headers the response named in `Vary`. The
+    status, headers & already-encoded body bytes are stored.
+
+    Requests carrying credentials (`Authorization` or `Cookie`) bypass the
+    cache entirely, as their responses may be personalized.
+
+    Args:
+        backend (object, Optional): The storage to use. Must provide `get`,
+            `set`, `delete`, `clear` & `stats` methods. Default is a new
+            `MemoryCache`.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+        if self.backend is None:
+            self.backend = MemoryCache()
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return "<ResponseCache: {}>".format(self.backend)
+
+    def __repr__(self):
+        return str(self)
+
+    def make_key(self, request, vary=None):
+        """
+        Builds the cache key for a request.
+
+        Args:
+            request (HttpRequest): The request being handled
+            vary (list, Optional): The names of request headers the response
+                varies on. Default is `None` (no variance).
+
+        Returns:
+            str: The cache key
+        """
+        pairs = []
+
+        for name in sorted(request.query.keys()):
+            for value in request.query[name]:
+                pairs.append((name, value))
+
+        bits = [request.method, request.path, urllib.parse.urlencode(pairs)]
+
+        for name in vary or []:
+            bits.append(
+                "{}={}".format(name.lower(), request.headers.get(name, ""))
+            )
+
+        return "\n".join(bits)
+
+    def is_cacheable(self, response):
+        """
+        Determines if a response is safe to store.
+
+        Only complete `200` responses are cached. Responses setting cookies,
+        marked as private/uncacheable or varying on everything are skipped.
+
+        Args:
+            response (HttpResponse): The response to check
+
+        Returns:
+            bool: True if the response can be cached, False otherwise
+        """
+        if response.status_code != 200 or response.is_streaming():
+            return False
+
+        if response._cookies:
+            return False
+
+        cache_control = response.get_header("Cache-Control", "").lower()
+
+        for directive in ("private", "no-store", "no-cache"):
+            if directive in cache_control:
+                return False
+
+        return response.get_header("Vary", "").strip() != "*"
+
+    def is_credentialed(self, request):
+        """
+        Determines if a request carries credentials.
+
+        Such requests are neither served from nor stored in the cache, so
+        that one user's response is never handed to another.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            bool: True if the request has `Authorization` or `Cookie`
+                headers, False otherwise
+        """
+        for name in ("Authorization", "Cookie"):
+            if request.headers.get(name):
+                return True
+
+        return False
+
+    def get_vary(self, response):
+        vary = response.get_header("Vary", "")
+        return [name.strip() for name in vary.split(",") if name.strip()]
+
+    def get(self, request):
+        """
+        Fetches a cached response for a request.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: A fresh response built from the cache, or `None`
+                if nothing was cached (or the request has credentials).
+        """
+        if self.is_credentialed(request):
+            return None
+
+        key = self.make_key(request)
+        entry = self.backend.get(key)
+
+        # The plain key can point at the varying headers, rather than a
+        # response.
+        if entry is not None and entry[0] == "vary":
+            key = self.make_key(request, vary=entry[1])
+            entry = self.backend.get(key)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        _, status_code, headers, body = entry
+        headers = dict(headers)
+        return HttpResponse(
+            body=body,
+            status_code=status_code,
+            headers=headers,
+            content_type=headers.get("Content-Type", PLAIN),
+        )
+
+    def set(self, request, response, ttl=None):
+        """
+        Stores a response for a request, if it's cacheable.
+
+        Args:
+            request (HttpRequest): The request being handled
+            response (HttpResponse): The response to store
+            ttl (int/float, Optional): How many seconds the response is
+                valid for. Default is `None` (until evicted).
+
+        Returns:
+            bool: True if the response was stored, False otherwise
+        """
+        if self.is_credentialed(request):
+            return False
+
+        if not self.is_cacheable(response):
+            return False
+
+        key = self.make_key(request)
+        vary = self.get_vary(response)
+
+        if vary:
+            self.backend.set(key, ("vary", vary), ttl=ttl)
+            key = self.make_key(request, vary=vary)
+
+        entry = (
+            "response",
+            response.status_code,
+            [(k, v) for k, v in response.headers.items()],
+            response.get_body_bytes(),
+        )
+        self.backend.set(key, entry, ttl=ttl)
+        return True
+
+    def clear(self):
+        """
+        Removes all cached responses.
+        """
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Returns the hit/miss counts, alongside the backend's stats.
+
+        Returns:
+            dict: The cache statistics
+        """
+        stats = dict(self.backend.stats())
+        stats.update({"hits": self.hits, "misses": self.misses})
+        return stats
+
+
+# Concurrency
+class _Flight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight(object):
+    """
+    Collapses concurrent calls for the same key into a single call.
+
+    The first caller for a key (the leader) runs its function. Any callers
+    arriving while it's running wait for, then share, the leader's result.
+
+    If the leader fails or the wait times out, waiters fall back to running
+    their own function.
+
+    Args:
+        timeout (int/float, Optional): How many seconds waiters wait for the
+            leader. Default is `None` (wait indefinitely).
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.waiting = 0
+        self.shared = 0
+        self.fallbacks = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return "<SingleFlight: {} in flight>".format(len(self._flights))
+
+    def __repr__(self):
+        return str(self)
+
+    def do(self, key, func):
+        """
+        Runs `func` (or waits on an identical in-flight call).
+
+        Args:
+            key (str): Identifies calls that can share a result
+            func (callable): Takes no arguments & produces the result
+
+        Returns:
+            tuple: The result & a boolean of whether it was shared from
+                another caller.
+
+        Raises:
+            Exception: Anything raised by the leader's `func` is re-raised
+                for the leader only.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+
+            if is_leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.waiting += 1
+
+        if is_leader:
+            try:
+                flight.result = func()
+            except BaseException:
+                flight.failed = True
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+
+                flight.event.set()
+
+            return flight.result, False
+
+        finished = flight.event.wait(self.timeout)
+
+        with self._lock:
+            self.waiting -= 1
+
+            if finished and not flight.failed:
+                self.shared += 1
+                return flight.result, True
+
+            self.fallbacks += 1
+
+        return func(), False
+
+    def stats(self):
+        """
+        Returns counts of shared results & fallbacks.
+
+        Returns:
+            dict: The `in_flight`, `waiting`, `shared` & `fallbacks` counts
+        """
+        return {
+            "in_flight": len(self._flights),
+            "waiting": self.waiting,
+            "shared": self.shared,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class ConcurrencyLimiter(object):
+    """
+    Bounds how many requests are in flight at once.
+
+    Once `limit` requests are in flight, up to `queue_size` more may wait
+    (for up to `timeout` seconds) for one to finish. Anything beyond that
+    is turned away right away, so that it can get a cheap `503` rather
+    than piling up behind a slow dependency.
+
+    Requests have a priority class (`PRIORITY_HIGH` or `PRIORITY_NORMAL`).
+    The last `reserved` slots are only for high priority requests & each
+    class waits in its own queue, with high priority waiters served first.
+    That way, cheap requests (like health checks) still get through while
+    slow ones have filled up the rest.
+
+    Args:
+        limit (int): How many requests may be in flight
+        queue_size (int, Optional): How many requests may wait for a slot.
+            Default is `0` (no waiting).
+        timeout (int/float, Optional): How many seconds a request waits for
+            a slot. Default is `None` (wait indefinitely).
+        reserved (int, Optional): How many of the slots are kept for high
+            priority requests. Default is `0`.
+    """
+
+    def __init__(self, limit, queue_size=0, timeout=None, reserved=0):
+        self.limit = max(int(limit), 1)
+        self.queue_size = int(queue_size or 0)
+        self.timeout = timeout
+        self.reserved = min(int(reserved or 0), self.limit - 1)
+        self.active = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._lock = threading.Lock()
+        # Each waiter is a callable that wakes the waiting request, which
+        # has been handed a slot.
+        self._queues = {
+            PRIORITY_HIGH: collections.deque(),
+            PRIORITY_NORMAL: collections.deque(),
+        }
+
+    def __str__(self):
+        return "<ConcurrencyLimiter: {}/{} in flight>".format(
+            self.active, self.limit
+        )
+
+    def __repr__(self):
+        return str(self)
+
+    @property
+    def waiting(self):
+        return sum([len(waiters) for waiters in self._queues.values()])
+
+    def check_priority(self, priority):
+        """
+        Ensures a priority class is known.
+
+        Args:
+            priority (str): The priority class
+
+        Raises:
+            IttyException: If the priority class isn't known
+        """
+        if priority not in self._queues:
+            raise IttyException(
+                "Unknown priority '{}'. Expected one of: {}".format(
+                    priority, ", ".join(self._queues)
+                )
+            )
+
+    def _has_room(self, priority):
+        if priority == PRIORITY_HIGH:
+            return self.active < self.limit
+
+        return self.active < self.limit - self.reserved
+
+    def _can_start(self, priority):
+        # Don't jump ahead of anyone waiting in the same (or a higher) class.
+        if self._queues[PRIORITY_HIGH]:
+            return False
+
+        if priority == PRIORITY_NORMAL and self._queues[PRIORITY_NORMAL]:
+            return False
+
+        return self._has_room(priority)
+
+    def _hand_off(self):
+        # Gives free slots to waiters, high priority first.
+        for priority in (PRIORITY_HIGH, PRIORITY_NORMAL):
+            waiters = self._queues[priority]
+
+            while waiters and self._has_room(priority):
+                self.active += 1
+                waiters.popleft()()
+
+    def _enqueue(self, priority, wake):
+        if self.waiting >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        self._queues[priority].append(wake)
+        return True
+
+    def _give_up(self, priority, wake, timed_out=True):
+        # Returns `True` if the waiter was still queued (no slot was given).
+        with self._lock:
+            try:
+                self._queues[priority].remove(wake)
+            except ValueError:
+                return False
+
+            if timed_out:
+                self.rejected += 1
+                self.timed_out += 1
+
+            return True
+
+    def try_acquire(self, priority=PRIORITY_NORMAL):
+        """
+        Takes a slot, only if one is free right now.
+
+        Args:
+            priority (str, Optional): The priority class of the request.
+                Default is `PRIORITY_NORMAL`.
+
+        Returns:
+            bool: True if a slot was taken, False otherwise
+        """
+        self.check_priority(priority)
+
+        with self._lock:
+            if self._can_start(priority):
+                self.active += 1
+                return True
+
+            return False
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """
+        Takes a slot, waiting in the queue for one if needed.
+
+        Args:
+            priority (str, Optional): The priority class of the request.
+                Default is `PRIORITY_NORMAL`.
+
+        Returns:
+            bool: True if a slot was taken, False if the request should be
+                rejected (the queue was full or the wait timed out)
+        """
+        self.check_priority(priority)
+        ready = threading.Event()
+
+        with self._lock:
+            if self._can_start(priority):
+                self.active += 1
+                return True
+
+            if not self._enqueue(priority, ready.set):
+                return False
+
+        if ready.wait(self.timeout):
+            return True
+
+        # If it isn't queued anymore, a slot was handed over just in time.
+        return not self._give_up(priority, ready.set)
+
+    async def acquire_async(self, priority=PRIORITY_NORMAL):
+        """
+        Like `ConcurrencyLimiter.acquire`, but waits on the running event
+        loop, rather than blocking a thread.
+
+        Args:
+            priority (str, Optional): The priority class of the request.
+                Default is `PRIORITY_NORMAL`.
+
+        Returns:
+            bool: True if a slot was taken, False if the request should be
+                rejected (the queue was full or the wait timed out)
+        """
+        self.check_priority(priority)
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+
+        def _set():
+            if not ready.done():
+                ready.set_result(True)
+
+        def wake():
+            # Slots are freed from any thread.
+            loop.call_soon_threadsafe(_set)
+
+        with self._lock:
+            if self._can_start(priority):
+                self.active += 1
+                return True
+
+            if not self._enqueue(priority, wake):
+                return False
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            return not self._give_up(priority, wake)
+        except asyncio.CancelledError:
+            if not self._give_up(priority, wake, timed_out=False):
+                # We were handed a slot, but won't be using it.
+                self.release()
+
+            raise
+
+    def release(self):
+        """
+        Gives a slot back, handing it to a waiting request (if any).
+        """
+        with self._lock:
+            self.active -= 1
+            self._hand_off()
+
+    def stats(self):
+        """
+        Returns how busy the limiter is.
+
+        Returns:
+            dict: The `limit` (of which `reserved` are for high priority),
+                the `active` & `queued` requests (`queued_high` are high
+                priority), plus the `rejected` requests (of which
+                `timed_out` waited first)
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "reserved": self.reserved,
+                "active": self.active,
+                "queued": self.waiting,
+                "queued_high": len(self._queues[PRIORITY_HIGH]),
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+class BackgroundQueue(object):
+    """
+    Runs the tasks added with `HttpResponse.add_background`, on a small pool
+    of threads, once the response has been sent.
+
+    Failing tasks are logged (& counted), without affecting anything else.
+    If the queue is full, tasks are run right away on the calling thread,
+    rather than being dropped.
+
+    The threads are started on first use (& again in forked workers).
+
+    Args:
+        workers (int, Optional): How many threads to run tasks on. Default
+            is `2`.
+        queue_size (int, Optional): How many tasks may wait for a thread.
+            Default is `1000`.
+    """
+
+    def __init__(self, workers=2, queue_size=1000):
+        self.workers = max(int(workers), 1)
+        self.queue_size = queue_size
+        self.pending = queue.Queue(maxsize=self.queue_size)
+        self.unfinished = 0
+        self.completed = 0
+        self.failed = 0
+        self._threads = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def __str__(self):
+        return "<BackgroundQueue: {} unfinished>".format(self.unfinished)
+
+    def __repr__(self):
+        return str(self)
+
+    def start_workers(self):
+        """
+        Starts the worker threads, if they aren't running.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # The parent's threads (& queued tasks) stayed behind.
+                self._pid = os.getpid()
+                self.pending = queue.Queue(maxsize=self.queue_size)
+                self.unfinished = 0
+                self._threads = []
+
+            for _ in range(self.workers - len(self._threads)):
+                worker = threading.Thread(
+                    target=self._work,
+                    name="itty3-background-{}".format(len(self._threads)),
+                    daemon=True,
+                )
+                worker.start()
+                self._threads.append(worker)
+
+    def _work(self):
+        while True:
+            self.run(*self.pending.get())
+
+    def run(self, func, args, kwargs):
+        """
+        Runs a single task, logging any exception it raises.
+
+        Args:
+            func (callable): The task
+            args (tuple): The positional arguments for it
+            kwargs (dict): The keyword arguments for it
+        """
+        failed = False
+
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            failed = True
+            name = getattr(func, "__name__", repr(func))
+            log.exception("Background task {} failed!".format(name))
+
+        with self._idle:
+            self.unfinished -= 1
+
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+            self._idle.notify_all()
+
+    def submit(self, tasks):
+        """
+        Queues tasks to run.
+
+        Args:
+            tasks (list): The `(func, args, kwargs)` tasks
+        """
+        if not tasks:
+            return
+
+        self.start_workers()
+
+        for task in tasks:
+            with self._lock:
+                self.unfinished += 1
+
+            try:
+                self.pending.put_nowait(task)
+            except queue.Full:
+                log.warning("Background queue is full. Running a task now...")
+                self.run(*task)
+
+    def flush(self, timeout=None):
+        """
+        Waits for all the queued tasks to finish.
+
+        Args:
+            timeout (int/float, Optional): How many seconds to wait.
+                Default is `None` (wait indefinitely).
+
+        Returns:
+            bool: True if everything finished, False if it timed out
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.unfinished, timeout)
+
+    def stats(self):
+        """
+        Returns information about the queue.
+
+        Returns:
+            dict: The `workers`, the `unfinished` tasks, plus how many
+                tasks have `completed` or `failed`
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "unfinished": self.unfinished,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+class CloseHook(object):
+    """
+    Wraps a WSGI body iterable, calling a function once the server closes it
+    (after the whole body was sent).
+
+    Use `CloseHook.attach`, which avoids wrapping when it can.
+
+    Args:
+        body (iterable): The body to wrap. Its own `close` method (if any) is
+            still called.
+        callback (callable): Called with no arguments on close
+    """
+
+    def __init__(self, body, callback):
+        self.body = body
+        self.callback = callback
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.callback()
+
+    @classmethod
+    def attach(cls, body, callback):
+        """
+        Arranges for a function to be called once the server closes a body.
+
+        Where possible, the body's own `close` is chained, so the body
+        keeps its type. That matters for `wsgi.file_wrapper` objects, which
+        servers check for to send files with `sendfile`. Otherwise, the body
+        is wrapped (keeping `len()` only if the body has a length).
+
+        Args:
+            body (iterable): The WSGI body
+            callback (callable): Called with no arguments on close
+
+        Returns:
+            iterable: The body to hand to the server
+        """
+        original = getattr(body, "close", None)
+
+        def close():
+            try:
+                if original is not None:
+                    original()
+            finally:
+                callback()
+
+        try:
+            body.close = close
+            return body
+        except (AttributeError, TypeError):
+            pass
+
+        if hasattr(body, "__len__"):
+            return SizedCloseHook(body, callback)
+
+        return cls(body, callback)
+
+
+class SizedCloseHook(CloseHook):
+    """
+    A `CloseHook` for bodies with a length (like a list of chunks), so that
+    the server can still set a `Content-Length` for a single chunk.
+    """
+
+    def __len__(self):
+        return len(self.body)
+
+
+# Static assets
+class StaticAsset(object):
+    """
+    Describes a single static file & the headers to serve it with.
+
+    A precompressed sibling (e.g. `app.css.gz`) can be attached as
+    `StaticAsset.gzip`, to be served in place of the original to clients
+    that accept it.
+
+    Args:
+        name (str): The URL-style path of the asset, relative to the static
+            root. e.g. `css/default.css`
+        path (str): The filesystem path of the file
+        size (int): The size of the file in bytes
+        mtime (float): When the file was last modified, as a Unix timestamp
+        digest (str, Optional): A short hash of the file's contents, used
+            to build `StaticAsset.hashed_name`. Default is `None`.
+        immutable (bool, Optional): If the asset can be cached forever,
+            as its name changes whenever the contents do. Default is `False`.
+    """
+
+    immutable_cache_control = "public, max-age=31536000, immutable"
+
+    def __init__(self, name, path, size, mtime, digest=None, immutable=False):
+        self.name = name
+        self.path = path
+        self.size = int(size)
+        self.mtime = mtime
+        self.digest = digest
+        self.immutable = immutable
+        self.gzip = None
+        self.content_type = mimetypes.guess_type(name)[0] or PLAIN
+        # Cheap validators, which avoid having to hash the file.
+        self.etag = '"{:x}-{:x}"'.format(int(mtime), self.size)
+        self.headers = {
+            "Content-Length": str(self.size),
+            "ETag": self.etag,
+            "Last-Modified": email.utils.formatdate(mtime, usegmt=True),
+        }
+
+        if immutable:
+            self.headers["Cache-Control"] = self.immutable_cache_control
+
+    def __str__(self):
+        return "<StaticAsset: {}>".format(self.name)
+
+    def __repr__(self):
+        return str(self)
+
+    @classmethod
+    def from_path(cls, name, path):
+        """
+        Builds an asset by `stat`-ing a file.
+
+        Args:
+            name (str): The URL-style path of the asset
+            path (str): The filesystem path of the file
+
+        Returns:
+            StaticAsset: The asset, or `None` if it isn't a regular file
+        """
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+
+        if not stat.S_ISREG(info.st_mode):
+            return None
+
+        return cls(name, path, info.st_size, info.st_mtime)
+
+    @property
+    def hashed_name(self):
+        """
+        The name of the asset, with its content hash before the extension.
+
+        e.g. `css/app.css` -> `css/app.3f9a1c2b.css`
+
+        Returns:
+            str: The hashed name, or `None` if the contents haven't been
+                hashed
+        """
+        if not self.digest:
+            return None
+
+        base, ext = os.path.splitext(self.name)
+        return "{}.{}{}".format(base, self.digest, ext)
+
+    def hash_contents(self, block_size=64 * 1024):
+        """
+        Hashes the contents of the file (in blocks), setting
+        `StaticAsset.digest`.
+
+        Args:
+            block_size (int, Optional): How many bytes to read at a time.
+                Default is `64 * 1024`.
+
+        Returns:
+            str: The first 8 hex characters of the SHA-256 of the contents
+        """
+        hasher = hashlib.sha256()
+
+        with open(self.path, "rb") as raw_file:
+            for block in iter(lambda: raw_file.read(block_size), b""):
+                hasher.update(block)
+
+        self.digest = hasher.hexdigest()[:8]
+        return self.digest
+
+    def make_immutable(self):
+        """
+        Creates the content-hashed alias of the asset.
+
+        The alias is served from the same file, but under
+        `StaticAsset.hashed_name` & with a far-future `Cache-Control`.
+
+        Returns:
+            StaticAsset: The immutable alias
+        """
+        alias = self.__class__(
+            self.hashed_name,
+            self.path,
+            self.size,
+            self.mtime,
+            digest=self.digest,
+            immutable=True,
+        )
+        alias.content_type = self.content_type
+        alias.gzip = self.gzip
+        return alias
+
+
+class StaticManifest(object):
+    """
+    An in-memory index of the files under a static root.
+
+    Built by scanning the root once (typically at startup), so that finding
+    an asset is a single dictionary lookup, with no filesystem calls. Only
+    files present in the scan can be served, which also rules out escaping
+    the root. Hidden (dot) files & directories are skipped.
+
+    Each file's contents are hashed, so it can also be served (forever
+    cacheable) under its `StaticAsset.hashed_name`. Files are only re-hashed
+    when their size or modification time changes. Fresh `.gz` siblings are
+    attached as precompressed variants.
+
+    Small files are kept in memory once served, in a byte-capped LRU.
+
+    Args:
+        root (str): The filesystem path to the static assets
+        hot_max_bytes (int, Optional): The most bytes of file contents to
+            hold in memory. Default is `16 * 1024 * 1024` (16Mb).
+        hot_file_max_size (int, Optional): Files larger than this many
+            bytes are never held in memory. Default is `256 * 1024` (256Kb).
+        watch_interval (int/float, Optional): If provided, the root is
+            re-scanned in a background thread every this many seconds.
+            Default is `None` (no watching).
+    """
+
+    def __init__(
+        self,
+        root,
+        hot_max_bytes=16 * 1024 * 1024,
+        hot_file_max_size=256 * 1024,
+        watch_interval=None,
+    ):
+        self.root = os.path.abspath(root)
+        self.hot_file_max_size = int(hot_file_max_size)
+        self.hot_files = MemoryCache(
+            max_entries=max(hot_max_bytes // 1024, 1), max_bytes=hot_max_bytes
+        )
+        self.watch_interval = watch_interval
+        self.assets = {}
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def __str__(self):
+        return "<StaticManifest: {} ({} assets)>".format(
+            self.root, len(self.assets)
+        )
+
+    def __repr__(self):
+        return str(self)
+
+    def scan(self):
+        """
+        (Re-)builds the manifest from the files on disk.
+
+        Returns:
+            dict: The assets, keyed by their URL-style path
+        """
+        previous = self.assets
+        assets = {}
+
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            # Prune hidden directories in-place, so `os.walk` skips them.
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                asset = StaticAsset.from_path(name, path)
+
+                if asset is None:
+                    continue
+
+                old = previous.get(name)
+
+                if old is not None and old.etag == asset.etag:
+                    asset.digest = old.digest
+                else:
+                    asset.hash_contents()
+
+                assets[name] = asset
+
+        aliases = {}
+
+        for name, asset in assets.items():
+            compressed = assets.get(name + ".gz")
+
+            # A `.gz` older than the original is stale, so don't use it.
+            if compressed is not None and compressed.mtime >= asset.mtime:
+                asset.gzip = compressed
+
+            aliases[asset.hashed_name] = asset.make_immutable()
+
+        # Real files win over any (unlikely) clash with a hashed name.
+        aliases.update(assets)
+        assets = aliases
+
+        # Swap in the new manifest all at once, for the sake of threads.
+        self.assets = assets
+        return assets
+
+    def get(self, name):
+        """
+        Finds an asset.
+
+        Args:
+            name (str): The URL-style path of the asset
+
+        Returns:
+            StaticAsset: The asset, or `None` if not present
+        """
+        return self.assets.get(name.lstrip("/"))
+
+    def hashed_name(self, name):
+        """
+        Finds the content-hashed name of an asset.
+
+        Args:
+            name (str): The URL-style path of the asset
+
+        Returns:
+            str: The hashed name, or `None` if the asset isn't present
+        """
+        asset = self.get(name)
+
+        if asset is None or asset.immutable:
+            return None
+
+        return asset.hashed_name
+
+    def read(self, asset):
+        """
+        Returns the contents of a small asset from memory.
+
+        The contents are read from disk (& kept) on first use.
+
+        Args:
+            asset (StaticAsset): The asset to read
+
+        Returns:
+            bytes: The contents, or `None` if the asset is too large to hold
+                in memory
+        """
+        if asset.size > self.hot_file_max_size:
+            return None
+
+        # Including the ETag means a changed file never serves stale bytes.
+        # Keying on the path shares the contents with any hashed alias.
+        key = "{}\n{}".format(asset.path, asset.etag)
+        content = self.hot_files.get(key)
+
+        if content is None:
+            with open(asset.path, "rb") as raw_file:
+                content = raw_file.read()
+
+            self.hot_files.set(key, content)
+
+        return content
+
+    def watch(self):
+        """
+        Starts re-scanning the root every `watch_interval` seconds in a
+        background thread.
+
+        Calling it again (such as in a forked worker, where the thread
+        didn't survive) restarts the watcher if it isn't running.
+        """
+        if not self.watch_interval:
+            return
+
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_forever, name="itty3-static-watch", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch_forever(self):
+        while not self._stop.wait(self.watch_interval):
+            try:
+                self.scan()
+            except OSError:
+                log.exception("Scanning {} failed!".format(self.root))
+
+    def stop(self):
+        """
+        Stops watching the root for changes.
+        """
+        self._stop.set()
+        self._watcher = None
+
+
+class StaticMount(object):
+    """
+    Serves the files under a filesystem root at a URL prefix.
+
+    Mounts are checked (by prefix) before any routes, so asset requests
+    don't have to be matched against the whole route table.
+
+    Args:
+        prefix (str): The URL prefix. e.g. `/static/`
+        root (str): The filesystem path to the assets
+        cache_control (str, Optional): The `Cache-Control` to send with
+            assets. Content-hashed assets always get an immutable one.
+            Default is `None` (no header).
+        manifest (StaticManifest, Optional): A manifest of the files under
+            the root. Default is `None` (check the filesystem per-request).
+        offload (str, Optional): Hand the transfer to the front-end server,
+            using either `itty3.X_ACCEL_REDIRECT` (nginx) or
+            `itty3.X_SENDFILE` (Apache/lighttpd). Default is `None` (send
+            the file from Python).
+        offload_map (dict, Optional): Maps filesystem path prefixes to what
+            the front-end server knows them as. e.g.
+            `{"/srv/media": "/protected"}`. Default is `None`.
+    """
+
+    def __init__(
+        self,
+        prefix,
+        root,
+        cache_control=None,
+        manifest=None,
+        offload=None,
+        offload_map=None,
+    ):
+        self.prefix = self.normalize_prefix(prefix)
+        self.root = os.path.abspath(root)
+        self.cache_control = cache_control
+        self.manifest = manifest
+        self.offload = offload
+        self.offload_map = offload_map
+
+    def __str__(self):
+        return "<StaticMount: {} -> {}>".format(self.prefix, self.root)
+
+    def __repr__(self):
+        return str(self)
+
+    @staticmethod
+    def normalize_prefix(prefix):
+        """
+        Ensures a URL prefix has both a leading & trailing slash.
+
+        Args:
+            prefix (str): The URL prefix. e.g. `static`
+
+        Returns:
+            str: The normalized prefix. e.g. `/static/`
+        """
+        return "/{}/".format(prefix.strip("/")).replace("//", "/")
+
+    def can_handle(self, method, path):
+        """
+        Determines if the mount should serve a request.
+
+        Args:
+            method (str): The HTTP method
+            path (str): The URI path
+
+        Returns:
+            bool: True if the mount matches, False otherwise
+        """
+        if method not in (GET, HEAD):
+            return False
+
+        return path.startswith(self.prefix)
+
+    def find(self, asset_path):
+        """
+        Finds an asset under the root.
+
+        Args:
+            asset_path (str): The path of the asset, relative to the prefix
+
+        Returns:
+            StaticAsset: The asset, or `None` if not present
+        """
+        if self.manifest is not None:
+            return self.manifest.get(asset_path)
+
+        # First, we remove any relative nonsense from the path.
+        cleaned_path = os.path.normpath("/" + asset_path).lstrip("/")
+
+        if not cleaned_path or cleaned_path == ".":
+            return None
+
+        # Then force it under the root, so that escaping outside the root
+        # shouldn't be do-able.
+        path = os.path.join(self.root, cleaned_path)
+        asset = StaticAsset.from_path(asset_path, path)
+
+        if asset is None:
+            return None
+
+        compressed = StaticAsset.from_path(asset_path + ".gz", path + ".gz")
+
+        if compressed is not None and compressed.mtime >= asset.mtime:
+            asset.gzip = compressed
+
+        return asset
+
+
+# Servers
+def memory_usage(pid=None):
+    """
+    Reads how much of a process's memory is shared vs. private.
+
+    Uses `/proc/<pid>/smaps_rollup`, so is Linux-only (4.14+).
+
+    Args:
+        pid (int, Optional): The process ID. Default is `None` (the current
+            process).
+
+    Returns:
+        dict: The `rss`, `pss`, `shared` & `private` memory, in bytes, or
+            `None` if unavailable
+    """
+    path = "/proc/{}/smaps_rollup".format(pid or "self")
+    fields = {}
+
+    try:
+        with open(path) as rollup:
+            for line in rollup:
+                bits = line.split()
+
+                if len(bits) == 3 and bits[2] == "kB":
+                    fields[bits[0].rstrip(":")] = int(bits[1]) * 1024
+    except (OSError, ValueError):
+        return None
+
+    if "Rss" not in fields:
+        return None
+
+    return {
+        "rss": fields["Rss"],
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0)
+        + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0)
+        + fields.get("Private_Dirty", 0),
+    }
+
+
+def resident_memory():
+    """
+    Returns how much memory the current process is using.
+
+    Reads `/proc/self/statm`, which is cheap enough to check per-request.
+    Elsewhere, falls back to the peak usage from `resource.getrusage`.
+
+    Returns:
+        int: The resident set size, in bytes, or `None` if unavailable
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:  # pragma: no cover
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def listen_fds(unset_environment=True):
+    """
+    Returns any listening sockets passed in by a supervisor, following
+    systemd's socket activation protocol (`LISTEN_FDS` & `LISTEN_PID`).
+
+    Pass one to `App.run(fd=...)` to serve from it.
+
+    Args:
+        unset_environment (bool, Optional): Remove the variables, so that
+            child processes don't try to use the sockets too. Default is
+            `True`.
+
+    Returns:
+        list: The file descriptors (empty if none were passed in)
+    """
+    try:
+        count = int(os.environ.get("LISTEN_FDS", 0))
+        pid = int(os.environ.get("LISTEN_PID", 0))
+    except ValueError:
+        return []
+
+    # The variables may have been meant for a parent process.
+    if pid != os.getpid():
+        return []
+
+    if unset_environment:
+        for name in ("LISTEN_FDS", "LISTEN_PID", "LISTEN_FDNAMES"):
+            os.environ.pop(name, None)
+
+    return list(range(3, 3 + count))
+
+
+class SocketMixin(object):
+    """
+    Lets a `socketserver`-based server listen on a Unix domain socket
+    (when given a path, rather than a `(host, port)`) or adopt an
+    already-listening socket (see `SocketMixin.adopt_socket`).
+
+    If set, `SocketMixin.unix_socket_mode` is applied to the socket file
+    with `os.chmod`. A stale socket file is replaced & the file is removed
+    again by `server_close` (in the process that created it).
+    """
+
+    unix_socket_mode = None
+
+    def __init__(self, server_address, *args, **kwargs):
+        if isinstance(server_address, str):
+            if not hasattr(socket, "AF_UNIX"):
+                raise IttyException("Unix domain sockets aren't supported")
+
+            self.address_family = socket.AF_UNIX
+
+        self._bound_pid = None
+        super().__init__(server_address, *args, **kwargs)
+
+    def is_unix(self):
+        """
+        Identifies if the server is on a Unix domain socket.
+
+        Returns:
+            bool: True if on a Unix domain socket, False otherwise
+        """
+        return self.address_family == getattr(socket, "AF_UNIX", None)
+
+    def server_bind(self):
+        if self.is_unix():
+            self.remove_stale_socket()
+
+        socketserver.TCPServer.server_bind(self)
+
+        if self.is_unix():
+            self._bound_pid = os.getpid()
+
+            if self.unix_socket_mode is not None:
+                os.chmod(self.server_address, self.unix_socket_mode)
+
+        self.server_bound()
+
+    def remove_stale_socket(self):
+        """
+        Removes a socket file left behind by a previous server.
+
+        Raises:
+            IttyException: If the path is something other than a socket
+        """
+        try:
+            mode = os.stat(self.server_address).st_mode
+        except FileNotFoundError:
+            return
+
+        if not stat.S_ISSOCK(mode):
+            raise IttyException(
+                "{} exists & isn't a socket".format(self.server_address)
+            )
+
+        os.unlink(self.server_address)
+
+    def adopt_socket(self, sock):
+        """
+        Serves from an already bound & listening socket, instead of the
+        server's own.
+
+        Args:
+            sock (socket.socket): The listening socket
+        """
+        self.socket.close()
+        self.socket = sock
+        self.address_family = sock.family
+        self.server_address = sock.getsockname()
+        self.server_bound()
+
+    def server_bound(self):
+        # Like `http.server.HTTPServer.server_bind`, for any kind of address.
+        if self.is_unix():
+            # There's no port, so let URLs fall back to the default.
+            self.server_name = "localhost"
+            self.server_port = 80
+        else:
+            host, port = self.server_address[:2]
+            self.server_name = socket.getfqdn(host)
+            self.server_port = port
+
+        if hasattr(self, "setup_environ"):
+            self.setup_environ()
+
+    def get_request(self):
+        request, client_address = self.socket.accept()
+
+        if self.is_unix():
+            # Unix domain sockets have no client address.
+            client_address = ("", 0)
+
+        return request, client_address
+
+    def location(self):
+        """
+        Describes where the server is listening, for logging.
+
+        Returns:
+            str: e.g. `http://127.0.0.1:8000` or `unix:/run/app.sock`
+        """
+        if self.is_unix():
+            return "unix:{}".format(self.server_address)
+
+        return "http://{}:{}".format(*self.server_address[:2])
+
+    def server_close(self):
+        super().server_close()
+
+        if self.is_unix() and self._bound_pid == os.getpid():
+            try:
+                os.unlink(self.server_address)
+            except FileNotFoundError:
+                pass
+
+
+class WSGIServer(SocketMixin, wsgiref.simple_server.WSGIServer):
+    """
+    `wsgiref`'s server, keeping count of the requests it has handled.
+
+    If set, `WSGIServer.after_request` is called (with the server) after
+    each one. Can also listen on a Unix domain socket (see `SocketMixin`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.handled = 0
+        self.after_request = None
+        self._handled_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def finish_request(self, request, client_address):
+        try:
+            super().finish_request(request, client_address)
+        finally:
+            with self._handled_lock:
+                self.handled += 1
+
+            if self.after_request is not None:
+                self.after_request(self)
+
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """
+    A `wsgiref` server that hands connections to a fixed pool of threads.
+
+    Accepted connections wait in a bounded queue. When it's full, new
+    connections are answered with a `503 Service Unavailable` (rather than
+    piling up), so a slow view can't stall everything else.
+
+    On close, in-flight requests get up to `graceful_timeout` seconds to
+    finish. Connections still open after that (like SSE streams) are shut
+    down.
+
+    Args:
+        server_address (tuple/str): The `(host, port)` (or Unix domain
+            socket path) to bind to
+        handler_class (class): The `WSGIRequestHandler` subclass to use
+        threads (int, Optional): How many worker threads to run. Default is
+            `8`.
+        queue_size (int, Optional): How many accepted connections may wait
+            for a thread. Default is `None` (`threads * 8`).
+        bind_and_activate (bool, Optional): Whether to bind & listen right
+            away. Default is `True`.
+    """
+
+    multithread = True
+    daemon_threads = True
+    graceful_timeout = 30
+
+    rejection = (
+        b"HTTP/1.1 503 Service Unavailable\r\n"
+        b"Content-Type: text/plain\r\n"
+        b"Content-Length: 19\r\n"
+        b"Retry-After: 1\r\n"
+        b"Connection: close\r\n"
+        b"\r\n"
+        b"Service Unavailable"
+    )
+
+    def __init__(
+        self,
+        server_address,
+        handler_class,
+        threads=8,
+        queue_size=None,
+        bind_and_activate=True,
+    ):
+        self.threads = max(int(threads), 1)
+        self.queue_size = queue_size or self.threads * 8
+        # Let the kernel hold about as many connections as we'll queue.
+        self.request_queue_size = max(self.queue_size, 5)
+        self.pending = queue.Queue(maxsize=self.queue_size)
+        self.rejected = 0
+        self._workers = []
+        self._active = set()
+        self._pid = os.getpid()
+        super().__init__(
+            server_address, handler_class, bind_and_activate=bind_and_activate
+        )
+        self.start_workers()
+
+    def start_workers(self):
+        """
+        Starts the worker threads.
+
+        Calling it again in a forked process (where the threads didn't
+        survive) starts a fresh pool.
+        """
+        if self._pid != os.getpid():
+            # The queue may still reference the parent's waiting threads.
+            self._pid = os.getpid()
+            self.pending = queue.Queue(maxsize=self.queue_size)
+            self._workers = []
+
+        for _ in range(self.threads - len(self._workers)):
+            worker = threading.Thread(
+                target=self._work,
+                name="itty3-worker-{}".format(len(self._workers)),
+                daemon=self.daemon_threads,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self):
+        while True:
+            item = self.pending.get()
+
+            if item is None:
+                return
+
+            request, client_address = item
+            self._active.add(request)
+
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self._active.discard(request)
+                self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        """
+        Queues an accepted connection for the next free worker.
+
+        Args:
+            request (socket.socket): The accepted connection
+            client_address (tuple): The address of the client
+        """
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.reject(request)
+
+    def reject(self, request):
+        """
+        Answers a connection with a `503`, because the queue is full.
+
+        Args:
+            request (socket.socket): The accepted connection
+        """
+        self.rejected += 1
+        log.warning("Request queue is full. Rejecting a connection...")
+
+        try:
+            request.sendall(self.rejection)
+        except OSError:
+            pass
+        finally:
+            self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        log.exception("Error handling request from {}".format(client_address))
+
+    def stats(self):
+        """
+        Returns information about the pool.
+
+        Returns:
+            dict: The `threads`, the connections `queued` & the number of
+                `rejected` connections
+        """
+        return {
+            "threads": self.threads,
+            "queued": self.pending.qsize(),
+            "rejected": self.rejected,
+        }
+
+    def server_close(self):
+        super().server_close()
+        deadline = time.monotonic() + self.graceful_timeout
+
+        def remaining():
+            return max(deadline - time.monotonic(), 0)
+
+        # Let the workers finish what's already queued, then stop.
+        for _ in self._workers:
+            try:
+                self.pending.put(None, timeout=remaining())
+            except queue.Full:
+                break
+
+        for worker in self._workers:
+            worker.join(remaining())
+
+        if any(worker.is_alive() for worker in self._workers):
+            log.warning(
+                "Workers still busy after {}s. Closing their "
+                "connections...".format(self.graceful_timeout)
+            )
+
+            # Streams that never end (like SSE) fail on their next write.
+            for request in list(self._active):
+                try:
+                    request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+        # Any stragglers are daemon threads, so they won't block exiting.
+        self._workers = []
+
+
+class AsyncioHttpProtocol(asyncio.Protocol):
+    """
+    Speaks HTTP/1.1 on a single connection to an `AsyncioServer`.
+
+    Requests are parsed out of the buffered bytes & handed to `App.asgi`
+    one at a time, so pipelined requests are answered in order. Bodies
+    without a known length are sent with chunked transfer encoding.
+
+    While waiting for a request's headers (including between keep-alive
+    requests), the connection is closed after the server's
+    `keepalive_timeout`. While waiting for the body, it's closed if nothing
+    arrives for `read_timeout` seconds. Bodies over the server's
+    `max_body_size` get a `413`.
+
+    Args:
+        server (AsyncioServer): The server that accepted the connection
+    """
+
+    continue_response = b"HTTP/1.1 100 Continue\r\n\r\n"
+    bad_request = (
+        b"HTTP/1.1 400 Bad Request\r\n"
+        b"Content-Length: 0\r\n"
+        b"Connection: close\r\n"
+        b"\r\n"
+    )
+    too_large = (
+        b"HTTP/1.1 413 Payload Too Large\r\n"
+        b"Content-Length: 0\r\n"
+        b"Connection: close\r\n"
+        b"\r\n"
+    )
+    # Stricter than `int()`, which allows signs, prefixes & underscores.
+    content_length_re = re.compile(r"[0-9]+")
+    chunk_size_re = re.compile(rb"[0-9A-Fa-f]+")
+
+    def __init__(self, server):
+        self.server = server
+        self.loop = server.loop
+        self.transport = None
+        self.buffer = bytearray()
+        self.head = None
+        self.task = None
+        self.timer = None
+        self.lost = self.loop.create_future()
+        self.writable = None
+        # Incremental chunked body parsing state.
+        self.chunks = []
+        self.chunk_offset = 0
+        self.chunks_size = 0
+        self.reset()
+
+    def reset(self):
+        # Per-request state.
+        self.method = None
+        self.version = None
+        self.body = None
+        self.keep_alive = False
+        self.response_start = None
+        self.headers_sent = False
+        self.chunked = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections.add(self)
+        self.set_timer()
+
+    def connection_lost(self, exc):
+        self.server.connections.discard(self)
+        self.cancel_timer()
+
+        if not self.lost.done():
+            self.lost.set_result(None)
+
+        self.resume_writing()
+
+    def pause_writing(self):
+        if self.writable is None:
+            self.writable = self.loop.create_future()
+
+    def resume_writing(self):
+        writable, self.writable = self.writable, None
+
+        if writable is not None and not writable.done():
+            writable.set_result(None)
+
+    def data_received(self, data):
+        self.buffer += data
+
+        if self.task is None:
+            self.next_request()
+        elif len(self.buffer) > self.server.max_buffer_size:
+            # Pipelined requests are piling up. Catch up before reading more.
+            self.transport.pause_reading()
+
+    def set_timer(self, timeout=None):
+        self.cancel_timer()
+
+        if timeout is None:
+            timeout = self.server.keepalive_timeout
+
+        self.timer = self.loop.call_later(timeout, self.transport.close)
+
+    def cancel_timer(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def next_request(self):
+        """
+        Starts handling the next complete request in the buffer, if any.
+        """
+        try:
+            request = self.parse_request()
+        except RequestTooLarge as err:
+            self.server.log.debug("Request too large: {}".format(err))
+            self.transport.write(self.too_large)
+            self.transport.close()
+            return
+        except ValueError as err:
+            self.server.log.debug("Bad request: {}".format(err))
+            self.transport.write(self.bad_request)
+            self.transport.close()
+            return
+
+        if request is None:
+            if self.head is not None:
+                # Mid-body. Don't let the client stall it forever.
+                self.set_timer(self.server.read_timeout)
+
+            return
+
+        self.cancel_timer()
+        self.task = self.loop.create_task(self.handle(*request))
+
+    def parse_request(self):
+        """
+        Parses a request from the front of the buffer.
+
+        Returns:
+            tuple: The `(method, target, version, headers, body)` or `None`
+                if the request hasn't fully arrived yet
+
+        Raises:
+            ValueError: If the request is malformed
+            RequestTooLarge: If the body is over the server's
+                `max_body_size`
+        """
+        if self.head is None:
+            # Stray line breaks between requests are allowed.
+            while self.buffer[:2] == b"\r\n":
+                del self.buffer[:2]
+
+            end = self.buffer.find(b"\r\n\r\n")
+
+            if end == -1:
+                if len(self.buffer) > self.server.max_header_size:
+                    raise ValueError("Headers too large")
+
+                return None
+
+            self.head = self.parse_head(bytes(self.buffer[:end]))
+            del self.buffer[: end + 4]
+            self.chunks = []
+            self.chunk_offset = 0
+            self.chunks_size = 0
+            length = self.head[4]
+
+            if length is not None:
+                self.check_body_size(length)
+
+            if ("expect", "100-continue") in self.head[3]:
+                self.transport.write(self.continue_response)
+
+        method, target, version, headers, length = self.head
+
+        if length is None:
+            parsed = self.parse_chunked()
+
+            if parsed is None:
+                return None
+
+            body, used = parsed
+        elif len(self.buffer) >= length:
+            body, used = bytes(self.buffer[:length]), length
+        else:
+            return None
+
+        del self.buffer[:used]
+        self.head = None
+        return method, target, version, headers, body
+
+    def parse_head(self, data):
+        """
+        Parses the request line & headers.
+
+        Args:
+            data (bytes): Everything before the blank line
+
+        Returns:
+            tuple: The `(method, target, version, headers, length)`, where
+                the `length` is `None` for a chunked body
+
+        Raises:
+            ValueError: If the request is malformed
+        """
+        lines = data.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+
+        if len(parts) != 3 or parts[2] not in ("HTTP/1.0", "HTTP/1.1"):
+            raise ValueError("Bad request line {!r}".format(lines[0]))
+
+        method, target, version = parts
+        headers = []
+        length = 0
+        content_length = None
+
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+
+            if not sep or not name or name != name.strip():
+                raise ValueError("Bad header {!r}".format(line))
+
+            name = name.lower()
+            value = value.strip()
+            headers.append((name, value))
+
+            if name == "transfer-encoding" and "chunked" in value.lower():
+                length = None
+            elif name == "content-length" and length is not None:
+                if not self.content_length_re.fullmatch(value):
+                    raise ValueError("Bad Content-Length {!r}".format(value))
+
+                # Picking one of several lengths would let a proxy in front
+                # disagree about where the request ends (request smuggling).
+                if content_length is not None and int(value) != length:
+                    raise ValueError("Conflicting Content-Length headers")
+
+                content_length = length = int(value)
+
+        return method, target, version, headers, length
+
+    def check_body_size(self, size):
+        """
+        Ensures a request body isn't over the server's `max_body_size`.
+
+        Args:
+            size (int): The (so far) size of the body
+
+        Raises:
+            RequestTooLarge: If it's too large
+        """
+        max_body_size = self.server.max_body_size
+
+        if max_body_size is not None and size > max_body_size:
+            raise RequestTooLarge(
+                "Body of {}+ bytes is over {}".format(size, max_body_size)
+            )
+
+    def parse_chunked(self):
+        """
+        Decodes a chunked request body from the front of the buffer.
+
+        Picks up where the last call left off, so each byte is only looked
+        at once, however many pieces the body arrives in.
+
+        Returns:
+            tuple: The `(body, used)`, where `used` is how many bytes of the
+                buffer it took, or `None` if it hasn't fully arrived yet
+
+        Raises:
+            ValueError: If the chunks are malformed
+            RequestTooLarge: If the body is over the server's
+                `max_body_size`
+        """
+        while True:
+            offset = self.chunk_offset
+            end = self.buffer.find(b"\r\n", offset)
+
+            if end == -1:
+                if len(self.buffer) - offset > self.server.max_header_size:
+                    raise ValueError("Chunk size line too long")
+
+                return None
+
+            size = bytes(self.buffer[offset:end]).split(b";", 1)[0]
+
+            if not self.chunk_size_re.fullmatch(size):
+                raise ValueError("Bad chunk size {!r}".format(size))
+
+            size = int(size, 16)
+            start = end + 2
+
+            if size == 0:
+                # Skip over any trailers.
+                end = self.buffer.find(b"\r\n\r\n", start - 2)
+
+                if end == -1:
+                    return None
+
+                body = b"".join(self.chunks)
+                self.chunks = []
+                self.chunk_offset = 0
+                self.chunks_size = 0
+                return body, end + 4
+
+            self.check_body_size(self.chunks_size + size)
+
+            if len(self.buffer) < start + size + 2:
+                return None
+
+            self.chunks.append(bytes(self.buffer[start : start + size]))
+            self.chunks_size += size
+            self.chunk_offset = start + size + 2
+
+    async def handle(self, method, target, version, headers, body):
+        """
+        Runs a parsed request through `App.asgi`, then moves on to the next
+        one (or closes the connection).
+
+        Args:
+            method (str): The HTTP method
+            target (str): The requested path & query string
+            version (str): The HTTP version, e.g. `HTTP/1.1`
+            headers (list): The `(name, value)` pairs, with lowercase names
+            body (bytes): The request body
+        """
+        self.reset()
+        self.method = method
+        self.version = version
+        self.body = body
+        connection = dict(headers).get("connection", "").lower()
+
+        if version == "HTTP/1.1":
+            self.keep_alive = connection != "close"
+        else:
+            self.keep_alive = connection == "keep-alive"
+
+        path, _, query_string = target.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": version[5:],
+            "method": method,
+            "scheme": "http",
+            "path": urllib.parse.unquote(path),
+            "raw_path": path.encode("latin-1"),
+            "query_string": query_string.encode("latin-1"),
+            "root_path": "",
+            "headers": [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ],
+            "client": self.transport.get_extra_info("peername") or None,
+            "server": self.server.scope_server(),
+        }
+
+        try:
+            await self.server.app.asgi(scope, self.receive, self.send)
+        except Exception:
+            self.server.log.exception("Error handling {}".format(target))
+            self.keep_alive = False
+
+            if not self.headers_sent and not self.transport.is_closing():
+                self.transport.write(
+                    b"HTTP/1.1 500 Internal Server Error\r\n"
+                    b"Content-Length: 0\r\n"
+                    b"Connection: close\r\n\r\n"
+                )
+        finally:
+            self.task = None
+            self.server.request_done()
+
+        if (
+            not self.keep_alive
+            or self.server.stopping
+            or self.transport.is_closing()
+        ):
+            self.transport.close()
+            return
+
+        self.set_timer()
+        self.transport.resume_reading()
+
+        if self.buffer:
+            self.next_request()
+
+    async def receive(self):
+        """
+        The ASGI `receive` callable for the current request.
+        """
+        if self.body is not None:
+            body, self.body = self.body, None
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        # Shielded, as the future is shared by the whole connection. A
+        # cancelled `receive` (say, once a streamed response is done) mustn't
+        # take it down for the requests that follow.
+        await asyncio.shield(self.lost)
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        """
+        The ASGI `send` callable for the current request.
+
+        The status line & headers wait for the first part of the body, so
+        that a body sent in one go can be given a `Content-Length`.
+        """
+        if self.transport.is_closing():
+            return
+
+        if message["type"] == "http.response.start":
+            self.response_start = message
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.response_start is not None:
+            self.write_head(body, more_body)
+
+        if self.chunked:
+            if body:
+                self.transport.write(b"%x\r\n%b\r\n" % (len(body), body))
+
+            if not more_body:
+                self.transport.write(b"0\r\n\r\n")
+        elif body:
+            self.transport.write(body)
+
+        if self.writable is not None:
+            # The client is reading slowly. Don't buffer the whole body.
+            await self.writable
+
+    def write_head(self, body, more_body):
+        """
+        Writes the status line & headers, picking how the body is framed.
+
+        Args:
+            body (bytes): The first part of the body
+            more_body (bool): Whether more of the body is coming
+        """
+        status = self.response_start["status"]
+        headers = list(self.response_start.get("headers", []))
+        self.response_start = None
+        self.headers_sent = True
+        names = {}
+
+        for name, value in headers:
+            names[name.lower()] = value
+
+        if names.get(b"connection", b"").lower() == b"close":
+            self.keep_alive = False
+
+        has_body = (
+            self.method != HEAD and status >= 200 and status not in (204, 304)
+        )
+
+        if has_body and b"content-length" not in names:
+            if not more_body:
+                headers.append((b"Content-Length", b"%d" % len(body)))
+            elif self.version == "HTTP/1.1":
+                headers.append((b"Transfer-Encoding", b"chunked"))
+                self.chunked = True
+            else:
+                # Without a length, the end of the body is the end of the
+                # connection.
+                self.keep_alive = False
+
+        if b"connection" not in names:
+            if not self.keep_alive:
+                headers.append((b"Connection", b"close"))
+            elif self.version == "HTTP/1.0":
+                headers.append((b"Connection", b"keep-alive"))
+
+        if b"date" not in names:
+            headers.append((b"Date", self.server.date_header()))
+
+        reason = RESPONSE_CODES.get(status, "Unknown")
+        lines = [b"HTTP/1.1 %d %b" % (status, reason.encode("latin-1"))]
+        lines.extend(name + b": " + value for name, value in headers)
+        lines.append(b"\r\n")
+        self.transport.write(b"\r\n".join(lines))
+
+
+class AsyncioServer(SocketMixin, socketserver.TCPServer):
+    """
+    An HTTP/1.1 server built on `asyncio`, serving an `App` via `App.asgi`.
+
+    Connections are kept alive (with pipelining) between requests, so
+    clients skip the TCP setup per request. An idle connection is only a
+    small `AsyncioHttpProtocol` object, so thousands of them are cheap.
+    Blocking views run on a thread pool (`App.executor`), while `async def`
+    views run on the server's loop.
+
+    Has the same `serve_forever`/`shutdown`/`server_close` methods as the
+    `socketserver` servers, so it can also be used by `PreforkServer`.
+
+    Args:
+        server_address (tuple/str): The `(host, port)` (or Unix domain
+            socket path) to bind to
+        threads (int, Optional): How many threads to run blocking views on.
+            Default is `None` (the `concurrent.futures` default).
+        keepalive_timeout (int/float, Optional): How many seconds to wait
+            for the next request on a connection. Default is `5`.
+        bind_and_activate (bool, Optional): Whether to bind & listen right
+            away. Default is `True`.
+
+    The `max_body_size` (in bytes, or `None` for no limit) & `read_timeout`
+    (how many seconds a request body may stall for) class attributes can
+    be overridden in a subclass.
+    """
+
+    allow_reuse_address = True
+    request_queue_size = socket.SOMAXCONN
+    multithread = True
+    max_header_size = 65536
+    max_buffer_size = 1048576
+    max_body_size = 10 * 1024 * 1024
+    read_timeout = 30
+    graceful_timeout = 30
+
+    def __init__(
+        self,
+        server_address,
+        threads=None,
+        keepalive_timeout=5,
+        bind_and_activate=True,
+    ):
+        self.app = None
+        self.threads = threads
+        self.keepalive_timeout = keepalive_timeout
+        self.handled = 0
+        self.after_request = None
+        self.connections = set()
+        self.loop = None
+        self.stopping = False
+        self._stop = None
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._date = (None, b"")
+        super().__init__(server_address, None, bind_and_activate)
+
+    @property
+    def log(self):
+        return self.app.log if self.app is not None else log
+
+    def set_app(self, app):
+        """
+        Sets the `App` to serve.
+
+        Args:
+            app (App): The application
+        """
+        self.app = app
+
+    def serve_forever(self, poll_interval=None):
+        """
+        Serves requests until `AsyncioServer.shutdown` is called.
+        """
+        self._stopped.clear()
+
+        try:
+            asyncio.run(self.serve())
+        finally:
+            self._stopped.set()
+
+    async def serve(self):
+        """
+        Runs the server on the current event loop until shut down.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+
+        if self.stopping:
+            return
+
+        # Built here, as a forked worker can't use its parent's threads.
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="itty3"
+        )
+        self.app.executor = executor
+        self.app.use_loop(self.loop)
+        await self.app.run_hooks(self.app.startup_hooks)
+        server = await self.loop.create_server(
+            lambda: AsyncioHttpProtocol(self),
+            sock=self.socket,
+            backlog=self.request_queue_size,
+        )
+
+        try:
+            await self._stop.wait()
+        finally:
+            self.stopping = True
+            server.close()
+            await self.close_connections()
+            await self.app.run_hooks(self.app.shutdown_hooks)
+            executor.shutdown(wait=False)
+            self.app.executor = None
+
+    async def close_connections(self):
+        """
+        Closes idle connections, then gives in-flight requests up to
+        `graceful_timeout` seconds to finish.
+        """
+        deadline = time.monotonic() + self.graceful_timeout
+
+        while self.connections:
+            for conn in list(self.connections):
+                if conn.task is None:
+                    conn.transport.close()
+
+            if time.monotonic() >= deadline:
+                for conn in list(self.connections):
+                    conn.transport.abort()
+
+                    if conn.task is not None:
+                        conn.task.cancel()
+
+                break
+
+            await asyncio.sleep(0.05)
+
+    def shutdown(self):
+        """
+        Stops `AsyncioServer.serve_forever` & waits for it to finish.
+
+        Must be called from a different thread than the server's.
+        """
+        self.stopping = True
+        loop, stop = self.loop, self._stop
+
+        if loop is not None and stop is not None:
+            try:
+                loop.call_soon_threadsafe(stop.set)
+            except RuntimeError:
+                # The loop has already closed.
+                pass
+
+        self._stopped.wait()
+
+    def scope_server(self):
+        """
+        Returns the ASGI `server` for request scopes.
+
+        Returns:
+            tuple: The `(host, port)` or `(path, None)` for a Unix socket
+        """
+        if self.is_unix():
+            return (self.server_address, None)
+
+        return tuple(self.server_address[:2])
+
+    def request_done(self):
+        """
+        Counts a finished request & calls `AsyncioServer.after_request`.
+        """
+        self.handled += 1
+
+        if self.after_request is not None:
+            self.after_request(self)
+
+    def date_header(self):
+        """
+        Returns the value of the `Date` header, cached for a second.
+
+        Returns:
+            bytes: The current date, formatted for HTTP
+        """
+        now = int(time.time())
+
+        if self._date[0] != now:
+            self._date = (
+                now,
+                email.utils.formatdate(now, usegmt=True).encode("latin-1"),
+            )
+
+        return self._date[1]
+
+    def stats(self):
+        """
+        Returns information about the connections.
+
+        Returns:
+            dict: The open `connections`, those `active` (with a request in
+                progress) & how many requests were `handled`
+        """
+        return {
+            "connections": len(self.connections),
+            "active": len(
+                [conn for conn in self.connections if conn.task is not None]
+            ),
+            "handled": self.handled,
+        }
+
+
+class PreforkServer(object):
+    """
+    Runs an `App` in several forked worker processes, to use more than one
+    core.
+
+    The app is loaded once, in the parent, which then forks the workers &
+    supervises them: crashed workers are replaced, `SIGTERM`/`SIGINT` shut
+    everything down gracefully & `SIGHUP` gracefully replaces the workers.
+    `SIGUSR1` logs each worker's shared & private memory.
+
+    Workers can also be recycled (finishing their in-flight requests, then
+    being replaced) after `max_requests` or once over `max_rss_mb`, to
+    contain slow leaks.
+
+    By default, the workers share a single listening socket. With
+    `reuse_port`, each binds its own (via `SO_REUSEPORT`) & the kernel
+    balances connections between them.
+
+    Args:
+        app (App): The application to serve
+        addr (str, Optional): The address to bind to. Default is
+            `127.0.0.1`.
+        port (int, Optional): The port to bind to. Default is `8000`.
+        workers (int, Optional): How many worker processes to run. Default
+            is `2`.
+        threads (int, Optional): If provided, each worker handles this
+            many requests at once. Default is `None`.
+        queue_size (int, Optional): For threaded workers, how many
+            connections may wait for a free thread. Default is `None`.
+        reuse_port (bool, Optional): Bind a socket per worker, with
+            `SO_REUSEPORT`. Default is `False`.
+        graceful_timeout (int/float, Optional): How many seconds workers
+            get to finish in-flight requests before being killed. Default
+            is `30`.
+        preload (bool, Optional): Call `App.preload` before forking, so
+            more memory stays shared with the workers. Default is `False`.
+        memory_interval (int/float, Optional): If provided, log each
+            worker's memory use every this many seconds. Default is `None`.
+        max_requests (int, Optional): If provided, recycle workers after
+            about this many requests. Default is `None`.
+        max_requests_jitter (int, Optional): Up to this many requests are
+            randomly added to each worker's `max_requests`, so they don't
+            all recycle at once. Default is `None` (10% of `max_requests`).
+        max_rss_mb (int/float, Optional): If provided, recycle workers once
+            using more than this many megabytes. Default is `None`.
+        server (str, Optional): The server each worker runs: `wsgiref` or
+            `asyncio`. Default is `wsgiref`.
+        unix_socket (str, Optional): Listen on a Unix domain socket at this
+            path, instead of `addr` & `port`. Default is `None`.
+        unix_socket_mode (int, Optional): The permissions for the
+            `unix_socket`. Default is `None`.
+        fd (int, Optional): Serve from this already-listening socket,
+            instead of binding. Default is `None`.
+    """
+
+    poll_interval = 0.5
+    supervisor_signals = ("SIGTERM", "SIGINT", "SIGHUP", "SIGUSR1", "SIGCHLD")
+
+    def __init__(
+        self,
+        app,
+        addr="127.0.0.1",
+        port=8000,
+        workers=2,
+        threads=None,
+        queue_size=None,
+        reuse_port=False,
+        graceful_timeout=30,
+        preload=False,
+        memory_interval=None,
+        max_requests=None,
+        max_requests_jitter=None,
+        max_rss_mb=None,
+        server="wsgiref",
+        unix_socket=None,
+        unix_socket_mode=None,
+        fd=None,
+    ):
+        self.app = app
+        self.addr = addr
+        self.port = port
+        self.workers = max(int(workers), 1)
+        self.threads = threads
+        self.queue_size = queue_size
+        self.reuse_port = reuse_port
+        self.graceful_timeout = graceful_timeout
+        self.preload = preload
+        self.memory_interval = memory_interval
+        self.max_requests = max_requests
+        self.max_rss_mb = max_rss_mb
+        self.server = server
+        self.unix_socket = unix_socket
+        self.unix_socket_mode = unix_socket_mode
+        self.fd = fd
+        self.location = None
+
+        if max_requests_jitter is None and max_requests:
+            max_requests_jitter = max_requests // 10
+
+        self.max_requests_jitter = max_requests_jitter or 0
+        self.httpd = None
+        self.children = {}
+        self.running = False
+        self._reload = False
+        self._report_memory = False
+        self._last_report = time.monotonic()
+        self._wakeup = None
+        self._sigmask = set()
+
+    def __str__(self):
+        return "<PreforkServer: {}:{} ({} workers)>".format(
+            self.addr, self.port, self.workers
+        )
+
+    def __repr__(self):
+        return str(self)
+
+    @property
+    def log(self):
+        return self.app.log
+
+    def bind(self):
+        """
+        Creates the server (& listening socket) that workers inherit.
+
+        With `reuse_port`, only the address is checked, as each worker
+        binds its own socket.
+
+        Returns:
+            wsgiref.simple_server.WSGIServer: The server
+        """
+        httpd = self.app.make_server(
+            self.addr,
+            self.port,
+            threads=self.threads,
+            queue_size=self.queue_size,
+            reuse_port=self.reuse_port,
+            server=self.server,
+            unix_socket=self.unix_socket,
+            unix_socket_mode=self.unix_socket_mode,
+            fd=self.fd,
+        )
+
+        # The workers all `accept` on this socket. Non-blocking means those
+        # that lose the race for a connection go back to waiting, rather
+        # than blocking inside `accept`.
+        httpd.socket.setblocking(False)
+        self.port = httpd.server_port
+        self.location = httpd.location()
+        return httpd
+
+    def serve_forever(self):
+        """
+        Starts the workers & supervises them until told to stop.
+        """
+        if self.preload:
+            self.app.preload()
+
+        self.httpd = self.bind()
+
+        if self.reuse_port:
+            # Binding was only to check the address & learn the port. Close
+            # the socket, as the kernel would otherwise hand it a share of
+            # the connections, which nothing here accepts. Each worker binds
+            # its own socket to `self.port`.
+            self.httpd.server_close()
+
+        self.running = True
+        self.install_signals()
+        self.log.info(
+            "itty3 {}: Now serving requests at {} with {} workers...".format(
+                get_version(full=True), self.location, self.workers
+            )
+        )
+
+        try:
+            while self.running:
+                self.reap()
+
+                if self._reload:
+                    self._reload = False
+                    self.reload()
+
+                self.spawn_missing()
+
+                if self._report_memory or self.memory_report_due():
+                    self._report_memory = False
+                    self.log_memory()
+
+                self.sleep()
+        finally:
+            self.stop()
+
+    def sleep(self):
+        """
+        Waits up to `poll_interval` seconds, returning early if a signal
+        arrives.
+        """
+        try:
+            ready, _, _ = select.select(
+                [self._wakeup[0]], [], [], self.poll_interval
+            )
+        except InterruptedError:  # pragma: no cover
+            return
+
+        if ready:
+            try:
+                os.read(self._wakeup[0], 4096)
+            except BlockingIOError:
+                pass
+
+    def wakeup(self):
+        """
+        Cuts short the current `PreforkServer.sleep`.
+
+        Safe to call from a signal handler.
+        """
+        if self._wakeup is None:
+            return
+
+        try:
+            os.write(self._wakeup[1], b"\0")
+        except BlockingIOError:
+            pass
+
+    def install_signals(self):
+        """
+        Sets up the signal handlers of the supervising process.
+        """
+        # A self-pipe, as signal handlers can't safely take locks.
+        self._wakeup = os.pipe()
+
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        signal.signal(signal.SIGUSR1, self.handle_memory)
+        signal.signal(signal.SIGCHLD, self.handle_child)
+
+    def handle_stop(self, signum, frame):
+        self.running = False
+        self.wakeup()
+
+    def handle_reload(self, signum, frame):
+        self._reload = True
+        self.wakeup()
+
+    def handle_memory(self, signum, frame):
+        self._report_memory = True
+        self.wakeup()
+
+    def handle_child(self, signum, frame):
+        # Replace exited workers right away, rather than at the next poll.
+        self.wakeup()
+
+    def memory_report_due(self):
+        """
+        Determines if it's time for the periodic memory report.
+
+        Returns:
+            bool: True if a report should be logged, False otherwise
+        """
+        if not self.memory_interval:
+            return False
+
+        return time.monotonic() - self._last_report >= self.memory_interval
+
+    def log_memory(self):
+        """
+        Logs how much of each worker's memory is shared vs. private.
+
+        Returns:
+            dict: The `memory_usage` of each worker, by process ID
+        """
+        self._last_report = time.monotonic()
+        report = {}
+
+        for pid in sorted(self.children):
+            usage = memory_usage(pid)
+            report[pid] = usage
+
+            if usage is None:
+                self.log.info("Worker {}: memory use unavailable".format(pid))
+                continue
+
+            self.log.info(
+                "Worker {}: {:.1f}Mb RSS, {:.1f}Mb shared, {:.1f}Mb private, "
+                "{:.1f}Mb PSS".format(
+                    pid,
+                    usage["rss"] / 1048576,
+                    usage["shared"] / 1048576,
+                    usage["private"] / 1048576,
+                    usage["pss"] / 1048576,
+                )
+            )
+
+        return report
+
+    def spawn_missing(self):
+        """
+        Forks workers until there are `workers` of them.
+        """
+        while self.running and len(self.children) < self.workers:
+            self.spawn()
+
+    def spawn(self):
+        """
+        Forks a single worker.
+
+        Returns:
+            int: The process ID of the new worker
+        """
+        # Hold signals until the worker has its own handlers, so it can't
+        # run the supervisor's (& miss being told to stop).
+        self._sigmask = signal.pthread_sigmask(
+            signal.SIG_BLOCK,
+            [getattr(signal, name) for name in self.supervisor_signals],
+        )
+        pid = os.fork()
+
+        if pid:
+            signal.pthread_sigmask(signal.SIG_SETMASK, self._sigmask)
+            self.children[pid] = time.monotonic()
+            self.log.info("Started worker {}".format(pid))
+            return pid
+
+        # In the worker.
+        code = 0
+
+        try:
+            self.run_worker()
+        except BaseException:
+            self.log.exception("Worker {} failed!".format(os.getpid()))
+            code = 1
+        finally:
+            # Skip the parent's `atexit` handlers & the like.
+            os._exit(code)
+
+    def run_worker(self):
+        """
+        Serves requests (in the forked worker) until told to stop.
+        """
+        self.children = {}
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+        for fd in self._wakeup or ():
+            os.close(fd)
+
+        if self.reuse_port:
+            httpd = self.bind()
+        else:
+            httpd = self.httpd
+
+        stopping = threading.Event()
+
+        def stop(*args):
+            if stopping.is_set():
+                return
+
+            stopping.set()
+            # `shutdown` waits on the serving loop, so can't be called from
+            # the loop's own thread.
+            threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+        max_requests = None
+
+        if self.max_requests:
+            max_requests = self.max_requests + random.randint(
+                0, self.max_requests_jitter
+            )
+
+        def check_limits(server):
+            reason = self.recycle_reason(server.handled, max_requests)
+
+            if reason and not stopping.is_set():
+                self.log.info(
+                    "Recycling worker {}: {}".format(os.getpid(), reason)
+                )
+                stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.pthread_sigmask(signal.SIG_SETMASK, self._sigmask)
+        httpd.handled = 0
+        httpd.after_request = check_limits
+
+        # Background threads don't survive a `fork`.
+        if hasattr(httpd, "start_workers"):
+            httpd.start_workers()
+
+        for manifest in self.app.static_manifests():
+            manifest.watch()
+
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+            self.app.flush_background()
+
+    def recycle_reason(self, handled, max_requests=None):
+        """
+        Determines if a worker should be recycled.
+
+        Args:
+            handled (int): How many requests the worker has handled
+            max_requests (int, Optional): The worker's request limit
+                (including jitter). Default is `None` (no limit).
+
+        Returns:
+            str: Why the worker should be recycled, or `None` if it
+                shouldn't be
+        """
+        if max_requests and handled >= max_requests:
+            return "handled {} requests".format(handled)
+
+        if self.max_rss_mb:
+            rss = resident_memory()
+
+            if rss is not None and rss > self.max_rss_mb * 1048576:
+                return "using {:.1f}Mb (limit {}Mb)".format(
+                    rss / 1048576, self.max_rss_mb
+                )
+
+        return None
+
+    def reap(self):
+        """
+        Collects exited workers, logging any that exited unexpectedly.
+
+        Returns:
+            list: The process IDs of exited workers
+        """
+        reaped = []
+
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if not pid:
+                break
+
+            self.children.pop(pid, None)
+            reaped.append(pid)
+            code = os.waitstatus_to_exitcode(status)
+
+            if self.running and code != 0:
+                self.log.error(
+                    "Worker {} exited with {}. Replacing it...".format(
+                        pid, code
+                    )
+                )
+            else:
+                self.log.info("Worker {} exited".format(pid))
+
+        return reaped
+
+    def reload(self):
+        """
+        Gracefully replaces all the workers.
+        """
+        self.log.info("Reloading workers...")
+        old = list(self.children)
+        self.children = {}
+        self.spawn_missing()
+        self.stop_workers(old)
+
+    def stop_workers(self, pids):
+        """
+        Asks workers to finish their in-flight requests & exit, killing any
+        that take longer than `graceful_timeout`.
+
+        Args:
+            pids (list): The process IDs of the workers to stop
+        """
+        pending = set(pids)
+
+        for pid in pending:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+
+        while pending and time.monotonic() < deadline:
+            for pid in list(pending):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+
+                if done:
+                    pending.discard(pid)
+
+            time.sleep(0.05)
+
+        for pid in pending:
+            self.log.warning("Killing unresponsive worker {}".format(pid))
+
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+    def stop(self):
+        """
+        Gracefully stops all the workers & closes the socket.
+        """
+        self.running = False
+        pids, self.children = list(self.children), {}
+        self.stop_workers(pids)
+
+        if self.httpd is not None:
+            self.httpd.server_close()
+            self.httpd = None
+
+        if self._wakeup is not None:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            wakeup, self._wakeup = self._wakeup, None
+
+            for fd in wakeup:
+                os.close(fd)
+
+
+# App!
+class App(object):
+    """
+    An orchestration object that handles routing & request processing.
+
+    Args:
+        debug (bool): Allows for controlling a debugging mode.
+        compress (bool, Optional): Whether responses should be compressed
+            (gzip/deflate) for clients that accept it. Default is `False`.
+        compress_level (int, Optional): The `zlib` compression level, from
+            `1` (fastest) to `9` (smallest). Default is `6`.
+        compress_min_size (int, Optional): Bodies smaller than this many
+            bytes aren't worth compressing & are sent as-is. Default is
+            `500`.
+        etags (bool, Optional): Whether to automatically add a weak `ETag`
+            (a hash of the body) to successful `GET`/`HEAD` responses.
+            Default is `False`.
+        cache_backend (object, Optional): The storage used to cache
+            responses for routes with a `cache_ttl`. Default is a new
+            `MemoryCache`.
+        coalesce_timeout (int/float, Optional): How many seconds requests
+            to a `coalesce` route wait on an identical in-flight request
+            before running the view themselves. Default is `10`.
+        json_backend (JSONBackend, Optional): What `App.render_json` uses to
+            encode data. Default is a new `JSONBackend` (the stdlib `json`
+            module). See also `OrjsonBackend`.
+        max_concurrency (int, Optional): If provided, at most this many
+            requests are handled at once, across all routes. The rest get
+            a `503` (see `App.error_503`). Default is `None` (no limit).
+        concurrency_queue (int, Optional): With `max_concurrency`, how many
+            requests may wait for a turn. Default is `0`.
+        concurrency_timeout (int/float, Optional): With
+            `concurrency_queue`, how many seconds a request waits. Default
+            is `None` (wait indefinitely).
+        reserved_concurrency (int, Optional): With `max_concurrency`, how
+            many of the slots are kept for high priority routes (see
+            `Route`). Default is `0`.
+        deadline (int/float, Optional): How many seconds a request may take
+            (routes can override it). Past it, the view is abandoned & the
+            request gets a `504` (see `App.error_504`). Default is `None`
+            (no deadline).
+        deadline_workers (int, Optional): How many threads run views with
+            a deadline (see `App.run_with_deadline`). Once they're all busy
+            (including with abandoned views), requests get a `503` rather
+            than waiting. Default is `32`.
+        background_workers (int, Optional): How many threads run the tasks
+            from `HttpResponse.add_background` (see `BackgroundQueue`).
+            Default is `2`.
+    """
+
+    def __init__(
+        self,
+        debug=False,
+        compress=False,
+        compress_level=6,
+        compress_min_size=500,
+        etags=False,
+        cache_backend=None,
+        coalesce_timeout=10,
+        json_backend=None,
+        max_concurrency=None,
+        concurrency_queue=0,
+        concurrency_timeout=None,
+        reserved_concurrency=0,
+        deadline=None,
+        deadline_workers=32,
+        background_workers=2,
+    ):
+        self._routes = []
+        self.routes_frozen = False
+        self.debug = debug
+        self.static_root = None
+        self.static_url_path = None
+        self.static_manifest = None
+        self.static_mounts = []
+        self.compress = compress
+        self.compress_level = int(compress_level)
+        self.compress_min_size = int(compress_min_size)
+        self.etags = etags
+        self.response_cache = ResponseCache(backend=cache_backend)
+        self.single_flight = SingleFlight(timeout=coalesce_timeout)
+        # Route -> the `Vary` header names its coalesced responses used.
+        self._coalesce_vary = {}
+        self.limiter = None
+
+        if max_concurrency:
+            self.limiter = ConcurrencyLimiter(
+                max_concurrency,
+                queue_size=concurrency_queue,
+                timeout=concurrency_timeout,
+                reserved=reserved_concurrency,
+            )
+
+        self.deadline = deadline
+        self.deadlines_exceeded = 0
+        self.deadline_workers = max(int(deadline_workers), 1)
+        self.deadline_busy = 0
+        self.deadline_rejected = 0
+        self.deadline_executor = None
+        self._deadline_pid = None
+        self._deadline_lock = threading.Lock()
+        self.background = BackgroundQueue(workers=background_workers)
+        self.json_backend = json_backend or JSONBackend()
+        self.executor = None
+        self.loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        self.startup_hooks = []
+        self.shutdown_hooks = []
+        self.log = self.get_log()
+
+    def get_log(self):
+        """
+        Returns a `logging.Logger` instance.
+
+        By default, we return the `itty3` module-level logger. Users are
+        free to override this to meet their needs.
+
+        Returns:
+            logging.Logger: The module-level logger
+        """
+        return log
+
+    def __call__(self, environ, start_response):
+        # Allows providing the `App` instance as the WSGI handler to
+        # many WSGI servers.
+        return self.process_request(environ, start_response)
+
+    def add_route(self, method, path, func, **options):
+        """
+        Adds a given HTTP method, URI path & view to the routing.
+
+        Args:
+            method (str): The HTTP method to handle
+            path (str): The URI path to handle
+            func (callable): The view function to process a matching request
+            **options (Optional): Any per-route options (such as
+                `cache_ttl`), passed along to `Route`.
+
+        Raises:
+            IttyException: If the routes have been frozen
+        """
+        self.check_routes_unfrozen()
+        route = Route(method, path, func, **options)
+        self._routes.append(route)
+        self.log.debug("Added {} - {}".format(route, func.__name__))
+
+    def find_route(self, method, path):
+        """
+        Determines the routing offset for a given HTTP method & URI path.
+
+        Args:
+            method (str): The HTTP method to handle
+            path (str): The URI path to handle
+
+        Returns:
+            int: The offset of the matching route
+
+        Raises:
+            RouteNotFound: If a matching route is not found
+        """
+        for offset, route in enumerate(self._routes):
+            if route.method == method:
+                if route.path == path:
+                    return offset
+
+        raise RouteNotFound()
+
+    def remove_route(self, method, path):
+        """
+        Removes a route from the routing.
+
+        Args:
+            method (str): The HTTP method to handle
+            path (str): The URI path to handle
+
+        Raises:
+            IttyException: If the routes have been frozen
+        """
+        self.check_routes_unfrozen()
+
+        try:
+            offset = self.find_route(method, path)
+            old_route = self._routes.pop(offset)
+            self.log.debug("Removed {}".format(old_route))
+        except RouteNotFound:
+            pass
+
+    def freeze_routes(self):
+        """
+        Prevents any further changes to the routing.
+
+        The routes are stored as a `tuple` from then on.
+        """
+        self._routes = tuple(self._routes)
+        self.routes_frozen = True
+
+    def check_routes_unfrozen(self):
+        """
+        Ensures the routing can still be changed.
+
+        Raises:
+            IttyException: If the routes have been frozen
+        """
+        if self.routes_frozen:
+            raise IttyException(
+                "The routes are frozen & can no longer be changed."
+            )
+
+    def render(
+        self, request, body, status_code=200, content_type=HTML, headers=None,
+    ):
+        """
+        A convenience method for creating a `HttpResponse` object.
+
+        Args:
+            request (HttpRequest): The request being handled
+            body (str): The body of the response
+            status_code (int, Optional): The HTTP status to return. Defaults
+                to `200`.
+            content_type (str, Optional): The `Content-Type` header to return
+                with the response. Defaults to `text/html`.
+            headers (dict, Optional): The HTTP headers to include on the
+                response. Defaults to empty headers.
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        return HttpResponse(
+            body=body,
+            status_code=status_code,
+            headers=headers,
+            content_type=content_type,
+        )
+
+    def render_json(
+        self,
+        request,
+        data,
+        status_code=200,
+        content_type=JSON,
+        headers=None,
+        stream=False,
+    ):
+        """
+        A convenience method for creating a JSON `HttpResponse` object.
+
+        The data is encoded straight to `bytes` by `App.json_backend`.
+
+        Large lists can be streamed (an item at a time) by passing
+        `stream=True`. Generators & other iterators are always streamed as
+        a JSON array.
+
+        Args:
+            request (HttpRequest): The request being handled
+            data (dict/list/iterable): The Python data structure to be
+                encoded as JSON
+            status_code (int, Optional): The HTTP status to return. Defaults
+                to `200`.
+            content_type (str, Optional): The `Content-Type` header to return
+                with the response. Defaults to `text/html`.
+            headers (dict, Optional): The HTTP headers to include on the
+                response. Defaults to empty headers.
+            stream (bool, Optional): If the body should be streamed in
+                chunks. Default is `False`.
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        # Generators & the like can only be encoded by streaming them.
+        stream = stream or (
+            self.json_backend.is_array_like(data)
+            and not isinstance(data, (list, tuple))
+        )
+
+        if stream:
+            body = self.json_backend.iterencode(data, pretty=self.debug)
+        else:
+            body = self.json_backend.dumps(data, pretty=self.debug)
+
+        return self.render(
+            request,
+            body,
+            status_code=status_code,
+            content_type=content_type,
+            headers=headers,
+        )
+
+    def iter_with_heartbeat(self, iterable, heartbeat, keepalive):
+        """
+        Iterates over a (slow) iterable, emitting keep-alives while idle.
+
+        See `HeartbeatStream`.
+
+        Args:
+            iterable (iterable): The source of items
+            heartbeat (int/float): Seconds of idleness between keep-alives
+            keepalive (bytes): What to yield when idle
+
+        Returns:
+            HeartbeatStream: The items, interspersed with keep-alives
+        """
+        return HeartbeatStream(iterable, heartbeat, keepalive)
+
+    def _iter_ndjson(self, records):
+        try:
+            for record in records:
+                yield self.json_backend.dumps(record) + b"\n"
+        finally:
+            close = getattr(records, "close", None)
+
+            if close is not None:
+                close()
+
+    def render_ndjson(
+        self, request, records, status_code=200, headers=None,
+    ):
+        """
+        A convenience method for streaming newline-delimited JSON.
+
+        Each record is encoded (via `App.json_backend`) & sent as its own
+        chunk as soon as it's produced, so clients can process a
+        long-running stream incrementally.
+
+        Args:
+            request (HttpRequest): The request being handled
+            records (iterable): The records to send. Typically a generator.
+            status_code (int, Optional): The HTTP status to return. Defaults
+                to `200`.
+            headers (dict, Optional): The HTTP headers to include on the
+                response. Defaults to empty headers.
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        headers = dict(headers or {})
+        headers.setdefault("Cache-Control", "no-cache")
+        # Stop nginx from buffering up the stream.
+        headers.setdefault("X-Accel-Buffering", "no")
+        return self.render(
+            request,
+            self._iter_ndjson(records),
+            status_code=status_code,
+            content_type=NDJSON,
+            headers=headers,
+        )
+
+    def _iter_sse(self, events, retry):
+        if retry is not None:
+            yield "retry: {}\n\n".format(int(retry)).encode("utf-8")
+
+        try:
+            for event in events:
+                if isinstance(event, bytes):
+                    event = event.decode("utf-8")
+
+                if isinstance(event, str):
+                    event = ServerSentEvent(event)
+                elif not isinstance(event, ServerSentEvent):
+                    data = self.json_backend.dumps(event).decode("utf-8")
+                    event = ServerSentEvent(data)
+
+                yield event.encode()
+        finally:
+            close = getattr(events, "close", None)
+
+            if close is not None:
+                close()
+
+    def render_sse(
+        self, request, events, heartbeat=15, retry=None, headers=None,
+    ):
+        """
+        A convenience method for streaming Server-Sent Events.
+
+        Events can be `ServerSentEvent` instances, strings (sent as the
+        `data`) or anything JSON-encodable (encoded via `App.json_backend`).
+        Each is sent as its own chunk as soon as it's produced.
+
+        While waiting on the next event, a comment is sent every `heartbeat`
+        seconds to keep the connection alive. If the client disconnects,
+        `events` is closed once it next produces an event.
+
+        Reconnecting browsers send a `Last-Event-ID` header, available in
+        `request.headers`, to resume from.
+
+        Args:
+            request (HttpRequest): The request being handled
+            events (iterable): The events to send. Typically a generator.
+            heartbeat (int/float, Optional): Seconds of idleness between
+                keep-alive comments. Default is `15`. `None` disables them.
+            retry (int, Optional): How many milliseconds the browser should
+                wait before reconnecting. Default is `None`.
+            headers (dict, Optional): The HTTP headers to include on the
+                response. Defaults to empty headers.
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        headers = dict(headers or {})
+        headers.setdefault("Cache-Control", "no-cache")
+        # Stop nginx from buffering up the stream.
+        headers.setdefault("X-Accel-Buffering", "no")
+        body = self._iter_sse(events, retry)
+
+        if heartbeat is not None:
+            body = self.iter_with_heartbeat(
+                body, heartbeat, b": keep-alive\n\n"
+            )
+
+        return self.render(
+            request, body, content_type=EVENT_STREAM, headers=headers,
+        )
+
+    def redirect(self, request, url, permanent=False):
+        """
+        A convenience function for supplying a HTTP redirect.
+
+        Args:
+            request (HttpRequest): The request being handled
+            url (str): A path or full URL to redirect the user to
+            permanent (bool, Optional): Whether the redirect should be
+                considered permanent or not. Defaults to `False` (temporary
+                redirect).
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        status_code = 302
+
+        if permanent:
+            status_code = 301
+
+        return self.render(
+            request,
+            body="",
+            headers={"Location": url},
+            status_code=status_code,
+            content_type=PLAIN,
+        )
+
+    def render_static(self, request, asset_path):
+        """
+        Handles serving static assets.
+
+        WARNING: This should really only be used in development!
+
+        It's slow (compared to nginx, Apache or whatever), it hasn't gone
+        through any security assessments (which means potential security
+        holes), it's imperfect w/ regard to mimetypes.
+
+        Args:
+            request (HttpRequest): The request being handled
+            asset_path (str): A path of the asset to be served
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        if not self.static_root:
+            return self.error_404(request)
+
+        mount = StaticMount(
+            self.static_url_path or "/static/",
+            self.static_root,
+            manifest=self.static_manifest,
+        )
+        return self.serve_static(request, mount, asset_path)
+
+    def serve_static(self, request, mount, asset_path):
+        """
+        Serves an asset from a `StaticMount`.
+
+        Args:
+            request (HttpRequest): The request being handled
+            mount (StaticMount): The mount to serve from
+            asset_path (str): The path of the asset, relative to the mount
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        asset = mount.find(asset_path)
+
+        # If it doesn't exist, immediately return a 404.
+        if asset is None:
+            return self.error_404(request)
+
+        if mount.offload:
+            resp = self.offload_asset(
+                request, asset, mount.offload, offload_map=mount.offload_map
+            )
+        else:
+            resp = self.serve_asset(request, asset, manifest=mount.manifest)
+
+        if mount.cache_control and not asset.immutable:
+            resp.set_header("Cache-Control", mount.cache_control)
+
+        return resp
+
+    def add_static(
+        self,
+        prefix,
+        root,
+        cache_control=None,
+        scan=False,
+        watch_interval=None,
+        offload=None,
+        offload_map=None,
+    ):
+        """
+        Serves the files under a root at a URL prefix.
+
+        Unlike a route, mounts are checked before any routes (longest
+        prefix first), & work under any WSGI server, not just `App.run`.
+        Several mounts may be added. e.g. `/static/` & `/media/`
+
+        Args:
+            prefix (str): The URL prefix. e.g. `/static/`
+            root (str): The filesystem path to the assets
+            cache_control (str, Optional): The `Cache-Control` to send with
+                assets. e.g. `public, max-age=3600`. Default is `None`.
+            scan (bool, Optional): If `True`, build a `StaticManifest` of
+                the root up-front. Default is `False`.
+            watch_interval (int/float, Optional): If scanning, re-scan every
+                this many seconds. Default is `None` (no watching).
+            offload (str, Optional): Have the front-end server send the
+                files, via `itty3.X_ACCEL_REDIRECT` or `itty3.X_SENDFILE`.
+                Default is `None` (send them from Python).
+            offload_map (dict, Optional): Maps filesystem path prefixes to
+                what the front-end server knows them as. Default is `None`.
+
+        Returns:
+            StaticMount: The new mount
+        """
+        manifest = None
+
+        if scan:
+            manifest = StaticManifest(root, watch_interval=watch_interval)
+            manifest.scan()
+            manifest.watch()
+
+        mount = StaticMount(
+            prefix,
+            root,
+            cache_control=cache_control,
+            manifest=manifest,
+            offload=offload,
+            offload_map=offload_map,
+        )
+        mounts = [m for m in self.static_mounts if m.prefix != mount.prefix]
+        mounts.append(mount)
+        # Longest first, so nested prefixes win.
+        mounts.sort(key=lambda m: len(m.prefix), reverse=True)
+        self.static_mounts = mounts
+        self.log.debug("Added {}".format(mount))
+        return mount
+
+    def find_static_mount(self, request):
+        """
+        Finds the static mount (if any) that should serve a request.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            StaticMount: The mount, or `None` if none match
+        """
+        for mount in self.static_mounts:
+            if mount.can_handle(request.method, request.path):
+                return mount
+
+        return None
+
+    def static_manifests(self):
+        """
+        Lists the static manifests in use.
+
+        Returns:
+            list: The `StaticManifest` objects
+        """
+        manifests = [self.static_manifest]
+        manifests.extend(mount.manifest for mount in self.static_mounts)
+        unique = []
+
+        for manifest in manifests:
+            if manifest is not None and manifest not in unique:
+                unique.append(manifest)
+
+        return unique
+
+    def serve_asset(self, request, asset, manifest=None):
+        """
+        Builds the response for a static asset.
+
+        If the asset has a precompressed (`.gz`) variant & the client
+        accepts `gzip`, the variant is served instead, with a
+        `Content-Encoding` header.
+
+        Args:
+            request (HttpRequest): The request being handled
+            asset (StaticAsset): The asset to serve
+            manifest (StaticManifest, Optional): The manifest to read small
+                files from memory through. Default is `None` (stream the
+                file from disk).
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        headers = dict(asset.headers)
+        variant = asset
+
+        if asset.gzip is not None:
+            headers["Vary"] = "Accept-Encoding"
+
+            if self.choose_encoding(request, codings=(GZIP,)) == GZIP:
+                variant = asset.gzip
+                headers.update(variant.headers)
+                headers["Content-Encoding"] = GZIP
+
+        content = None
+
+        if manifest is not None:
+            content = manifest.read(variant)
+
+        if content is None:
+            # Hand off the open file, so that only what's actually sent
+            # (such as a requested byte range) gets read.
+            content = open(variant.path, "rb")
+
+        return self.render(
+            request,
+            content,
+            content_type=asset.content_type,
+            headers=headers,
+        )
+
+    def offload_location(self, path, offload, offload_map=None):
+        """
+        Translates a filesystem path into what the front-end server should
+        be told to send.
+
+        Args:
+            path (str): The filesystem path of the file
+            offload (str): Either `itty3.X_ACCEL_REDIRECT` or
+                `itty3.X_SENDFILE`
+            offload_map (dict, Optional): Maps filesystem path prefixes to
+                what the front-end server knows them as. Default is `None`.
+
+        Returns:
+            str: The header value, or `None` if an `X-Accel-Redirect` has
+                no mapping (as it needs an internal URI)
+        """
+        path = os.path.abspath(path)
+        prefixes = sorted(offload_map or {}, key=len, reverse=True)
+
+        for fs_prefix in prefixes:
+            cleaned = os.path.abspath(fs_prefix)
+
+            if path != cleaned and not path.startswith(cleaned + os.sep):
+                continue
+
+            relative = os.path.relpath(path, cleaned).replace(os.sep, "/")
+            target = offload_map[fs_prefix].rstrip("/")
+            location = "{}/{}".format(target, relative)
+
+            if offload == X_ACCEL_REDIRECT:
+                return urllib.parse.quote(location)
+
+            return location
+
+        if offload == X_ACCEL_REDIRECT:
+            return None
+
+        return path
+
+    def offload_asset(self, request, asset, offload, offload_map=None):
+        """
+        Builds a bodiless response, which has the front-end server (nginx,
+        Apache, etc.) send the asset.
+
+        If no location can be worked out, the asset is sent from Python.
+
+        Args:
+            request (HttpRequest): The request being handled
+            asset (StaticAsset): The asset to send
+            offload (str): Either `itty3.X_ACCEL_REDIRECT` or
+                `itty3.X_SENDFILE`
+            offload_map (dict, Optional): Maps filesystem path prefixes to
+                what the front-end server knows them as. Default is `None`.
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        location = self.offload_location(asset.path, offload, offload_map)
+
+        if location is None:
+            self.log.warning(
+                "No {} mapping for {}. Sending directly...".format(
+                    offload, asset.path
+                )
+            )
+            return self.serve_asset(request, asset)
+
+        headers = {offload: location}
+
+        # The front-end server supplies its own validators & length.
+        if asset.immutable:
+            headers["Cache-Control"] = asset.headers["Cache-Control"]
+
+        return self.render(
+            request, "", content_type=asset.content_type, headers=headers
+        )
+
+    def send_file(
+        self,
+        request,
+        path,
+        content_type=None,
+        filename=None,
+        offload=None,
+        offload_map=None,
+    ):
+        """
+        Sends a file from disk, such as a large download.
+
+        Do any access checks in the view first, then call this. With an
+        `offload`, the transfer itself is handed to the front-end server,
+        rather than tying up a worker.
+
+        Args:
+            request (HttpRequest): The request being handled
+            path (str): The filesystem path of the file
+            content_type (str, Optional): The content-type of the file.
+                Default is `None` (guess from the path).
+            filename (str, Optional): If provided, the file is sent as a
+                download (`Content-Disposition: attachment`) with this name.
+                Default is `None`.
+            offload (str, Optional): Either `itty3.X_ACCEL_REDIRECT` or
+                `itty3.X_SENDFILE`. Default is `None` (send from Python).
+            offload_map (dict, Optional): Maps filesystem path prefixes to
+                what the front-end server knows them as. Default is `None`.
+
+        Returns:
+            HttpResponse: The populated response object, or a `404` if the
+                file isn't present
+        """
+        asset = StaticAsset.from_path(os.path.basename(path), path)
+
+        if asset is None:
+            return self.error_404(request)
+
+        if content_type is not None:
+            asset.content_type = content_type
+
+        if offload:
+            resp = self.offload_asset(request, asset, offload, offload_map)
+        else:
+            resp = self.serve_asset(request, asset)
+
+        if filename is not None:
+            # A plain ASCII name for old clients, plus the full name for
+            # everyone else.
+            fallback = filename.encode("ascii", "replace").decode("ascii")
+            fallback = fallback.replace("\\", "_").replace('"', "_")
+            disposition = 'attachment; filename="{}"'.format(fallback)
+            quoted = urllib.parse.quote(filename)
+
+            if quoted != filename:
+                disposition += "; filename*=UTF-8''{}".format(quoted)
+
+            resp.set_header("Content-Disposition", disposition)
+
+        return resp
+
+    def static_url(self, name, prefix=None):
+        """
+        Builds the URL for a static asset, preferring its content-hashed
+        name.
+
+        Hashed URLs are served with a far-future `Cache-Control`, so
+        browsers & CDNs never need to revalidate them. Requires the assets
+        to have been scanned (see `App.scan_static` & `App.add_static`);
+        otherwise, the plain URL is returned.
+
+        Args:
+            name (str): The URL-style path of the asset. e.g. `css/app.css`
+            prefix (str, Optional): The URL prefix of the mount the asset is
+                under. Default is `None` (use `App.static_url_path`, or
+                `/static/`).
+
+        Returns:
+            str: The URL. e.g. `/static/css/app.3f9a1c2b.css`
+        """
+        prefix = StaticMount.normalize_prefix(
+            prefix or self.static_url_path or "/static/"
+        )
+        manifest = self.static_manifest
+        hashed = None
+
+        for mount in self.static_mounts:
+            if mount.prefix == prefix:
+                manifest = mount.manifest or manifest
+                break
+
+        if manifest is not None:
+            hashed = manifest.hashed_name(name)
+
+        return "{}{}".format(prefix, hashed or name.lstrip("/"))
+
+    def scan_static(
+        self,
+        static_root=None,
+        hot_max_bytes=16 * 1024 * 1024,
+        hot_file_max_size=256 * 1024,
+        watch_interval=None,
+    ):
+        """
+        Builds a `StaticManifest` of the static assets up-front.
+
+        Once built, `App.render_static` serves from the manifest, skipping
+        per-request filesystem checks & holding small files in memory.
+        New files aren't seen until the next scan, so pass a
+        `watch_interval` if the files change while running.
+
+        Args:
+            static_root (str, Optional): The filesystem path to the static
+                assets. Default is `None` (use `App.static_root`).
+            hot_max_bytes (int, Optional): The most bytes of file contents
+                to hold in memory. Default is `16 * 1024 * 1024` (16Mb).
+            hot_file_max_size (int, Optional): Files larger than this many
+                bytes are never held in memory. Default is `256 * 1024`.
+            watch_interval (int/float, Optional): If provided, re-scan every
+                this many seconds. Default is `None` (no watching).
+
+        Returns:
+            StaticManifest: The built manifest
+        """
+        if static_root is not None:
+            self.static_root = static_root
+
+        if self.static_manifest is not None:
+            self.static_manifest.stop()
+
+        self.static_manifest = StaticManifest(
+            self.static_root,
+            hot_max_bytes=hot_max_bytes,
+            hot_file_max_size=hot_file_max_size,
+            watch_interval=watch_interval,
+        )
+        self.static_manifest.scan()
+        self.static_manifest.watch()
+        self.log.debug("Built {}".format(self.static_manifest))
+        return self.static_manifest
+
+    def generate_etag(self, response):
+        """
+        Generates a weak `ETag` value for a response, based on its body.
+
+        Args:
+            response (HttpResponse): The response to generate a tag for
+
+        Returns:
+            str: The weak entity tag
+        """
+        digest = hashlib.sha1(response.get_body_bytes()).hexdigest()
+        return 'W/"{}"'.format(digest)
+
+    def is_fresh(self, request, etag=None, last_modified=None):
+        """
+        Determines if the client's cached copy is still fresh.
+
+        Checks `If-None-Match` against the `etag` (using weak comparison),
+        falling back to `If-Modified-Since` against `last_modified` only if
+        no `If-None-Match` was sent.
+
+        Views can call this before doing expensive work & return
+        `App.not_modified` if it's fresh.
+
+        Args:
+            request (HttpRequest): The request being handled
+            etag (str, Optional): The current entity tag for the resource.
+            last_modified (datetime/int/float/str, Optional): When the
+                resource last changed. Can be a `datetime`, a Unix timestamp
+                or an HTTP-date string.
+
+        Returns:
+            bool: True if the client has a current copy, False otherwise
+        """
+        if request.method not in (GET, HEAD):
+            return False
+
+        if_none_match = request.headers.get("If-None-Match")
+
+        if if_none_match is not None:
+            if etag is None:
+                return False
+
+            if if_none_match.strip() == "*":
+                return True
+
+            # Weak comparison, so strip off any `W/` prefixes.
+            current = etag.strip()
+            current = current[2:] if current.startswith("W/") else current
+
+            for candidate in if_none_match.split(","):
+                candidate = candidate.strip()
+
+                if candidate.startswith("W/"):
+                    candidate = candidate[2:]
+
+                if candidate == current:
+                    return True
+
+            return False
+
+        if_modified_since = request.headers.get("If-Modified-Since")
+
+        if if_modified_since is None or last_modified is None:
+            return False
+
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+
+        if isinstance(last_modified, str):
+            try:
+                last_modified = email.utils.parsedate_to_datetime(
+                    last_modified
+                )
+            except (TypeError, ValueError):
+                return False
+
+        if hasattr(last_modified, "timestamp"):
+            if last_modified.tzinfo is None:
+                last_modified = last_modified.replace(
+                    tzinfo=datetime.timezone.utc
+                )
+
+            last_modified = last_modified.timestamp()
+
+        # HTTP-dates only have second-level precision.
+        return int(last_modified) <= int(since.timestamp())
+
+    def not_modified(self, request, etag=None, last_modified=None):
+        """
+        A convenience method for creating a `304 Not Modified` response.
+
+        Args:
+            request (HttpRequest): The request being handled
+            etag (str, Optional): The entity tag to include.
+            last_modified (datetime/int/float, Optional): The last
+                modification time to include.
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        resp = HttpResponse(body="", status_code=304)
+        # A 304 doesn't have a body, so it shouldn't describe one.
+        resp.remove_header("Content-Type")
+
+        if etag is not None:
+            resp.set_etag(etag)
+
+        if last_modified is not None:
+            resp.set_last_modified(last_modified)
+
+        return resp
+
+    def add_etag(self, request, response):
+        """
+        Adds a generated `ETag` to a response, if `App.etags` is enabled.
+
+        Streamed bodies & responses that already have an `ETag` are left
+        alone.
+
+        Args:
+            request (HttpRequest): The request being handled
+            response (HttpResponse): The response to tag
+
+        Returns:
+            str: The response's `ETag` (or `None` if it has none)
+        """
+        etag = response.get_header("ETag")
+
+        if etag is not None or not self.etags:
+            return etag
+
+        if response.status_code != 200 or response.is_streaming():
+            return etag
+
+        etag = self.generate_etag(response)
+        response.set_etag(etag)
+        return etag
+
+    def condition_response(self, request, response):
+        """
+        Handles `ETag` generation & conditional `GET` requests.
+
+        If `App.etags` is enabled, successful non-streaming responses
+        without an `ETag` get a weak one. If the client's copy is still
+        fresh, the response is turned into a bodiless `304 Not Modified`.
+
+        Args:
+            request (HttpRequest): The request being handled
+            response (HttpResponse): The response from the view
+
+        Returns:
+            HttpResponse: The original or `304` response
+        """
+        if request.method not in (GET, HEAD) or response.status_code != 200:
+            return response
+
+        # The front-end server handles these for offloaded files.
+        if response.is_offloaded():
+            return response
+
+        etag = self.add_etag(request, response)
+        last_modified = response.get_header("Last-Modified")
+
+        if not self.is_fresh(request, etag, last_modified):
+            return response
+
+        # Keep the same `Vary` as the full response would've had.
+        self.vary_on_encoding(response)
+        close = getattr(response.body, "close", None)
+
+        if close is not None:
+            close()
+
+        response.status_code = 304
+        response.body = ""
+
+        for name in ("Content-Type", "Content-Length", "Content-Encoding"):
+            response.remove_header(name)
+
+        return response
+
+    def parse_range(self, header, size, max_ranges=16):
+        """
+        Parses a `Range` header into a list of byte spans.
+
+        Args:
+            header (str): The value of the `Range` header
+            size (int): The full size of the body in bytes
+            max_ranges (int, Optional): The most ranges to honor in a
+                single request. Default is `16`.
+
+        Returns:
+            list: A list of inclusive `(start, end)` tuples. Empty if none
+                of the ranges can be satisfied. `None` if the header is
+                invalid (or asks for too much) & should be ignored.
+        """
+        units, _, spec = header.partition("=")
+
+        if units.strip().lower() != "bytes" or not spec.strip():
+            return None
+
+        bits = [bit.strip() for bit in spec.split(",") if bit.strip()]
+
+        if len(bits) > max_ranges:
+            return None
+
+        ranges = []
+
+        for bit in bits:
+            start, sep, end = bit.partition("-")
+
+            if not sep:
+                return None
+
+            try:
+                if not start.strip():
+                    # A suffix range, like `-500` (the last 500 bytes).
+                    suffix = int(end)
+
+                    if suffix <= 0:
+                        continue
+
+                    start, end = max(size - suffix, 0), size - 1
+                else:
+                    start = int(start)
+                    end = int(end) if end.strip() else size - 1
+            except ValueError:
+                return None
+
+            if start < 0 or end < start:
+                return None
+
+            if start >= size:
+                continue
+
+            ranges.append((start, min(end, size - 1)))
+
+        return ranges
+
+    def if_range_matches(self, request, response):
+        """
+        Checks an `If-Range` header against the response's validators.
+
+        Only strong `ETag`s & exact `Last-Modified` dates match.
+
+        Args:
+            request (HttpRequest): The request being handled
+            response (HttpResponse): The full response
+
+        Returns:
+            bool: True if a range can be sent, False if the full body should
+                be sent instead
+        """
+        if_range = request.headers.get("If-Range")
+
+        if if_range is None:
+            return True
+
+        if_range = if_range.strip()
+
+        if if_range.startswith("W/"):
+            return False
+
+        if if_range.startswith('"'):
+            return if_range == response.get_header("ETag")
+
+        return if_range == response.get_header("Last-Modified")
+
+    def _read_span(self, body, start, end, block_size):
+        if isinstance(body, bytes):
+            yield body[start : end + 1]
+            return
+
+        body.seek(start)
+        remaining = end - start + 1
+
+        while remaining > 0:
+            chunk = body.read(min(block_size, remaining))
+
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
+
+    def _iter_ranges(self, body, ranges, preambles, epilogue, block_size):
+        try:
+            for offset, (start, end) in enumerate(ranges):
+                if preambles:
+                    yield preambles[offset]
+
+                for chunk in self._read_span(body, start, end, block_size):
+                    yield chunk
+
+                if preambles:
+                    yield b"\r\n"
+
+            if epilogue:
+                yield epilogue
+        finally:
+            close = getattr(body, "close", None)
+
+            if close is not None:
+                close()
+
+    def range_response(self, request, response):
+        """
+        Handles `Range` requests, producing `206 Partial Content` responses.
+
+        Applies to successful `GET` responses with a `str`/`bytes` body or
+        a seekable file body (such as from `App.render_static`). These (& the
+        matching `HEAD` responses) also advertise `Accept-Ranges: bytes`,
+        whether or not the body has been encoded yet (say, by the response
+        cache).
+
+        A single range is sent as-is, with a `Content-Range` header.
+        Multiple ranges are sent as `multipart/byteranges`. Only the
+        requested spans of a file are read. Unsatisfiable ranges produce a
+        `416`.
+
+        Args:
+            request (HttpRequest): The request being handled
+            response (HttpResponse): The full response
+
+        Returns:
+            HttpResponse: The original, `206` or `416` response
+        """
+        if request.method not in (GET, HEAD) or response.status_code != 200:
+            return response
+
+        # The front-end server handles these for offloaded files.
+        if response.is_offloaded():
+            return response
+
+        if response.get_header("Content-Encoding"):
+            return response
+
+        body = response.body
+
+        if not response.is_streaming():
+            # Ranges are over the encoded bytes.
+            body = response.get_body_bytes()
+            size = len(body)
+        elif hasattr(body, "read") and hasattr(body, "seek"):
+            seekable = getattr(body, "seekable", None)
+
+            if seekable is not None and not seekable():
+                return response
+
+            size = body.seek(0, os.SEEK_END)
+            body.seek(0)
+        else:
+            return response
+
+        response.set_header("Accept-Ranges", "bytes")
+        # A `206` is a slice of the identity body, but keeps the same `Vary`
+        # as the full (maybe compressed) response.
+        self.vary_on_encoding(response)
+        header = request.headers.get("Range")
+
+        # `HEAD` only advertises support, matching the `GET`.
+        if request.method == HEAD:
+            return response
+
+        if header is None or not self.if_range_matches(request, response):
+            return response
+
+        ranges = self.parse_range(header, size)
+
+        if ranges is None:
+            return response
+
+        response.remove_header("Content-Length")
+
+        if not ranges:
+            close = getattr(body, "close", None)
+
+            if close is not None:
+                close()
+
+            response.status_code = 416
+            response.body = ""
+            response.set_header("Content-Range", "bytes */{}".format(size))
+            return response
+
+        response.status_code = 206
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            preambles, epilogue = None, None
+            length = end - start + 1
+            response.set_header(
+                "Content-Range", "bytes {}-{}/{}".format(start, end, size)
+            )
+        else:
+            boundary = uuid.uuid4().hex
+            preambles = []
+            epilogue = "--{}--\r\n".format(boundary).encode("utf-8")
+            length = len(epilogue)
+
+            for start, end in ranges:
+                preamble = (
+                    "--{}\r\n"
+                    "Content-Type: {}\r\n"
+                    "Content-Range: bytes {}-{}/{}\r\n\r\n".format(
+                        boundary, response.content_type, start, end, size
+                    )
+                ).encode("utf-8")
+                preambles.append(preamble)
+                # Plus the trailing CRLF after the part's data.
+                length += len(preamble) + (end - start + 1) + 2
+
+            response.set_header(
+                "Content-Type",
+                "multipart/byteranges; boundary={}".format(boundary),
+            )
+
+        response.set_header("Content-Length", str(length))
+        response.body = self._iter_ranges(
+            body, ranges, preambles, epilogue, response.block_size
+        )
+        return response
+
+    def choose_encoding(self, request, codings=(GZIP, DEFLATE)):
+        """
+        Negotiates a content-encoding based on the `Accept-Encoding` header.
+
+        `gzip` is preferred over `deflate` when the client weighs them
+        equally.
+
+        Args:
+            request (HttpRequest): The request being handled
+            codings (tuple, Optional): The encodings available, in order of
+                preference. Default is `(GZIP, DEFLATE)`.
+
+        Returns:
+            str: One of the `codings` (e.g. `itty3.GZIP`), or `None` if
+                the client doesn't accept any of them.
+        """
+        accept = request.headers.get("Accept-Encoding", "")
+
+        if not accept:
+            return None
+
+        weights = {}
+
+        for bit in accept.split(","):
+            params = bit.strip().split(";")
+            coding = params[0].strip().lower()
+            quality = 1.0
+
+            for param in params[1:]:
+                param = param.strip()
+
+                if param.startswith("q="):
+                    try:
+                        quality = float(param[2:])
+                    except ValueError:
+                        quality = 0.0
+
+            if coding:
+                weights[coding] = quality
+
+        best, best_quality = None, 0.0
+
+        for coding in codings:
+            quality = weights.get(coding, weights.get("*", 0.0))
+
+            if quality > best_quality:
+                best, best_quality = coding, quality
+
+        return best
+
+    def is_compressible(self, response):
+        """
+        Determines if a response is a candidate for compression.
+
+        Args:
+            response (HttpResponse): The response to check
+
+        Returns:
+            bool: True if the response could be compressed, False otherwise
+        """
+        if response.status_code < 200:
+            return False
+
+        # A partial body is a slice of the uncompressed representation.
+        if response.status_code in (204, 206, 304):
+            return False
+
+        if response.get_header("Content-Encoding"):
+            return False
+
+        content_type = response.content_type.split(";")[0].strip().lower()
+
+        if content_type == "text/event-stream":
+            return False
+
+        if content_type.startswith("text/"):
+            return True
+
+        if content_type.endswith("+json") or content_type.endswith("+xml"):
+            return True
+
+        return content_type in COMPRESSIBLE_TYPES
+
+    def _compress_chunks(self, chunks, compressor):
+        # Flush after every chunk, so streamed data isn't held back waiting
+        # for the compressor's buffer to fill.
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    def vary_on_encoding(self, response):
+        """
+        Adds `Vary: Accept-Encoding` if compression depends on it.
+
+        That's the case when `App.compress` is enabled & the response is
+        compressible & large enough (or streamed). It's checked on the full
+        `200` response, before it's turned into a `304` or `206`, so those
+        keep the same `Vary`.
+
+        Args:
+            response (HttpResponse): The response to check
+
+        Returns:
+            bool: True if the response varies on `Accept-Encoding`
+        """
+        if not self.compress or not self.is_compressible(response):
+            return False
+
+        if not response.is_streaming():
+            if len(response.get_body_bytes()) < self.compress_min_size:
+                return False
+
+        response.add_vary("Accept-Encoding")
+        return True
+
+    def compress_response(self, request, response):
+        """
+        Compresses a response's body, if the client & content allow it.
+
+        Does nothing unless `App.compress` is enabled. Small bodies (under
+        `App.compress_min_size`) are left alone. Streamed bodies are
+        compressed incrementally, chunk by chunk.
+
+        `HEAD` requests are negotiated the same way as `GET`, so their
+        headers match (the server leaves the body out).
+
+        Args:
+            request (HttpRequest): The request being handled
+            response (HttpResponse): The response to compress
+
+        Returns:
+            HttpResponse: The (potentially) compressed response
+        """
+        # Regardless of what this client accepts, caches need to know the
+        # body differs based on the header. Bodies that never get
+        # compressed don't vary, so they're left alone.
+        if not self.vary_on_encoding(response):
+            return response
+
+        encoding = self.choose_encoding(request)
+
+        if encoding is None:
+            return response
+
+        wbits = zlib.MAX_WBITS
+
+        if encoding == GZIP:
+            # Adding 16 gets `zlib` to write a gzip header & trailer.
+            wbits = 16 + zlib.MAX_WBITS
+
+        compressor = zlib.compressobj(
+            self.compress_level, zlib.DEFLATED, wbits
+        )
+
+        if response.is_streaming():
+            response.body = self._compress_chunks(
+                response.iter_content(), compressor
+            )
+            response.remove_header("Content-Length")
+        else:
+            raw_body = response.get_body_bytes()
+            response.body = compressor.compress(raw_body) + compressor.flush()
+            response.remove_header("Content-Length")
+            response.set_header("Content-Length", str(len(response.body)))
+
+        # The compressed body isn't byte-for-byte the same, so a strong
+        # validator has to be downgraded.
+        etag = response.get_header("ETag")
+
+        if etag is not None and not etag.startswith("W/"):
+            response.set_etag(etag, weak=True)
+
+        response.set_header("Content-Encoding", encoding)
+        return response
+
+    def error_404(self, request):
+        """
+        Generates a 404 page for when something isn't found.
+
+        Exposed to allow for custom 404 pages. **Care** should be taken when
+        overriding this function, as it is used internally by the routing
+        & Python errors bubbling from within can break the server.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        return self.render(request, "Not Found", status_code=404)
+
+    def error_500(self, request):
+        """
+        Generates a 500 page for when something is broken.
+
+        Exposed to allow for custom 500 pages. **Care** should be taken when
+        overriding this function, as it is used internally by the routing
+        & Python errors bubbling from within can break the server.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        return self.render(request, "Internal Error", status_code=500)
+
+    def error_503(self, request):
+        """
+        Generates a 503 page for when there's no capacity for a request.
+
+        Sets `Retry-After`, so clients know to back off briefly. Kept
+        cheap, as it's used while overloaded.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        resp = self.render(request, "Service Unavailable", status_code=503)
+        resp.set_header("Retry-After", "1")
+        return resp
+
+    def error_504(self, request):
+        """
+        Generates a 504 page for when a request runs past its deadline.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: The populated response object
+        """
+        return self.render(request, "Gateway Timeout", status_code=504)
+
+    def _add_view(self, method, path, **options):
+        def _wrapper(func):
+            if inspect.iscoroutinefunction(func):
+                # Keep `async def` views recognizable as such to `Route`.
+                @functools.wraps(func)
+                async def _wrapped(request, *args, **kwargs):
+                    return await func(request, *args, **kwargs)
+
+            else:
+
+                @functools.wraps(func)
+                def _wrapped(request, *args, **kwargs):
+                    return func(request, *args, **kwargs)
+
+            self.add_route(method, path, _wrapped, **options)
+            return _wrapped
+
+        return _wrapper
+
+    def get(self, path, **options):
+        """
+        A convenience decorator for adding a view that processes a `GET`
+        request to routing.
+
+        Example::
+
+            app = itty3.App()
+
+            @app.get("/blog/<slug:post_slug>/")
+            def post_detail(request, post_slug):
+                ...
+
+            # Cache the rendered output for five minutes.
+            @app.get("/blog/", cache_ttl=300)
+            def post_list(request):
+                ...
+
+        Args:
+            path (str): The URI path to handle
+            **options (Optional): Any per-route options (such as
+                `cache_ttl`), passed along to `Route`.
+        """
+        return self._add_view(GET, path, **options)
+
+    def post(self, path, **options):
+        """
+        A convenience decorator for adding a view that processes a `POST`
+        request to routing.
+
+        Example::
+
+            app = itty3.App()
+
+            @app.post("/blog/create/")
+            def create_post(request):
+                ...
+
+        Args:
+            path (str): The URI path to handle
+            **options (Optional): Any per-route options (such as
+                `cache_ttl`), passed along to `Route`.
+        """
+        return self._add_view(POST, path, **options)
+
+    def put(self, path, **options):
+        """
+        A convenience decorator for adding a view that processes a `PUT`
+        request to routing.
+
+        Example::
+
+            app = itty3.App()
+
+            @app.put("/blog/<slug:post_slug>/")
+            def update_post(request, post_slug):
+                ...
+
+        Args:
+            path (str): The URI path to handle
+            **options (Optional): Any per-route options (such as
+                `cache_ttl`), passed along to `Route`.
+        """
+        return self._add_view(PUT, path, **options)
+
+    def delete(self, path, **options):
+        """
+        A convenience decorator for adding a view that processes a `DELETE`
+        request to routing.
+
+        Example::
+
+            app = itty3.App()
+
+            @app.delete("/blog/<slug:post_slug>/")
+            def delete_post(request, post_slug):
+                ...
+
+        Args:
+            path (str): The URI path to handle
+            **options (Optional): Any per-route options (such as
+                `cache_ttl`), passed along to `Route`.
+        """
+        return self._add_view(DELETE, path, **options)
+
+    def patch(self, path, **options):
+        """
+        A convenience decorator for adding a view that processes a `PATCH`
+        (partial update) request to routing.
+
+        Example::
+
+            app = itty3.App()
+
+            @app.patch("/blog/bulk/")
+            def bulk_post(request):
+                ...
+
+        Args:
+            path (str): The URI path to handle
+            **options (Optional): Any per-route options (such as
+                `cache_ttl`), passed along to `Route`.
+        """
+        return self._add_view(PATCH, path, **options)
+
+    def create_request(self, environ):
+        """
+        Given a WSGI environment, creates a `HttpRequest` object.
+
+        Args:
+            environ (dict-alike): The environment data coming from the WSGI
+                server, including request information.
+
+        Returns:
+            HttpRequest: A built request object
+        """
+        self.log.debug("Received environ {}".format(environ))
+        return HttpRequest.from_wsgi(environ)
+
+    def call_view(self, request, route, kwargs):
+        """
+        Calls the view for a matched route.
+
+        If the route has a `cache_ttl`, `GET` requests are served from (&
+        stored in) `App.response_cache` instead of always calling the view.
+
+        If the route has `coalesce` enabled, concurrent identical `GET`
+        requests share one call to the view (see `SingleFlight` &
+        `App.coalesce_key`). The response is only shared if it's safe to
+        cache & doesn't vary on anything outside of the key. Otherwise,
+        the waiting requests call the view themselves.
+
+        Args:
+            request (HttpRequest): The request being handled
+            route (Route): The matched route
+            kwargs (dict): The variables extracted from the URI path
+
+        Returns:
+            HttpResponse: The response from the view (or the cache)
+        """
+        # Custom routes (see the "Extending" docs) may not have options.
+        cache_ttl = getattr(route, "cache_ttl", None)
+        use_cache = cache_ttl is not None and request.method == GET
+
+        if use_cache:
+            resp = self.response_cache.get(request)
+
+            if resp is not None:
+                self.log.debug("Serving {} from cache".format(request.path))
+                return resp
+
+        def _run():
+            resp = route.func(request, **kwargs)
+
+            if getattr(route, "is_async", False):
+                resp = self.run_async(
+                    resp, timeout=request.deadline_remaining()
+                )
+
+            if use_cache and resp:
+                # Hash once at store time, rather than on every cache hit.
+                self.add_etag(request, resp)
+                self.response_cache.set(request, resp, ttl=cache_ttl)
+
+            return resp
+
+        if not getattr(route, "coalesce", False) or request.method != GET:
+            return _run()
+
+        vary = self.get_coalesce_vary(route)
+        key = self.coalesce_key(request, vary)
+        resp, shared = self.single_flight.do(key, _run)
+
+        if not resp:
+            return _run() if shared else resp
+
+        if not shared:
+            self.learn_coalesce_vary(route, resp)
+
+            if resp.is_streaming():
+                # A stream can only be consumed once, so it isn't shared.
+                return resp
+
+            # The original may still be copied for the waiting requests, as
+            # the leader's response gets modified further on its way out.
+            copied = resp.copy()
+            # The view ran for the leader, so its background tasks go along.
+            copied.background = resp.background
+            return copied
+
+        if not self.can_share_response(resp, vary):
+            # It's specific to the leader's request (or not safe to hand
+            # out), so get our own.
+            return _run()
+
+        return resp.copy()
+
+    def get_coalesce_vary(self, route):
+        """
+        Returns the request headers that coalesced requests must agree on.
+
+        That's `Authorization`, plus any headers the route's responses
+        have named in `Vary` so far (see `App.learn_coalesce_vary`).
+
+        Args:
+            route (Route): The matched route
+
+        Returns:
+            list: The header names
+        """
+        return ["Authorization"] + self._coalesce_vary.get(route, [])
+
+    def coalesce_key(self, request, vary):
+        """
+        Builds the key that identical in-flight requests share.
+
+        Besides the method, path & query string, requests must have the
+        same cookies & the same values for the `vary` headers.
+
+        Args:
+            request (HttpRequest): The request being handled
+            vary (list): The request header names to include
+
+        Returns:
+            str: The key
+        """
+        key = self.response_cache.make_key(request, vary=vary)
+        cookies = urllib.parse.urlencode(sorted(request.COOKIES.items()))
+        return "{}\ncookies={}".format(key, cookies)
+
+    def learn_coalesce_vary(self, route, resp):
+        """
+        Remembers the headers a route's response named in `Vary`, so that
+        later requests are only coalesced if they agree on them.
+
+        Args:
+            route (Route): The matched route
+            resp (HttpResponse): The view's response
+        """
+        known = self._coalesce_vary.get(route, [])
+        lowered = [name.lower() for name in known]
+        names = [
+            name
+            for name in self.response_cache.get_vary(resp)
+            if name != "*" and name.lower() not in lowered
+        ]
+
+        if names:
+            self._coalesce_vary[route] = known + names
+
+    def can_share_response(self, resp, vary):
+        """
+        Determines if a coalesced response can be handed to the waiting
+        requests.
+
+        It must be cacheable (see `ResponseCache.is_cacheable`), so no
+        cookies or private responses, & not vary on headers outside of the
+        coalescing key.
+
+        Args:
+            resp (HttpResponse): The leader's response
+            vary (list): The request header names in the key
+
+        Returns:
+            bool: True if it can be shared, False otherwise
+        """
+        if not self.response_cache.is_cacheable(resp):
+            return False
+
+        lowered = [name.lower() for name in vary]
+
+        for name in self.response_cache.get_vary(resp):
+            if name.lower() not in lowered:
+                return False
+
+        return True
+
+    async def call_async_view(self, request, route, kwargs):
+        """
+        Awaits the view for a matched `async def` route, on the running loop.
+
+        Uses `App.response_cache` like `App.call_view`. Coalesced routes go
+        through `App.call_view` instead.
+
+        Args:
+            request (HttpRequest): The request being handled
+            route (Route): The matched route
+            kwargs (dict): The variables extracted from the URI path
+
+        Returns:
+            HttpResponse: The response from the view (or the cache)
+        """
+        cache_ttl = getattr(route, "cache_ttl", None)
+        use_cache = cache_ttl is not None and request.method == GET
+
+        if use_cache:
+            resp = self.response_cache.get(request)
+
+            if resp is not None:
+                self.log.debug("Serving {} from cache".format(request.path))
+                return resp
+
+        resp = await route.func(request, **kwargs)
+
+        if use_cache and resp:
+            self.add_etag(request, resp)
+            self.response_cache.set(request, resp, ttl=cache_ttl)
+
+        return resp
+
+    def get_loop(self):
+        """
+        Returns the event loop that `async def` views run on.
+
+        Under ASGI, this is the server's loop. Otherwise, a single
+        long-lived loop is started in a background thread on first use (&
+        again in forked workers), rather than one per request.
+
+        Returns:
+            asyncio.AbstractEventLoop: The loop
+        """
+        with self._loop_lock:
+            if (
+                self.loop is None
+                or self.loop.is_closed()
+                or not self._loop_thread.is_alive()
+            ):
+                self.loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self.loop.run_forever,
+                    name="itty3-loop",
+                    daemon=True,
+                )
+                self._loop_thread.start()
+
+            return self.loop
+
+    def use_loop(self, loop):
+        """
+        Makes `async def` views run on the given (already running) loop.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The loop, running in the
+                current thread
+        """
+        with self._loop_lock:
+            self.loop = loop
+            self._loop_thread = threading.current_thread()
+
+    def run_async(self, coro, timeout=None):
+        """
+        Runs a coroutine on `App.get_loop()`, blocking until it's done.
+
+        Args:
+            coro (coroutine): The coroutine to run
+            timeout (int/float, Optional): How many seconds to wait, after
+                which the coroutine is cancelled. Default is `None` (wait
+                indefinitely).
+
+        Returns:
+            object: The coroutine's result
+
+        Raises:
+            DeadlineExceeded: If the `timeout` passed
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.get_loop())
+
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if not future.cancel() and future.done():
+                # It finished just in time.
+                return future.result()
+
+            raise DeadlineExceeded("Timed out after {}s".format(timeout))
+
+    def dispatch(self, request):
+        """
+        Routes a request & produces the final response for it.
+
+        This kicks off routing & attempts to find a route matching the
+        requested HTTP method & URI path.
+
+        If found, the view associated with the route is called, optionally
+        with the parameters from the URI.
+
+        If not found, `App.error_404` is called to produce a 404 page.
+
+        If an unhandled exception occurs, `App.error_500` is called to
+        produce a 500 page.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: The response to send
+        """
+        self.log.debug(
+            "Started processing request for {} {}...".format(
+                request.method, request.path
+            )
+        )
+        mount, route = self.resolve(request)
+        return self.respond(request, mount, route)
+
+    def resolve(self, request):
+        """
+        Finds what will handle a request: either a static mount or a route.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            tuple: A `(StaticMount, Route)` pair. At most one is set & both
+                are `None` if nothing matched.
+        """
+        mount = self.find_static_mount(request)
+
+        if mount is not None:
+            return mount, None
+
+        for route in self._routes:
+            if route.can_handle(request.method, request.path):
+                return None, route
+
+        return None, None
+
+    def respond(self, request, mount, route):
+        """
+        Produces the final response for a resolved request.
+
+        If there's no capacity for it (see `App.limiters_for`), the request
+        gets `App.error_503` instead.
+
+        Args:
+            request (HttpRequest): The request being handled
+            mount (StaticMount): The matched static mount (or `None`)
+            route (Route): The matched route (or `None`)
+
+        Returns:
+            HttpResponse: The response to send
+        """
+        self.start_deadline(request, route)
+        limiters = self.limiters_for(mount, route)
+        priority = getattr(route, "priority", PRIORITY_NORMAL)
+
+        if not self.acquire_limiters(limiters, priority=priority):
+            return self.finish_response(request, self.error_503(request))
+
+        try:
+            # An abandoned view is still running, so keeps its slots until
+            # it's actually done.
+            resp = self.run_with_deadline(
+                request,
+                self.produce_response,
+                request,
+                mount,
+                route,
+                on_done=lambda: self.release_limiters(limiters),
+            )
+        except DeadlineExceeded:
+            resp = self.deadline_exceeded(request)
+        except DeadlinePoolExhausted:
+            resp = self.error_503(request)
+
+        return self.finish_response(request, resp)
+
+    def start_deadline(self, request, route):
+        """
+        Starts the clock on a request's deadline, if it has one.
+
+        The route's `deadline` wins over `App.deadline`. Requests that
+        already have a deadline (set by middleware, for instance) keep it.
+
+        Args:
+            request (HttpRequest): The request being handled
+            route (Route): The matched route (or `None`)
+        """
+        seconds = getattr(route, "deadline", None)
+
+        if seconds is None:
+            seconds = self.deadline
+
+        if seconds is not None and request.deadline is None:
+            request.set_deadline(seconds)
+
+    def run_with_deadline(self, request, func, *args, on_done=None):
+        """
+        Calls a function, giving up on it once the request's deadline has
+        passed.
+
+        With a deadline, the call runs on `App.submit_with_deadline`, so
+        that the calling thread can be freed up in time. An abandoned call
+        keeps its thread until it returns, as Python can't stop threads.
+
+        Args:
+            request (HttpRequest): The request being handled
+            func (callable): The function to call
+            *args (Any): The arguments to call it with
+            on_done (callable, Optional): Called (with no arguments) once
+                the function has actually finished, even if it was
+                abandoned, or if it never ran. Default is `None`.
+
+        Returns:
+            object: The function's result
+
+        Raises:
+            DeadlineExceeded: If the deadline passed first
+            DeadlinePoolExhausted: If there was no thread to run it on
+        """
+        remaining = request.deadline_remaining()
+
+        if remaining is None:
+            try:
+                return func(*args)
+            finally:
+                if on_done is not None:
+                    on_done()
+
+        try:
+            future = self.submit_with_deadline(func, *args)
+        except DeadlinePoolExhausted:
+            if on_done is not None:
+                on_done()
+
+            raise
+
+        if on_done is not None:
+            future.add_done_callback(lambda _: on_done())
+
+        try:
+            return future.result(remaining)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise DeadlineExceeded("Timed out after {}s".format(remaining))
+
+    def submit_with_deadline(self, func, *args):
+        """
+        Runs a function on the pool reserved for views with a deadline.
+
+        It's separate from `App.get_executor()`, so abandoned views can't
+        starve sync views or streamed responses. Calls never queue behind
+        busy (possibly stuck) threads. If all `deadline_workers` are busy,
+        this fails right away instead.
+
+        Args:
+            func (callable): The function to call
+            *args (Any): The arguments to call it with
+
+        Returns:
+            concurrent.futures.Future: The pending result
+
+        Raises:
+            DeadlinePoolExhausted: If every thread is busy
+        """
+        with self._deadline_lock:
+            if self._deadline_pid != os.getpid():
+                # Threads don't survive a `fork`, so start a fresh pool.
+                self._deadline_pid = os.getpid()
+                self.deadline_executor = None
+                self.deadline_busy = 0
+
+            if self.deadline_busy >= self.deadline_workers:
+                self.deadline_rejected += 1
+                self.log.warning(
+                    "All {} deadline threads are busy!".format(
+                        self.deadline_workers
+                    )
+                )
+                raise DeadlinePoolExhausted(
+                    "All {} deadline threads are busy".format(
+                        self.deadline_workers
+                    )
+                )
+
+            if self.deadline_executor is None:
+                self.deadline_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.deadline_workers,
+                    thread_name_prefix="itty3-deadline",
+                )
+
+            self.deadline_busy += 1
+            pid = self._deadline_pid
+
+        def _done(future):
+            with self._deadline_lock:
+                if self._deadline_pid == pid:
+                    self.deadline_busy -= 1
+
+        future = self.deadline_executor.submit(func, *args)
+        future.add_done_callback(_done)
+        return future
+
+    async def await_with_deadline(self, request, awaitable):
+        """
+        The `async` counterpart to `App.run_with_deadline`.
+
+        Args:
+            request (HttpRequest): The request being handled
+            awaitable (awaitable): What to wait on. Cancelled if the
+                deadline passes first.
+
+        Returns:
+            object: The result
+
+        Raises:
+            DeadlineExceeded: If the deadline passed first
+        """
+        remaining = request.deadline_remaining()
+
+        if remaining is None:
+            return await awaitable
+
+        future = asyncio.ensure_future(awaitable)
+
+        try:
+            done, _ = await asyncio.wait([future], timeout=remaining)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        if not done:
+            future.cancel()
+            raise DeadlineExceeded("Timed out after {}s".format(remaining))
+
+        return future.result()
+
+    def deadline_exceeded(self, request):
+        """
+        Handles a request that ran past its deadline.
+
+        Args:
+            request (HttpRequest): The request being handled
+
+        Returns:
+            HttpResponse: A 504 page (see `App.error_504`)
+        """
+        self.log.warning(
+            "{} {} ran past its deadline!".format(request.method, request.path)
+        )
+
+        with self._deadline_lock:
+            self.deadlines_exceeded += 1
+
+        return self.error_504(request)
+
+    def produce_response(self, request, mount, route):
+        """
+        Serves the static file or calls the view for a resolved request.
+
+        Args:
+            request (HttpRequest): The request being handled
+            mount (StaticMount): The matched static mount (or `None`)
+            route (Route): The matched route (or `None`)
+
+        Returns:
+            HttpResponse: The response, before `App.finish_response` (or
+                `None` if nothing matched)
+        """
+        resp = None
+
+        if mount is not None:
+            asset_path = request.path[len(mount.prefix) :]
+
+            try:
+                resp = self.serve_static(request, mount, asset_path)
+            except Exception:
+                self.log.exception(
+                    "Serving {} from {} failed!".format(asset_path, mount)
+                )
+
+                if self.debug:
+                    raise
+
+                resp = self.error_500(request)
+        elif route is not None:
+            # We have a route that can handle the method & path!
+            # Call the view function!
+            try:
+                resp = self.call_view(
+                    request, route, self.extract_kwargs(request, route)
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception:
+                resp = self.view_failed(request, route)
+
+        return resp
+
+    def limiters_for(self, mount, route):
+        """
+        Determines which `ConcurrencyLimiter`s a resolved request needs a
+        slot from.
+
+        That's `App.limiter` for anything that matched, plus the route's
+        own `limiter`. Unmatched requests (404s) aren't limited.
+
+        Args:
+            mount (StaticMount): The matched static mount (or `None`)
+            route (Route): The matched route (or `None`)
+
+        Returns:
+            list: The limiters, in the order to acquire them
+        """
+        if mount is None and route is None:
+            return []
+
+        limiters = [self.limiter, getattr(route, "limiter", None)]
+        return [limiter for limiter in limiters if limiter is not None]
+
+    def acquire_limiters(self, limiters, priority=PRIORITY_NORMAL):
+        """
+        Takes a slot from each limiter. If any can't be had, all the slots
+        taken so far are given back.
+
+        Args:
+            limiters (list): The `ConcurrencyLimiter`s to take slots from
+            priority (str, Optional): The priority class of the request.
+                Default is `PRIORITY_NORMAL`.
+
+        Returns:
+            bool: True if all the slots were taken, False otherwise
+        """
+        acquired = []
+
+        for limiter in limiters:
+            if not limiter.acquire(priority):
+                self.log.debug("No capacity in {}".format(limiter))
+                self.release_limiters(acquired)
+                return False
+
+            acquired.append(limiter)
+
+        return True
+
+    async def acquire_limiters_async(self, limiters, priority=PRIORITY_NORMAL):
+        """
+        Like `App.acquire_limiters`, but waits on the running event loop.
+
+        Args:
+            limiters (list): The `ConcurrencyLimiter`s to take slots from
+            priority (str, Optional): The priority class of the request.
+                Default is `PRIORITY_NORMAL`.
+
+        Returns:
+            bool: True if all the slots were taken, False otherwise
+        """
+        acquired = []
+
+        try:
+            for limiter in limiters:
+                if not await limiter.acquire_async(priority):
+                    self.log.debug("No capacity in {}".format(limiter))
+                    self.release_limiters(acquired)
+                    return False
+
+                acquired.append(limiter)
+        except asyncio.CancelledError:
+            # The client went away while we waited.
+            self.release_limiters(acquired)
+            raise
+
+        return True
+
+    def release_limiters(self, limiters):
+        """
+        Gives back the slots taken by `App.acquire_limiters`.
+
+        Args:
+            limiters (list): The `ConcurrencyLimiter`s to give slots back to
+        """
+        for limiter in reversed(limiters):
+            limiter.release()
+
+    def concurrency_stats(self):
+        """
+        Reports on the concurrency limits (see `ConcurrencyLimiter.stats`).
+
+        Returns:
+            dict: The `app`-wide stats (or `None` if there's no limit), the
+                `routes` stats, keyed by `str(route)`, how many requests
+                ran past their deadline (`deadlines_exceeded`) & the
+                `deadline_pool` threads (`workers`, `busy` & `rejected`)
+        """
+        app_stats = None
+
+        if self.limiter is not None:
+            app_stats = self.limiter.stats()
+
+        routes = {}
+
+        for route in self._routes:
+            limiter = getattr(route, "limiter", None)
+
+            if limiter is not None:
+                routes[str(route)] = limiter.stats()
+
+        return {
+            "app": app_stats,
+            "routes": routes,
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "deadline_pool": {
+                "workers": self.deadline_workers,
+                "busy": self.deadline_busy,
+                "rejected": self.deadline_rejected,
+            },
         }
 
-        return self.render(
-            request, content, content_type=content_type, headers=headers
+    def extract_kwargs(self, request, route):
+        """
+        Extracts the variables from the URI path for a matched route.
+
+        Args:
+            request (HttpRequest): The request being handled
+            route (Route): The matched route
+
+        Returns:
+            dict: The arguments for the view
+        """
+        self.log.debug(
+            "Route {} will handle {} {}...".format(
+                route, request.method, request.raw_uri
+            )
+        )
+        kwargs = route.extract_kwargs(request.path)
+        self.log.debug(
+            "Calling {} with arguments {}".format(route.func.__name__, kwargs)
         )
+        return kwargs
 
-    def error_404(self, request):
+    def view_failed(self, request, route):
         """
-        Generates a 404 page for when something isn't found.
+        Handles a view raising an exception. Must be called while handling
+        the exception.
 
-        Exposed to allow for custom 404 pages. **Care** should be taken when
-        overriding this function, as it is used internally by the routing
-        & Python errors bubbling from within can break the server.
+        Args:
+            request (HttpRequest): The request being handled
+            route (Route): The matched route
+
+        Returns:
+            HttpResponse: A 500 page (or re-raises, if `App.debug`)
+        """
+        self.log.exception(
+            "View {} raised an exception!".format(route.func.__name__)
+        )
+
+        if self.debug:
+            raise
+
+        return self.error_500(request)
+
+    def finish_response(self, request, resp):
+        """
+        Runs a view's response through the rest of the pipeline.
+
+        Missing responses become a 404, then conditional requests, ranges &
+        compression are handled.
 
         Args:
             request (HttpRequest): The request being handled
+            resp (HttpResponse): The response from the view (or `None`)
 
         Returns:
-            HttpResponse: The populated response object
+            HttpResponse: The response to send
         """
-        return self.render(request, "Not Found", status_code=404)
+        if not resp:
+            self.log.debug("No route matched. Returning a 404...")
+            resp = self.error_404(request)
+
+        if not resp:
+            self.log.debug("No response returned by view. Returning a 500...")
+            resp = self.error_500(request)
+
+        resp = self.condition_response(request, resp)
+        resp = self.range_response(request, resp)
+        resp = self.compress_response(request, resp)
+
+        self.log.info(
+            '"{}" {}'.format(request.get_status_line(), resp.status_code)
+        )
+        return resp
+
+    def process_request(self, environ, start_response):
+        """
+        Processes a specific WSGI request.
+
+        Builds a `HttpRequest`, hands it to `App.dispatch`, then the
+        resulting `HttpResponse` performs the actions to write the response
+        to the server. Its background tasks are queued once the server has
+        sent the body (& closes it).
+
+        Args:
+            environ (dict-alike): The environment data coming from the WSGI
+                server, including request information.
+            start_response (callable): The function/callable to execute when
+                beginning a response.
+
+        Returns:
+            iterable: The body iterable for the WSGI server
+        """
+        request = self.create_request(environ)
+        resp = self.dispatch(request)
+        resp.start_response = start_response
+        resp.file_wrapper = environ.get("wsgi.file_wrapper")
+        body = resp.write()
+
+        if resp.background:
+            body = CloseHook.attach(
+                body, lambda: self.background.submit(resp.background)
+            )
+
+        return body
+
+    def flush_background(self, timeout=30):
+        """
+        Waits for the queued background tasks to finish, when shutting down.
+
+        Args:
+            timeout (int/float, Optional): How many seconds to wait. Default
+                is `30`.
+
+        Returns:
+            bool: True if everything finished, False if it timed out
+        """
+        if self.background.flush(timeout):
+            return True
+
+        self.log.warning(
+            "Gave up on {} background tasks!".format(
+                self.background.unfinished
+            )
+        )
+        return False
+
+    def on_startup(self, func):
+        """
+        Registers a callable to run when an ASGI server starts up.
+
+        Can be used as a decorator. The callable takes no arguments & may be
+        an `async def` function.
+
+        Args:
+            func (callable): The hook to run
+
+        Returns:
+            callable: The unchanged `func`
+        """
+        self.startup_hooks.append(func)
+        return func
+
+    def on_shutdown(self, func):
+        """
+        Registers a callable to run when an ASGI server shuts down.
+
+        Can be used as a decorator. The callable takes no arguments & may be
+        an `async def` function.
+
+        Args:
+            func (callable): The hook to run
+
+        Returns:
+            callable: The unchanged `func`
+        """
+        self.shutdown_hooks.append(func)
+        return func
+
+    def get_executor(self):
+        """
+        Returns the thread pool that (sync) views are run on under ASGI.
+
+        Built on first use. Assign a `concurrent.futures.Executor` to
+        `App.executor` beforehand to control its size.
+
+        Returns:
+            concurrent.futures.Executor: The executor
+        """
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="itty3"
+            )
+
+        return self.executor
+
+    async def asgi(self, scope, receive, send):
+        """
+        The ASGI entry point, for running under servers like `uvicorn`.
+
+        Handles the `http` & `lifespan` scopes. The request body is read in
+        full, then `App.dispatch` runs on `App.get_executor()`, so that
+        (blocking) views don't stall the event loop. Streamed bodies are
+        sent a chunk at a time as they're produced.
+
+        Usage is `uvicorn myapp:app.asgi`.
+
+        Args:
+            scope (dict): The connection scope
+            receive (callable): Awaitable callable for incoming messages
+            send (callable): Awaitable callable for outgoing messages
+
+        Raises:
+            IttyException: If the scope type isn't supported
+        """
+        if scope["type"] == "lifespan":
+            return await self.asgi_lifespan(receive, send)
+
+        if scope["type"] != "http":
+            raise IttyException(
+                "Unsupported ASGI scope type '{}'".format(scope["type"])
+            )
+
+        body = await self.read_asgi_body(receive)
+        request = self.create_asgi_request(scope, body)
+        resp = await self.dispatch_async(request)
 
-    def error_500(self, request):
+        try:
+            await self.send_asgi_response(request, resp, receive, send)
+        finally:
+            self.background.submit(resp.background)
+
+    async def dispatch_async(self, request):
         """
-        Generates a 500 page for when something is broken.
+        The ASGI counterpart to `App.dispatch`.
 
-        Exposed to allow for custom 500 pages. **Care** should be taken when
-        overriding this function, as it is used internally by the routing
-        & Python errors bubbling from within can break the server.
+        `async def` views are awaited directly on the running loop. Anything
+        else (sync views, static files, coalesced routes) is handled on
+        `App.get_executor()` (or `App.submit_with_deadline`, if the request
+        has a deadline).
+
+        Waiting for capacity (see `App.limiters_for`) happens on the loop,
+        so queued requests don't tie up executor threads.
 
         Args:
             request (HttpRequest): The request being handled
 
         Returns:
-            HttpResponse: The populated response object
+            HttpResponse: The response to send
         """
-        return self.render(request, "Internal Error", status_code=500)
+        loop = asyncio.get_running_loop()
 
-    def _add_view(self, method, path):
-        def _wrapper(func):
-            @functools.wraps(func)
-            def _wrapped(request, *args, **kwargs):
-                return func(request, *args, **kwargs)
+        if self.loop is not loop:
+            self.use_loop(loop)
 
-            self.add_route(method, path, _wrapped)
-            return _wrapped
+        self.log.debug(
+            "Started processing request for {} {}...".format(
+                request.method, request.path
+            )
+        )
+        mount, route = self.resolve(request)
+        self.start_deadline(request, route)
+        limiters = self.limiters_for(mount, route)
+        priority = getattr(route, "priority", PRIORITY_NORMAL)
 
-        return _wrapper
+        if not await self.acquire_limiters_async(limiters, priority=priority):
+            return self.finish_response(request, self.error_503(request))
 
-    def get(self, path):
-        """
-        A convenience decorator for adding a view that processes a `GET`
-        request to routing.
+        is_async = getattr(route, "is_async", False)
 
-        Example::
+        def _respond():
+            resp = self.produce_response(request, mount, route)
+            return self.finish_response(request, resp)
 
-            app = itty3.App()
+        if not is_async or getattr(route, "coalesce", False):
+            if request.deadline is None:
+                try:
+                    return await loop.run_in_executor(
+                        self.get_executor(), _respond
+                    )
+                finally:
+                    self.release_limiters(limiters)
+
+            try:
+                future = self.submit_with_deadline(_respond)
+            except DeadlinePoolExhausted:
+                self.release_limiters(limiters)
+                return self.finish_response(request, self.error_503(request))
+
+            # An abandoned view is still running, so keeps its slots until
+            # it's actually done.
+            future.add_done_callback(
+                lambda _: self.release_limiters(limiters)
+            )
 
-            @app.get("/blog/<slug:post_slug>/")
-            def post_detail(request, post_slug):
-                ...
+            try:
+                return await self.await_with_deadline(
+                    request, asyncio.wrap_future(future)
+                )
+            except DeadlineExceeded:
+                resp = self.deadline_exceeded(request)
+                return self.finish_response(request, resp)
+
+        try:
+            resp = await self.await_with_deadline(
+                request,
+                self.call_async_view(
+                    request, route, self.extract_kwargs(request, route)
+                ),
+            )
+        except DeadlineExceeded:
+            resp = self.deadline_exceeded(request)
+        except Exception:
+            resp = self.view_failed(request, route)
+        finally:
+            # Abandoned coroutines are cancelled, rather than left running.
+            self.release_limiters(limiters)
+
+        return self.finish_response(request, resp)
+
+    def create_asgi_request(self, scope, body):
+        """
+        Given an ASGI scope & the request body, creates a `HttpRequest`.
 
         Args:
-            path (str): The URI path to handle
+            scope (dict): The connection scope from the ASGI server
+            body (bytes): The full request body
+
+        Returns:
+            HttpRequest: A built request object
         """
-        return self._add_view(GET, path)
+        self.log.debug("Received scope {}".format(scope))
+        return HttpRequest.from_asgi(scope, body)
 
-    def post(self, path):
+    async def run_hooks(self, hooks):
         """
-        A convenience decorator for adding a view that processes a `POST`
-        request to routing.
+        Runs lifespan hooks in order, awaiting any that are `async`.
 
-        Example::
+        Args:
+            hooks (list): The callables to run
+        """
+        for hook in hooks:
+            result = hook()
 
-            app = itty3.App()
+            if inspect.isawaitable(result):
+                await result
 
-            @app.post("/blog/create/")
-            def create_post(request):
-                ...
+    async def asgi_lifespan(self, receive, send):
+        """
+        Handles the ASGI `lifespan` protocol.
+
+        Runs `App.startup_hooks` on startup. On shutdown, runs
+        `App.shutdown_hooks`, then waits for the background tasks & the
+        executor to finish up.
 
         Args:
-            path (str): The URI path to handle
+            receive (callable): Awaitable callable for incoming messages
+            send (callable): Awaitable callable for outgoing messages
         """
-        return self._add_view(POST, path)
+        while True:
+            message = await receive()
 
-    def put(self, path):
-        """
-        A convenience decorator for adding a view that processes a `PUT`
-        request to routing.
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.run_hooks(self.startup_hooks)
+                except Exception as err:
+                    self.log.exception("Startup hook failed!")
+                    await send(
+                        {
+                            "type": "lifespan.startup.failed",
+                            "message": str(err),
+                        }
+                    )
+                    return
 
-        Example::
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    await self.run_hooks(self.shutdown_hooks)
+                except Exception as err:
+                    self.log.exception("Shutdown hook failed!")
+                    await send(
+                        {
+                            "type": "lifespan.shutdown.failed",
+                            "message": str(err),
+                        }
+                    )
+                    return
+                finally:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self.flush_background
+                    )
 
-            app = itty3.App()
+                    if self.executor is not None:
+                        self.executor.shutdown(wait=True)
+                        self.executor = None
 
-            @app.put("/blog/<slug:post_slug>/")
-            def update_post(request, post_slug):
-                ...
+                    if self.deadline_executor is not None:
+                        # Don't wait on views that were abandoned.
+                        self.deadline_executor.shutdown(wait=False)
+                        self.deadline_executor = None
 
-        Args:
-            path (str): The URI path to handle
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def read_asgi_body(self, receive):
         """
-        return self._add_view(PUT, path)
+        Reads the full request body from the ASGI `receive` channel.
 
-    def delete(self, path):
+        Args:
+            receive (callable): Awaitable callable for incoming messages
+
+        Returns:
+            bytes: The request body
         """
-        A convenience decorator for adding a view that processes a `DELETE`
-        request to routing.
+        chunks = []
 
-        Example::
+        while True:
+            message = await receive()
 
-            app = itty3.App()
+            if message["type"] == "http.disconnect":
+                break
 
-            @app.delete("/blog/<slug:post_slug>/")
-            def delete_post(request, post_slug):
-                ...
+            chunks.append(message.get("body", b""))
 
-        Args:
-            path (str): The URI path to handle
+            if not message.get("more_body", False):
+                break
+
+        return b"".join(chunks)
+
+    async def send_asgi_response(self, request, resp, receive, send):
         """
-        return self._add_view(DELETE, path)
+        Sends a `HttpResponse` over the ASGI `send` channel.
 
-    def patch(self, path):
+        Streamed bodies are pulled on `App.get_executor()` (as producing the
+        next chunk may block) & sent as they arrive. If the client goes
+        away, the stream is abandoned & closed.
+
+        Args:
+            request (HttpRequest): The request being handled
+            resp (HttpResponse): The response to send
+            receive (callable): Awaitable callable for incoming messages
+            send (callable): Awaitable callable for outgoing messages
         """
-        A convenience decorator for adding a view that processes a `PATCH`
-        (partial update) request to routing.
+        await send(
+            {
+                "type": "http.response.start",
+                "status": resp.status_code,
+                "headers": [
+                    (name.encode("latin-1"), str(value).encode("latin-1"))
+                    for name, value in resp.get_header_list()
+                ],
+            }
+        )
 
-        Example::
+        if not resp.is_streaming():
+            body = resp.get_body_bytes()
 
-            app = itty3.App()
+            if request.method == HEAD:
+                body = b""
 
-            @app.patch("/blog/bulk/")
-            def bulk_post(request):
-                ...
+            await send({"type": "http.response.body", "body": body})
+            return
 
-        Args:
-            path (str): The URI path to handle
-        """
-        return self._add_view(PATCH, path)
+        if isinstance(resp.body, HeartbeatStream):
+            await self.send_asgi_heartbeat(request, resp.body, receive, send)
+            return
 
-    def create_request(self, environ):
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        chunks = resp.iter_content()
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+
+        try:
+            while request.method != HEAD:
+                chunk = await loop.run_in_executor(
+                    executor, next, chunks, None
+                )
+
+                if chunk is None or disconnected.done():
+                    break
+
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    }
+                )
+
+            if not disconnected.done():
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            disconnected.cancel()
+            # Closes the body (files, generators) on the thread that was
+            # producing it.
+            await loop.run_in_executor(executor, chunks.close)
+
+    async def send_asgi_heartbeat(self, request, stream, receive, send):
         """
-        Given a WSGI environment, creates a `HttpRequest` object.
+        Sends the body of a `HeartbeatStream` over the ASGI `send` channel.
 
-        Args:
-            environ (dict-alike): The environment data coming from the WSGI
-                server, including request information.
+        Unlike other streamed bodies, waiting on the next chunk (or the next
+        keep-alive) happens on the event loop, so idle streams (like SSE)
+        don't hold `App.get_executor()` threads.
 
-        Returns:
-            HttpRequest: A built request object
+        Args:
+            request (HttpRequest): The request being handled
+            stream (HeartbeatStream): The response body
+            receive (callable): Awaitable callable for incoming messages
+            send (callable): Awaitable callable for outgoing messages
         """
-        self.log.debug("Received environ {}".format(environ))
-        return HttpRequest.from_wsgi(environ)
+        chunks = stream.aiter()
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
 
-    def process_request(self, environ, start_response):
+        try:
+            if request.method != HEAD:
+                async for chunk in chunks:
+                    if disconnected.done():
+                        break
+
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+
+                    if not chunk:
+                        continue
+
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": True,
+                        }
+                    )
+
+            if not disconnected.done():
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            disconnected.cancel()
+            await chunks.aclose()
+            stream.close()
+
+    async def wait_for_disconnect(self, receive):
         """
-        Processes a specific WSGI request.
+        Waits until the ASGI server reports the client has gone away.
 
-        This kicks off routing & attempts to find a route matching the
-        requested HTTP method & URI path.
+        Args:
+            receive (callable): Awaitable callable for incoming messages
+        """
+        while True:
+            message = await receive()
 
-        If found, the view associated with the route is called, optionally
-        with the parameters from the URI. The resulting `HttpResponse`
-        then performs the actions to write the response to the server.
+            if message["type"] == "http.disconnect":
+                return
 
-        If not found, `App.error_404` is called to produce a 404 page.
+    def preload(self, imports=None, warm=None):
+        """
+        Gets the app fully loaded, ahead of forking worker processes.
 
-        If an unhandled exception occurs, `App.error_500` is called to
-        produce a 500 page.
+        Imports any modules (with their views), freezes the routes, builds
+        lazily-loaded state (mimetypes, JSON encoders, static manifests) &
+        runs any `warm` callables. Finally, everything loaded so far is
+        moved out of the garbage collector's reach with `gc.freeze`, so the
+        memory stays shared with the workers, rather than being copied as
+        they touch it.
 
         Args:
-            environ (dict-alike): The environment data coming from the WSGI
-                server, including request information.
-            start_response (callable): The function/callable to execute when
-                beginning a response.
-
-        Returns:
-            iterable: The body iterable for the WSGI server
+            imports (list, Optional): Dotted module paths to import. e.g.
+                `["myapp.views"]`. Default is `None`.
+            warm (list, Optional): Callables to run (passed the `App`), such
+                as to fill caches. Default is `None`.
         """
-        request = self.create_request(environ)
-        self.log.debug(
-            "Started processing request for {} {}...".format(
-                request.method, request.path
-            )
-        )
-        resp = None
+        for module_path in imports or []:
+            importlib.import_module(module_path)
 
-        try:
-            for route in self._routes:
-                if not route.can_handle(request.method, request.path):
-                    continue
+        mimetypes.init()
+        self.json_backend.get_encoder(pretty=False)
+        self.json_backend.get_encoder(pretty=True)
 
-                # We have a route that can handle the method & path!
-                # Call the view function!
-                try:
-                    self.log.debug(
-                        "Route {} will handle {} {}...".format(
-                            route, request.method, request.raw_uri
-                        )
-                    )
-                    kwargs = route.extract_kwargs(request.path)
-                    self.log.debug(
-                        "Calling {} with arguments {}".format(
-                            route.func.__name__, kwargs
-                        )
-                    )
-                    resp = route.func(request, **kwargs)
-                    break
-                except Exception:
-                    self.log.exception(
-                        "View {} raised an exception!".format(
-                            route.func.__name__
-                        )
-                    )
+        for manifest in self.static_manifests():
+            if not manifest.assets:
+                manifest.scan()
 
-                    if self.debug:
-                        raise
+        for callback in warm or []:
+            callback(self)
 
-                    resp = self.error_500(request)
-                    break
+        self.freeze_routes()
 
-            if not resp:
-                raise RouteNotFound("No view found to handle method/path")
-        except RouteNotFound:
-            self.log.debug("No route matched. Returning a 404...")
-            resp = self.error_404(request)
+        # Clean up first, so that the frozen objects are only long-lived ones.
+        gc.collect()
 
-        if not resp:
-            self.log.debug("No response returned by view. Returning a 500...")
-            resp = self.error_500(request)
+        if hasattr(gc, "freeze"):
+            gc.freeze()
 
-        self.log.info(
-            '"{}" {}'.format(request.get_status_line(), resp.status_code)
-        )
-        resp.start_response = start_response
-        return resp.write()
+        self.log.debug("Preloaded {} routes".format(len(self._routes)))
 
     def reset_logging(self, level=logging.INFO):
         """
@@ -1394,15 +8131,6 @@ class App(object):
             wsgiref.WSGIRequestHandler: The handler class to be used.
                 Defaults to a custom `NoStdErrHandler` class.
         """
-        from wsgiref.simple_server import WSGIRequestHandler
-
-        # Disable the vanilla wsgiref logging & enable itty3's logging.
-        # We don't do this by default at the top of the module, because it
-        # should be the user's choice how logging happens.
-        class NoStdErrHandler(WSGIRequestHandler):
-            def log_message(self, *args, **kwargs):
-                pass
-
         self.log.removeHandler(null_handler)
         default_format = logging.Formatter(
             "%(asctime)s %(name)s %(levelname)s %(message)s"
@@ -1411,8 +8139,231 @@ class App(object):
         stdout_handler.setFormatter(default_format)
         self.log.addHandler(stdout_handler)
         self.log.setLevel(level)
+        return self.get_request_handler()
+
+    def get_request_handler(self):
+        """
+        Builds the request handler class used by `App.run`'s server.
+
+        Disables `wsgiref`'s default "logging" to `stderr` (see
+        `App.reset_logging`) & sends file bodies with `os.sendfile` where
+        available, so static assets go from the page cache to the socket
+        without passing through Python.
+
+        Returns:
+            wsgiref.WSGIRequestHandler: The handler class to be used.
+                Defaults to a custom `NoStdErrHandler` class.
+        """
+        from wsgiref.simple_server import ServerHandler, WSGIRequestHandler
+
+        class SendfileServerHandler(ServerHandler):
+            def sendfile(self):
+                if not hasattr(os, "sendfile"):
+                    return False
+
+                try:
+                    in_fd = self.result.filelike.fileno()
+                    out_fd = self.request_handler.connection.fileno()
+                except (AttributeError, OSError, ValueError):
+                    return False
+
+                if not self.headers_sent:
+                    self.send_headers()
+
+                self._flush()
+                offset = self.result.filelike.tell()
+                size = os.fstat(in_fd).st_size
+
+                while offset < size:
+                    sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+
+                    if not sent:
+                        break
+
+                    offset += sent
+                    self.bytes_sent += sent
+
+                return True
+
+        # Disable the vanilla wsgiref logging & enable itty3's logging.
+        # We don't do this by default at the top of the module, because it
+        # should be the user's choice how logging happens.
+        class NoStdErrHandler(WSGIRequestHandler):
+            def log_message(self, *args, **kwargs):
+                pass
+
+            def handle(self):
+                # Mirrors `WSGIRequestHandler.handle`, but with our
+                # `ServerHandler`.
+                self.raw_requestline = self.rfile.readline(65537)
+
+                if len(self.raw_requestline) > 65536:
+                    self.requestline = ""
+                    self.request_version = ""
+                    self.command = ""
+                    self.send_error(414)
+                    return
+
+                if not self.parse_request():
+                    return
+
+                handler = SendfileServerHandler(
+                    self.rfile,
+                    self.wfile,
+                    self.get_stderr(),
+                    self.get_environ(),
+                    multithread=getattr(self.server, "multithread", False),
+                )
+                handler.request_handler = self
+                handler.run(self.server.get_app())
+
         return NoStdErrHandler
 
+    def make_server(
+        self,
+        addr="127.0.0.1",
+        port=8000,
+        threads=None,
+        queue_size=None,
+        reuse_port=False,
+        server="wsgiref",
+        unix_socket=None,
+        unix_socket_mode=None,
+        fd=None,
+    ):
+        """
+        Builds the server used by `App.run`, bound to an address.
+
+        Args:
+            addr (str, Optional): The address to bind to. Defaults to
+                `127.0.0.1`.
+            port (int, Optional): The port to bind to. Defaults to `8000`.
+            threads (int, Optional): If provided, handle this many requests
+                at once with a `ThreadPoolWSGIServer`. Defaults to `None`
+                (one request at a time).
+            queue_size (int, Optional): For a thread pool, how many
+                connections may wait for a free thread. Defaults to `None`
+                (`threads * 8`).
+            reuse_port (bool, Optional): Set `SO_REUSEPORT`, so several
+                processes can bind the same port. Defaults to `False`.
+            server (str, Optional): Which server to use: `wsgiref` or
+                `asyncio` (an `AsyncioServer`, where `threads` is the
+                number of threads for blocking views). Defaults to
+                `wsgiref`.
+            unix_socket (str, Optional): Listen on a Unix domain socket at
+                this path, instead of `addr` & `port`. Defaults to `None`.
+            unix_socket_mode (int, Optional): The permissions for the
+                `unix_socket`, e.g. `0o660`. Defaults to `None` (the
+                `umask` decides).
+            fd (int, Optional): The file descriptor of an already-listening
+                socket to serve from (see `listen_fds`), instead of binding.
+                Defaults to `None`.
+
+        Returns:
+            WSGIServer: The server (or `AsyncioServer`)
+
+        Raises:
+            IttyException: If the server isn't known, the options conflict,
+                or `SO_REUSEPORT` isn't supported
+        """
+        if reuse_port and (unix_socket or fd is not None):
+            raise IttyException(
+                "reuse_port can't be combined with unix_socket or fd"
+            )
+
+        server_address = (addr, port)
+
+        if unix_socket:
+            server_address = unix_socket
+
+        if threads:
+            self.check_thread_capacity(threads, server=server)
+
+        if server == "asyncio":
+            httpd = AsyncioServer(
+                server_address, threads=threads, bind_and_activate=False
+            )
+        elif server != "wsgiref":
+            raise IttyException("Unknown server '{}'".format(server))
+        elif threads:
+            httpd = ThreadPoolWSGIServer(
+                server_address,
+                self.get_request_handler(),
+                threads=threads,
+                queue_size=queue_size,
+                bind_and_activate=False,
+            )
+        else:
+            httpd = WSGIServer(
+                server_address,
+                self.get_request_handler(),
+                bind_and_activate=False,
+            )
+
+        httpd.unix_socket_mode = unix_socket_mode
+
+        try:
+            if fd is not None:
+                httpd.adopt_socket(socket.socket(fileno=fd))
+            else:
+                if reuse_port:
+                    if not hasattr(socket, "SO_REUSEPORT"):
+                        raise IttyException(
+                            "SO_REUSEPORT isn't supported here"
+                        )
+
+                    httpd.socket.setsockopt(
+                        socket.SOL_SOCKET, socket.SO_REUSEPORT, 1
+                    )
+
+                httpd.server_bind()
+                httpd.server_activate()
+        except BaseException:
+            httpd.server_close()
+            raise
+
+        if server == "asyncio":
+            httpd.set_app(self)
+        else:
+            httpd.set_app(self.process_request)
+
+        return httpd
+
+    def check_thread_capacity(self, threads, server="wsgiref"):
+        """
+        Warns if a server has too few threads for `App.limiter`.
+
+        With `wsgiref`, a request waiting for a slot holds a thread, so
+        there needs to be one for every slot & queued request. Otherwise,
+        normal priority requests could take the threads that the reserved
+        slots need. With `asyncio`, requests wait on the loop, so only the
+        slots need a thread.
+
+        Args:
+            threads (int): How many threads the server runs
+            server (str, Optional): Which server it is (see
+                `App.make_server`). Defaults to `wsgiref`.
+
+        Returns:
+            bool: True if there are enough threads, False otherwise
+        """
+        if self.limiter is None:
+            return True
+
+        needed = self.limiter.limit
+
+        if server != "asyncio":
+            needed += self.limiter.queue_size
+
+        if threads < needed:
+            self.log.warning(
+                "{} threads can't cover max_concurrency & its queue. "
+                "Use at least {}.".format(threads, needed)
+            )
+            return False
+
+        return True
+
     def run(
         self,
         addr="127.0.0.1",
@@ -1420,6 +8371,17 @@ class App(object):
         debug=None,
         static_url_path=None,
         static_root=None,
+        threads=None,
+        queue_size=None,
+        workers=None,
+        reuse_port=False,
+        preload=False,
+        max_requests=None,
+        max_rss_mb=None,
+        server="wsgiref",
+        unix_socket=None,
+        unix_socket_mode=None,
+        fd=None,
     ):
         """
         An included development/debugging server for running the `App`
@@ -1441,11 +8403,33 @@ class App(object):
             static_root (str, Optional): The filesystem path to the static
                 assets. e.g. `../static_assets`. Can be either a relative or
                 absolute path. Defaults to `None` (no static serving).
+            threads (int, Optional): How many requests to handle at once,
+                using a fixed pool of threads. Defaults to `None` (one
+                request at a time).
+            queue_size (int, Optional): How many connections may wait for
+                a free thread. Defaults to `None` (`threads * 8`).
+            workers (int, Optional): If provided, fork this many worker
+                processes (see `PreforkServer`). Defaults to `None` (serve
+                from this process).
+            reuse_port (bool, Optional): With `workers`, give each worker
+                its own socket via `SO_REUSEPORT`. Defaults to `False`.
+            preload (bool, Optional): With `workers`, call `App.preload`
+                before forking. Defaults to `False`.
+            max_requests (int, Optional): With `workers`, replace each
+                worker after about this many requests. Defaults to `None`.
+            max_rss_mb (int/float, Optional): With `workers`, replace any
+                worker using more than this many megabytes. Defaults to
+                `None`.
+            server (str, Optional): `wsgiref` or `asyncio`, for an HTTP/1.1
+                `AsyncioServer` with keep-alive. Defaults to `wsgiref`.
+            unix_socket (str, Optional): Listen on a Unix domain socket at
+                this path, instead of `addr` & `port`. Defaults to `None`.
+            unix_socket_mode (int, Optional): The permissions for the
+                `unix_socket`, e.g. `0o660`. Defaults to `None`.
+            fd (int, Optional): Serve from this already-listening socket
+                (see `listen_fds`), instead of binding. Defaults to `None`.
         """
-        import sys
-        from wsgiref.simple_server import make_server
-
-        handler = self.reset_logging()
+        self.reset_logging()
 
         if self.debug is not None:
             self.debug = bool(debug)
@@ -1453,19 +8437,54 @@ class App(object):
         if static_root and static_url_path:
             self.static_root = static_root
             self.static_url_path = static_url_path
-            url = urllib.parse.urljoin(
-                self.static_url_path, "<any:asset_path>"
+            mount = self.add_static(static_url_path, static_root)
+
+            # Re-use an up-front scan (from `App.scan_static`), if present.
+            manifest = self.static_manifest
+
+            if manifest is not None and manifest.root == mount.root:
+                mount.manifest = manifest
+
+        if workers:
+            supervisor = PreforkServer(
+                self,
+                addr,
+                port,
+                workers=workers,
+                threads=threads,
+                queue_size=queue_size,
+                reuse_port=reuse_port,
+                preload=preload,
+                max_requests=max_requests,
+                max_rss_mb=max_rss_mb,
+                server=server,
+                unix_socket=unix_socket,
+                unix_socket_mode=unix_socket_mode,
+                fd=fd,
             )
-            self.add_route(GET, url, self.render_static)
-
-        httpd = make_server(
-            addr, port, self.process_request, handler_class=handler
+            supervisor.serve_forever()
+            return
+
+        httpd = self.make_server(
+            addr,
+            port,
+            threads=threads,
+            queue_size=queue_size,
+            server=server,
+            unix_socket=unix_socket,
+            unix_socket_mode=unix_socket_mode,
+            fd=fd,
         )
 
-        server_msg = "itty3 {}: Now serving requests at http://{}:{}..."
-        self.log.info(server_msg.format(get_version(full=True), addr, port))
+        server_msg = "itty3 {}: Now serving requests at {}..."
+        self.log.info(
+            server_msg.format(get_version(full=True), httpd.location())
+        )
 
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             sys.exit(1)
+        finally:
+            httpd.server_close()
+            self.flush_background()
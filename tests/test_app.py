@@ -1,6 +1,15 @@
+import asyncio
+import datetime
+import gzip
+import http.client
+import http.cookies
 import io
 import os
+import threading
+import time
 import unittest
+import wsgiref.util
+import zlib
 from unittest import mock
 
 import itty3
@@ -89,6 +98,40 @@ class TestApp(unittest.TestCase):
         self.app.remove_route("PATCH", "/nope/")
         self.assertEqual(len(self.app._routes), 2)
 
+    def test_freeze_routes(self):
+        self.app.add_route("GET", "/", self.mock_index_view)
+        self.app.freeze_routes()
+        self.assertTrue(self.app.routes_frozen)
+        self.assertIsInstance(self.app._routes, tuple)
+
+        with self.assertRaises(itty3.IttyException):
+            self.app.add_route("GET", "/test/", self.mock_index_view)
+
+        with self.assertRaises(itty3.IttyException):
+            self.app.remove_route("GET", "/")
+
+        # Routing still works.
+        req = itty3.HttpRequest("/", "GET")
+        self.app.dispatch(req)
+        self.assertTrue(self.mock_index_view.called)
+
+    def test_preload(self):
+        self.app.add_route("GET", "/", self.mock_index_view)
+        manifest = itty3.StaticManifest(
+            os.path.join(os.path.dirname(__file__), "test_static_assets")
+        )
+        self.app.static_manifest = manifest
+        warm = mock.Mock()
+
+        with mock.patch("itty3.gc") as mock_gc:
+            self.app.preload(imports=["json.tool"], warm=[warm])
+
+        self.assertTrue(mock_gc.collect.called)
+        self.assertTrue(mock_gc.freeze.called)
+        warm.assert_called_once_with(self.app)
+        self.assertTrue(self.app.routes_frozen)
+        self.assertIn("itty.png", manifest.assets)
+
     def test_render(self):
         req = itty3.HttpRequest("/greet/?name=Daniel", "GET")
         resp = self.app.render(req, "Hello, Daniel!", content_type=itty3.HTML)
@@ -100,11 +143,34 @@ class TestApp(unittest.TestCase):
     def test_render_json(self):
         req = itty3.HttpRequest("/greet/?name=Daniel", "GET")
         resp = self.app.render_json(req, {"greeting": "Hello, Daniel!"})
-        self.assertEqual(resp.body, '{"greeting": "Hello, Daniel!"}')
+        self.assertEqual(resp.body, b'{"greeting": "Hello, Daniel!"}')
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.content_type, itty3.JSON)
         self.assertEqual(resp.headers, {"Content-Type": "application/json"})
 
+    def test_render_json_debug(self):
+        self.app.debug = True
+        req = itty3.HttpRequest("/greet/?name=Daniel", "GET")
+        resp = self.app.render_json(req, {"greeting": "Hello, Daniel!"})
+        self.assertEqual(
+            resp.body, b'{\n    "greeting": "Hello, Daniel!"\n}',
+        )
+
+    def test_render_json_stream(self):
+        req = itty3.HttpRequest("/greet/?name=Daniel", "GET")
+        resp = self.app.render_json(req, [1, 2, 3], stream=True)
+        self.assertTrue(resp.is_streaming())
+        self.assertEqual(b"".join(resp.iter_content()), b"[1,2,3]")
+
+        # Generators are always streamed.
+        rows = ({"id": i} for i in range(3))
+        resp = self.app.render_json(req, rows)
+        self.assertTrue(resp.is_streaming())
+        self.assertEqual(
+            b"".join(resp.iter_content()),
+            b'[{"id": 0},{"id": 1},{"id": 2}]',
+        )
+
     def test_render_static_not_configured(self):
         req = itty3.HttpRequest("/static/css/default.css", "GET")
         resp = self.app.render_static(req, "css/default.css")
@@ -144,11 +210,13 @@ class TestApp(unittest.TestCase):
         resp = self.app.render_static(req, "css/default.css")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.content_type, "text/css")
-        self.assertEqual(
-            resp.headers,
-            {"Content-Type": "text/css", "Content-Length": "146"},
-        )
-        self.assertTrue(resp.body.startswith("/* Reset"))
+        self.assertEqual(resp.headers["Content-Type"], "text/css")
+        self.assertEqual(resp.headers["Content-Length"], "146")
+        self.assertTrue(resp.headers["ETag"].startswith('"'))
+        self.assertTrue(resp.headers["Last-Modified"].endswith(" GMT"))
+
+        with resp.body:
+            self.assertTrue(resp.body.read().startswith(b"/* Reset"))
 
     def test_render_static_png(self):
         # We have to manually setup the static serving here (normally
@@ -165,10 +233,21 @@ class TestApp(unittest.TestCase):
         resp = self.app.render_static(req, "itty.png")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.content_type, "image/png")
-        self.assertEqual(
-            resp.headers,
-            {"Content-Type": "image/png", "Content-Length": "1473"},
+        self.assertEqual(resp.headers["Content-Type"], "image/png")
+        self.assertEqual(resp.headers["Content-Length"], "1473")
+        self.assertTrue("ETag" in resp.headers)
+        self.assertTrue("Last-Modified" in resp.headers)
+
+        with resp.body:
+            self.assertTrue(resp.body.read().startswith(b"\x89PNG"))
+
+    def test_render_static_directory(self):
+        self.app.static_root = os.path.join(
+            os.path.dirname(__file__), "test_static_assets",
         )
+        req = itty3.HttpRequest("/static/css/", "GET")
+        resp = self.app.render_static(req, "css")
+        self.assertEqual(resp.status_code, 404)
 
     def test_error_404(self):
         req = itty3.HttpRequest("/greet/?name=Daniel", "GET")
@@ -238,7 +317,8 @@ class TestApp(unittest.TestCase):
         resp = self.app(self.mock_environ, mock_sr)
         self.assertEqual(resp, [b"Hello"])
         mock_sr.assert_called_once_with(
-            "200 OK", [("Content-Type", "text/html")]
+            "200 OK",
+            [("Content-Type", "text/html"), ("Accept-Ranges", "bytes")],
         )
         self.mock_index_view.assert_called_once_with(mock.ANY)
 
@@ -251,7 +331,8 @@ class TestApp(unittest.TestCase):
         resp = self.app.process_request(self.mock_environ, mock_sr)
         self.assertEqual(resp, [b"Hello"])
         mock_sr.assert_called_once_with(
-            "200 OK", [("Content-Type", "text/html")]
+            "200 OK",
+            [("Content-Type", "text/html"), ("Accept-Ranges", "bytes")],
         )
         self.mock_index_view.assert_called_once_with(mock.ANY)
 
@@ -265,7 +346,8 @@ class TestApp(unittest.TestCase):
         resp = self.app.process_request(self.mock_environ, mock_sr)
         self.assertEqual(resp, [b"Hello"])
         mock_sr.assert_called_once_with(
-            "200 OK", [("Content-Type", "text/html")]
+            "200 OK",
+            [("Content-Type", "text/html"), ("Accept-Ranges", "bytes")],
         )
         self.mock_simple_view.assert_called_once_with(mock.ANY)
 
@@ -282,7 +364,8 @@ class TestApp(unittest.TestCase):
         resp = self.app.process_request(self.mock_environ, mock_sr)
         self.assertEqual(resp, [b"Saw 5fdd79e5-c417-42d7-8235-e7b6c6e10c06"])
         mock_sr.assert_called_once_with(
-            "200 OK", [("Content-Type", "text/html")]
+            "200 OK",
+            [("Content-Type", "text/html"), ("Accept-Ranges", "bytes")],
         )
         req_seen = self.mock_complex_view.call_args[0][0]
         self.assertEqual(req_seen.method, "GET")
@@ -431,3 +514,1536 @@ class TestAppDecorators(unittest.TestCase):
         head_wrapped = head_wrapper(adder)
 
         self.assertEqual(head_wrapped(mock_req, 2, 3), 5)
+
+
+class TestAppCompression(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App(compress=True, compress_min_size=100)
+        self.body = "Hello, world! " * 50
+
+    def test_choose_encoding(self):
+        req = itty3.HttpRequest("/", "GET")
+        self.assertEqual(self.app.choose_encoding(req), None)
+
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip, deflate, br"}
+        )
+        self.assertEqual(self.app.choose_encoding(req), itty3.GZIP)
+
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip;q=0.5, deflate"}
+        )
+        self.assertEqual(self.app.choose_encoding(req), itty3.DEFLATE)
+
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip;q=0, br"}
+        )
+        self.assertEqual(self.app.choose_encoding(req), None)
+
+        req = itty3.HttpRequest("/", "GET", headers={"Accept-Encoding": "*"})
+        self.assertEqual(self.app.choose_encoding(req), itty3.GZIP)
+
+    def test_is_compressible(self):
+        self.assertTrue(self.app.is_compressible(itty3.HttpResponse("")))
+        self.assertTrue(
+            self.app.is_compressible(
+                itty3.HttpResponse("", content_type="application/json")
+            )
+        )
+        self.assertTrue(
+            self.app.is_compressible(
+                itty3.HttpResponse(
+                    "", content_type="application/vnd.api+json"
+                )
+            )
+        )
+        self.assertFalse(
+            self.app.is_compressible(
+                itty3.HttpResponse("", content_type="image/png")
+            )
+        )
+        self.assertFalse(
+            self.app.is_compressible(
+                itty3.HttpResponse("", content_type="text/event-stream")
+            )
+        )
+        self.assertFalse(
+            self.app.is_compressible(itty3.HttpResponse("", status_code=304))
+        )
+        self.assertFalse(
+            self.app.is_compressible(
+                itty3.HttpResponse("", headers={"Content-Encoding": "gzip"})
+            )
+        )
+
+    def test_compress_response_gzip(self):
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = self.app.compress_response(req, itty3.HttpResponse(self.body))
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(
+            resp.headers["Content-Length"], str(len(resp.body))
+        )
+        self.assertEqual(gzip.decompress(resp.body).decode(), self.body)
+
+    def test_compress_response_deflate(self):
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "deflate"}
+        )
+        resp = self.app.compress_response(req, itty3.HttpResponse(self.body))
+        self.assertEqual(resp.headers["Content-Encoding"], "deflate")
+        self.assertEqual(zlib.decompress(resp.body).decode(), self.body)
+
+    def test_compress_response_too_small(self):
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = self.app.compress_response(req, itty3.HttpResponse("Hi"))
+        self.assertEqual(resp.body, "Hi")
+        self.assertFalse("Content-Encoding" in resp.headers)
+        # Never compressed, whatever the client accepts.
+        self.assertFalse("Vary" in resp.headers)
+
+    def test_compress_response_not_compressible(self):
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = itty3.HttpResponse(self.body, content_type="image/png")
+        resp = self.app.compress_response(req, resp)
+        self.assertFalse("Content-Encoding" in resp.headers)
+        self.assertFalse("Vary" in resp.headers)
+
+    def test_compress_response_not_accepted(self):
+        req = itty3.HttpRequest("/", "GET")
+        resp = self.app.compress_response(req, itty3.HttpResponse(self.body))
+        self.assertEqual(resp.body, self.body)
+        self.assertFalse("Content-Encoding" in resp.headers)
+        # Other clients would get it compressed.
+        self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+
+    def test_compress_response_disabled(self):
+        app = itty3.App()
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = app.compress_response(req, itty3.HttpResponse(self.body))
+        self.assertEqual(resp.body, self.body)
+        self.assertEqual(
+            resp.headers, {"Content-Type": "text/plain"},
+        )
+
+    def test_compress_response_streaming(self):
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = itty3.HttpResponse(
+            iter(["Hello, ", "world!"]), headers={"Content-Length": "13"}
+        )
+        resp = self.app.compress_response(req, resp)
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertFalse("Content-Length" in resp.headers)
+
+        chunks = list(resp.iter_content())
+        # Each source chunk gets flushed out, plus the gzip trailer.
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), b"Hello, world!")
+
+    def test_compress_head(self):
+        for method in ["GET", "HEAD"]:
+            self.app.add_route(
+                method, "/", lambda req: self.app.render(req, self.body)
+            )
+
+        headers = {"Accept-Encoding": "gzip"}
+        get = self.app.dispatch(itty3.HttpRequest("/", "GET", headers=headers))
+        head = self.app.dispatch(
+            itty3.HttpRequest("/", "HEAD", headers=headers)
+        )
+        self.assertEqual(head.headers["Content-Encoding"], "gzip")
+        self.assertEqual(head.headers, get.headers)
+
+    def test_compress_vary_not_modified(self):
+        self.app.etags = True
+        self.app.add_route(
+            "GET", "/", lambda req: self.app.render(req, self.body)
+        )
+        resp = self.app.dispatch(itty3.HttpRequest("/", "GET"))
+        self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"If-None-Match": resp.headers["ETag"]}
+        )
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+
+    def test_compress_vary_range(self):
+        self.app.add_route(
+            "GET",
+            "/",
+            lambda req: self.app.render(req, self.body.encode("utf-8")),
+        )
+        req = itty3.HttpRequest("/", "GET", headers={"Range": "bytes=0-4"})
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(b"".join(resp.iter_content()), b"Hello")
+        self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+
+    def test_process_request_compressed(self):
+        @self.app.get("/")
+        def index(request):
+            return self.app.render(request, self.body)
+
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "HTTP_ACCEPT_ENCODING": "gzip",
+            "wsgi.url_scheme": "http",
+            "HTTP_HOST": "example.com",
+            "SERVER_PORT": "80",
+            "PATH_INFO": "/",
+        }
+        mock_sr = mock.Mock()
+
+        resp = self.app.process_request(environ, mock_sr)
+        self.assertEqual(gzip.decompress(resp[0]).decode(), self.body)
+        headers = dict(mock_sr.call_args[0][1])
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Vary"], "Accept-Encoding")
+
+
+class TestAppConditional(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App(etags=True)
+        self.modified = datetime.datetime(2020, 1, 21, 20, 26, 8)
+
+    def test_generate_etag(self):
+        resp = itty3.HttpResponse("Hello")
+        self.assertEqual(
+            self.app.generate_etag(resp),
+            'W/"f7ff9e8b7bb2e09b70935a5d785e0cc5d9d0abf0"',
+        )
+
+    def test_is_fresh_etag(self):
+        req = itty3.HttpRequest("/", "GET")
+        self.assertFalse(self.app.is_fresh(req, etag='"abc"'))
+
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"If-None-Match": '"xyz", W/"abc"'}
+        )
+        self.assertTrue(self.app.is_fresh(req, etag='"abc"'))
+        self.assertTrue(self.app.is_fresh(req, etag='W/"xyz"'))
+        self.assertFalse(self.app.is_fresh(req, etag='"def"'))
+        self.assertFalse(self.app.is_fresh(req))
+
+        req = itty3.HttpRequest("/", "GET", headers={"If-None-Match": "*"})
+        self.assertTrue(self.app.is_fresh(req, etag='"abc"'))
+
+        req = itty3.HttpRequest(
+            "/", "POST", headers={"If-None-Match": '"abc"'}
+        )
+        self.assertFalse(self.app.is_fresh(req, etag='"abc"'))
+
+    def test_is_fresh_last_modified(self):
+        req = itty3.HttpRequest(
+            "/",
+            "GET",
+            headers={"If-Modified-Since": "Tue, 21 Jan 2020 20:26:08 GMT"},
+        )
+        self.assertTrue(self.app.is_fresh(req, last_modified=self.modified))
+        self.assertTrue(
+            self.app.is_fresh(
+                req, last_modified="Tue, 21 Jan 2020 20:00:00 GMT"
+            )
+        )
+        self.assertFalse(
+            self.app.is_fresh(
+                req, last_modified=self.modified + datetime.timedelta(1)
+            )
+        )
+        self.assertFalse(self.app.is_fresh(req))
+
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"If-Modified-Since": "garbage"}
+        )
+        self.assertFalse(self.app.is_fresh(req, last_modified=self.modified))
+
+    def test_is_fresh_etag_wins(self):
+        req = itty3.HttpRequest(
+            "/",
+            "GET",
+            headers={
+                "If-None-Match": '"old"',
+                "If-Modified-Since": "Tue, 21 Jan 2020 20:26:08 GMT",
+            },
+        )
+        self.assertFalse(
+            self.app.is_fresh(
+                req, etag='"new"', last_modified=self.modified
+            )
+        )
+
+    def test_not_modified(self):
+        req = itty3.HttpRequest("/", "GET")
+        resp = self.app.not_modified(
+            req, etag="abc", last_modified=self.modified
+        )
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.body, "")
+        self.assertEqual(
+            resp.headers,
+            {
+                "ETag": '"abc"',
+                "Last-Modified": "Tue, 21 Jan 2020 20:26:08 GMT",
+            },
+        )
+
+    def test_condition_response_adds_etag(self):
+        req = itty3.HttpRequest("/", "GET")
+        resp = self.app.condition_response(req, itty3.HttpResponse("Hello"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.headers["ETag"],
+            'W/"f7ff9e8b7bb2e09b70935a5d785e0cc5d9d0abf0"',
+        )
+
+        # Not enabled.
+        resp = itty3.App().condition_response(req, itty3.HttpResponse("Hi"))
+        self.assertFalse("ETag" in resp.headers)
+
+        # Not for streamed bodies.
+        resp = self.app.condition_response(
+            req, itty3.HttpResponse(iter(["Hi"]))
+        )
+        self.assertFalse("ETag" in resp.headers)
+
+    def test_condition_response_not_modified(self):
+        req = itty3.HttpRequest(
+            "/",
+            "GET",
+            headers={
+                "If-None-Match": 'W/"f7ff9e8b7bb2e09b70935a5d785e0cc5d9d0abf0"'
+            },
+        )
+        resp = itty3.HttpResponse(
+            "Hello", headers={"Cache-Control": "max-age=60"}
+        )
+        resp = self.app.condition_response(req, resp)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.body, "")
+        self.assertEqual(resp.headers["Cache-Control"], "max-age=60")
+        self.assertFalse("Content-Type" in resp.headers)
+
+    def test_condition_response_last_modified(self):
+        req = itty3.HttpRequest(
+            "/",
+            "GET",
+            headers={"If-Modified-Since": "Tue, 21 Jan 2020 20:26:08 GMT"},
+        )
+        resp = itty3.HttpResponse(iter(["Hello"]))
+        resp.set_last_modified(self.modified)
+        resp = self.app.condition_response(req, resp)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_condition_response_skips_errors(self):
+        req = itty3.HttpRequest("/", "GET", headers={"If-None-Match": "*"})
+        resp = self.app.condition_response(
+            req, itty3.HttpResponse("Nope", status_code=404)
+        )
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse("ETag" in resp.headers)
+
+    def test_compression_weakens_etag(self):
+        app = itty3.App(compress=True, compress_min_size=1)
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = itty3.HttpResponse("Hello, world!")
+        resp.set_etag("abc")
+        resp = app.compress_response(req, resp)
+        self.assertEqual(resp.headers["ETag"], 'W/"abc"')
+
+    def test_process_request_not_modified(self):
+        calls = []
+
+        @self.app.get("/")
+        def index(request):
+            calls.append(request)
+            return self.app.render(request, "Hello")
+
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "HTTP_IF_NONE_MATCH": (
+                'W/"f7ff9e8b7bb2e09b70935a5d785e0cc5d9d0abf0"'
+            ),
+            "wsgi.url_scheme": "http",
+            "HTTP_HOST": "example.com",
+            "SERVER_PORT": "80",
+            "PATH_INFO": "/",
+        }
+        mock_sr = mock.Mock()
+
+        resp = self.app.process_request(environ, mock_sr)
+        self.assertEqual(resp, [b""])
+        self.assertEqual(len(calls), 1)
+        mock_sr.assert_called_once_with(
+            "304 Not Modified",
+            [("ETag", 'W/"f7ff9e8b7bb2e09b70935a5d785e0cc5d9d0abf0"')],
+        )
+
+
+class TestAppResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.calls = []
+
+        @self.app.get("/cached/", cache_ttl=60)
+        def cached(request):
+            self.calls.append(request)
+            return self.app.render(
+                request, "Seen {}".format(len(self.calls))
+            )
+
+        @self.app.get("/uncached/")
+        def uncached(request):
+            self.calls.append(request)
+            return self.app.render(request, "Nope")
+
+    def test_route_option(self):
+        self.assertEqual(self.app._routes[0].cache_ttl, 60)
+        self.assertEqual(self.app._routes[1].cache_ttl, None)
+
+    def test_dispatch_cached(self):
+        req = itty3.HttpRequest("/cached/?a=1", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.body, "Seen 1")
+
+        req = itty3.HttpRequest("/cached/?a=1", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.body, b"Seen 1")
+        self.assertEqual(resp.content_type, itty3.HTML)
+        self.assertEqual(len(self.calls), 1)
+
+        # Different query, different entry.
+        req = itty3.HttpRequest("/cached/?a=2", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.body, "Seen 2")
+
+        stats = self.app.response_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_dispatch_uncached(self):
+        self.app.dispatch(itty3.HttpRequest("/uncached/", "GET"))
+        self.app.dispatch(itty3.HttpRequest("/uncached/", "GET"))
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.app.response_cache.stats()["misses"], 0)
+
+    def test_dispatch_cached_etag(self):
+        self.app.etags = True
+        self.app.dispatch(itty3.HttpRequest("/cached/", "GET"))
+        cached = self.app.response_cache.get(
+            itty3.HttpRequest("/cached/", "GET")
+        )
+        self.assertTrue(cached.headers["ETag"].startswith('W/"'))
+
+        req = itty3.HttpRequest(
+            "/cached/",
+            "GET",
+            headers={"If-None-Match": cached.headers["ETag"]},
+        )
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_dispatch_credentialed(self):
+        @self.app.get("/me/", cache_ttl=60)
+        def me(request):
+            self.calls.append(request)
+            return self.app.render(
+                request, "Hi, {}".format(request.COOKIES.get("user"))
+            )
+
+        for user in ["alice", "bob"]:
+            cookie = "user={}".format(user)
+            req = itty3.HttpRequest(
+                "/me/",
+                "GET",
+                headers={"Cookie": cookie},
+                cookies=http.cookies.SimpleCookie(cookie),
+            )
+            resp = self.app.dispatch(req)
+            self.assertEqual(resp.body, "Hi, {}".format(user))
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.app.response_cache.stats()["entries"], 0)
+
+    def test_custom_backend(self):
+        backend = itty3.MemoryCache(max_entries=1)
+        app = itty3.App(cache_backend=backend)
+        self.assertTrue(app.response_cache.backend is backend)
+
+
+class TestAppCoalesce(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+        @self.app.get("/slow/", coalesce=True)
+        def slow(request):
+            self.calls.append(request)
+            self.started.set()
+            self.release.wait(5)
+            return self.app.render(request, "Slow")
+
+    def test_route_option(self):
+        self.assertTrue(self.app._routes[0].coalesce)
+
+    def test_dispatch_coalesced(self):
+        responses = []
+
+        def hit():
+            req = itty3.HttpRequest("/slow/", "GET")
+            responses.append(self.app.dispatch(req))
+
+        threads = [threading.Thread(target=hit)]
+        threads[0].start()
+        self.started.wait(5)
+
+        for i in range(3):
+            thread = threading.Thread(target=hit)
+            thread.start()
+            threads.append(thread)
+
+        while self.app.single_flight.stats()["waiting"] != 3:
+            pass
+
+        self.release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(responses), 4)
+        self.assertEqual([resp.body for resp in responses], ["Slow"] * 4)
+        # Everyone got their own copy.
+        self.assertEqual(len(set([id(resp) for resp in responses])), 4)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.app.single_flight.stats()["shared"], 3)
+
+
+class TestAppCoalesceSessions(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+        @self.app.get("/hello/", coalesce=True)
+        def hello(request):
+            self.calls.append(request)
+            self.started.set()
+            self.release.wait(5)
+            user = request.COOKIES.get("session") or request.headers.get(
+                "X-User", "anonymous"
+            )
+            resp = self.app.render(request, "hello {}".format(user))
+
+            if request.GET.get("login"):
+                resp.set_cookie("session", user)
+
+            if request.headers.get("X-User"):
+                resp.add_vary("X-User")
+
+            return resp
+
+    def make_request(self, uri, cookie=None, user=None):
+        cookies = None
+        headers = {}
+
+        if cookie:
+            cookies = http.cookies.SimpleCookie()
+            cookies["session"] = cookie
+
+        if user:
+            headers["X-User"] = user
+
+        return itty3.HttpRequest(uri, "GET", headers=headers, cookies=cookies)
+
+    def hit_together(self, *requests):
+        responses = {}
+
+        def hit(name, req):
+            responses[name] = self.app.dispatch(req)
+
+        threads = [threading.Thread(target=hit, args=(0, requests[0]))]
+        threads[0].start()
+        self.started.wait(5)
+
+        for offset, req in enumerate(requests[1:], 1):
+            thread = threading.Thread(target=hit, args=(offset, req))
+            thread.start()
+            threads.append(thread)
+
+        # Give the others a moment to (possibly) join the leader.
+        time.sleep(0.1)
+        self.release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        return [responses[offset] for offset in range(len(requests))]
+
+    def test_sessions(self):
+        alice, bob = self.hit_together(
+            self.make_request("/hello/", cookie="alice"),
+            self.make_request("/hello/", cookie="bob"),
+        )
+        self.assertEqual(alice.body, "hello alice")
+        self.assertEqual(bob.body, "hello bob")
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.app.single_flight.stats()["shared"], 0)
+
+    def test_set_cookie_not_shared(self):
+        alice, other = self.hit_together(
+            self.make_request("/hello/?login=1", user="alice"),
+            self.make_request("/hello/?login=1", user="alice"),
+        )
+        self.assertEqual(alice.body, "hello alice")
+        self.assertEqual(other.body, "hello alice")
+        # The leader's cookie isn't handed out. The waiter got its own.
+        self.assertEqual(len(self.calls), 2)
+        self.assertIsNot(alice._cookies, other._cookies)
+
+    def test_vary_not_shared(self):
+        alice, bob = self.hit_together(
+            self.make_request("/hello/", user="alice"),
+            self.make_request("/hello/", user="bob"),
+        )
+        self.assertEqual(alice.body, "hello alice")
+        self.assertEqual(bob.body, "hello bob")
+        self.assertNotIn("session", bob._cookies)
+
+        # Now that it's known to vary on `X-User`, it's part of the key.
+        vary = self.app.get_coalesce_vary(self.app._routes[0])
+        self.assertIn("X-User", vary)
+
+    def test_identical_still_shared(self):
+        responses = self.hit_together(
+            self.make_request("/hello/", cookie="alice"),
+            self.make_request("/hello/", cookie="alice"),
+        )
+        self.assertEqual(
+            [resp.body for resp in responses], ["hello alice"] * 2
+        )
+        self.assertEqual(len(self.calls), 1)
+
+
+class TestAppConcurrencyLimits(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App(max_concurrency=2)
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+
+        @self.app.get("/slow/", max_concurrency=1)
+        def slow(request):
+            self.started.release()
+            self.release.wait(5)
+            return self.app.render(request, "Slow")
+
+        @self.app.get("/fast/")
+        def fast(request):
+            return self.app.render(request, "Fast")
+
+    def hit_slow(self, count=1):
+        threads = [
+            threading.Thread(
+                target=self.app.dispatch,
+                args=(itty3.HttpRequest("/slow/", "GET"),),
+            )
+            for _ in range(count)
+        ]
+
+        for thread in threads:
+            thread.start()
+            self.started.acquire(timeout=5)
+
+        return threads
+
+    def test_route_option(self):
+        self.assertIsNone(self.app._routes[1].limiter)
+        self.assertEqual(self.app._routes[0].limiter.limit, 1)
+
+    def test_route_limit(self):
+        threads = self.hit_slow()
+
+        resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.body, "Service Unavailable")
+        self.assertEqual(resp.headers["Retry-After"], "1")
+
+        # Other routes still have room.
+        resp = self.app.dispatch(itty3.HttpRequest("/fast/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+
+        self.release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+
+        stats = self.app.concurrency_stats()
+        self.assertEqual(stats["app"]["active"], 0)
+        self.assertEqual(stats["app"]["rejected"], 0)
+        route_stats = stats["routes"]["<Route: GET for '/slow/'>"]
+        self.assertEqual(route_stats["rejected"], 1)
+
+    def test_app_limit(self):
+        self.app.add_route("GET", "/slow-too/", self.app._routes[0].func)
+        threads = self.hit_slow()
+        thread = threading.Thread(
+            target=self.app.dispatch,
+            args=(itty3.HttpRequest("/slow-too/", "GET"),),
+        )
+        thread.start()
+        self.started.acquire(timeout=5)
+        threads.append(thread)
+
+        resp = self.app.dispatch(itty3.HttpRequest("/fast/", "GET"))
+        self.assertEqual(resp.status_code, 503)
+
+        # Unmatched requests aren't limited.
+        resp = self.app.dispatch(itty3.HttpRequest("/nope/", "GET"))
+        self.assertEqual(resp.status_code, 404)
+
+        self.release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.app.concurrency_stats()["app"]["rejected"], 1)
+        resp = self.app.dispatch(itty3.HttpRequest("/fast/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_no_limits(self):
+        self.assertEqual(
+            itty3.App().concurrency_stats(),
+            {
+                "app": None,
+                "routes": {},
+                "deadlines_exceeded": 0,
+                "deadline_pool": {"workers": 32, "busy": 0, "rejected": 0},
+            },
+        )
+
+
+class TestAppPriority(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App(
+            max_concurrency=3, concurrency_queue=4, reserved_concurrency=1
+        )
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+
+        @self.app.get("/report/")
+        def report(request):
+            self.started.release()
+            self.release.wait(5)
+            return self.app.render(request, "Report")
+
+        @self.app.get("/health/", priority="high")
+        def health(request):
+            return self.app.render(request, "OK")
+
+    def test_reserved_capacity(self):
+        threads = []
+
+        for _ in range(2):
+            thread = threading.Thread(
+                target=self.app.dispatch,
+                args=(itty3.HttpRequest("/report/", "GET"),),
+            )
+            thread.start()
+            self.started.acquire(timeout=5)
+            threads.append(thread)
+
+        # Normal requests now have to wait...
+        thread = threading.Thread(
+            target=self.app.dispatch,
+            args=(itty3.HttpRequest("/report/", "GET"),),
+        )
+        thread.start()
+        threads.append(thread)
+
+        while self.app.limiter.stats()["queued"] != 1:
+            pass
+
+        # ...but health checks still get straight through.
+        resp = self.app.dispatch(itty3.HttpRequest("/health/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.body, "OK")
+
+        self.release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        stats = self.app.concurrency_stats()["app"]
+        self.assertEqual(stats["reserved"], 1)
+        self.assertEqual(stats["active"], 0)
+        self.assertEqual(stats["rejected"], 0)
+
+    def test_check_thread_capacity(self):
+        self.assertTrue(self.app.check_thread_capacity(7))
+        self.assertTrue(self.app.check_thread_capacity(3, server="asyncio"))
+
+        with self.assertLogs("itty3", level="WARNING"):
+            self.assertFalse(self.app.check_thread_capacity(4))
+
+        self.assertTrue(itty3.App().check_thread_capacity(1))
+
+
+class TestAppDeadlines(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App(deadline=5, deadline_workers=2)
+        self.release = threading.Event()
+        self.remaining = []
+        self.cancelled = threading.Event()
+
+        @self.app.get("/slow/", deadline=0.1)
+        def slow(request):
+            self.release.wait(5)
+            return self.app.render(request, "Slow")
+
+        @self.app.get("/slow-async/", deadline=0.1)
+        async def slow_async(request):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                self.cancelled.set()
+                raise
+
+            return self.app.render(request, "Slow")
+
+        @self.app.get("/fast/")
+        def fast(request):
+            self.remaining.append(request.deadline_remaining())
+            return self.app.render(request, "Fast")
+
+    def tearDown(self):
+        self.release.set()
+        super().tearDown()
+
+    def test_route_option(self):
+        self.assertEqual(self.app._routes[0].deadline, 0.1)
+        self.assertIsNone(self.app._routes[2].deadline)
+
+    def test_within_deadline(self):
+        resp = self.app.dispatch(itty3.HttpRequest("/fast/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+        # The app-wide deadline applies.
+        self.assertGreater(self.remaining[0], 4)
+        self.assertLessEqual(self.remaining[0], 5)
+
+    def test_no_deadline(self):
+        app = itty3.App()
+        app.add_route(
+            "GET",
+            "/",
+            lambda req: app.render(req, repr(req.deadline_remaining())),
+        )
+        resp = app.dispatch(itty3.HttpRequest("/", "GET"))
+        self.assertEqual(resp.body, "None")
+
+    def test_sync_overrun(self):
+        start = time.time()
+        resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(resp.status_code, 504)
+        self.assertEqual(resp.body, "Gateway Timeout")
+        self.assertEqual(self.app.concurrency_stats()["deadlines_exceeded"], 1)
+
+    def test_async_overrun(self):
+        resp = self.app.dispatch(itty3.HttpRequest("/slow-async/", "GET"))
+        self.assertEqual(resp.status_code, 504)
+        self.assertEqual(self.app.deadlines_exceeded, 1)
+
+        # The coroutine was cancelled, rather than left running.
+        self.assertTrue(self.cancelled.wait(5))
+
+    def test_own_pool(self):
+        for _ in range(2):
+            resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+            self.assertEqual(resp.status_code, 504)
+
+        # The abandoned views hold every deadline thread. Rather than
+        # queueing behind them, new requests are turned away right away.
+        start = time.time()
+        resp = self.app.dispatch(itty3.HttpRequest("/fast/", "GET"))
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(resp.status_code, 503)
+        pool = self.app.concurrency_stats()["deadline_pool"]
+        self.assertEqual(pool, {"workers": 2, "busy": 2, "rejected": 1})
+
+        # The shared executor (for sync views under ASGI & streaming) is
+        # unaffected.
+        self.assertIsNone(self.app.executor)
+
+        self.release.set()
+
+        while self.app.deadline_busy:
+            time.sleep(0.01)
+
+        resp = self.app.dispatch(itty3.HttpRequest("/fast/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+
+    def test_slots_held_until_done(self):
+        self.app.limiter = itty3.ConcurrencyLimiter(2)
+        resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+        self.assertEqual(resp.status_code, 504)
+        # The view is still running, so it still counts.
+        self.assertEqual(self.app.limiter.stats()["active"], 1)
+
+        self.release.set()
+
+        while self.app.limiter.stats()["active"]:
+            time.sleep(0.01)
+
+
+class TestAppBackground(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.calls = []
+
+        @self.app.get("/")
+        def index(request):
+            resp = self.app.render(request, "Hello")
+            resp.add_background(self.calls.append, "audit")
+            return resp
+
+    def make_environ(self, path):
+        return {
+            "REQUEST_METHOD": "GET",
+            "wsgi.input": io.StringIO(),
+            "wsgi.url_scheme": "http",
+            "HTTP_HOST": "example.com",
+            "SERVER_PORT": "80",
+            "PATH_INFO": path,
+        }
+
+    def test_process_request(self):
+        body = self.app.process_request(self.make_environ("/"), mock.Mock())
+        self.assertEqual(list(body), [b"Hello"])
+        self.assertEqual(len(body), 1)
+        # Nothing runs until the server is done with the body.
+        self.assertTrue(self.app.background.flush(5))
+        self.assertEqual(self.calls, [])
+
+        body.close()
+        self.assertTrue(self.app.flush_background(5))
+        self.assertEqual(self.calls, ["audit"])
+
+    def test_process_request_streaming(self):
+        @self.app.get("/stream/")
+        def stream(request):
+            resp = self.app.render(request, iter([b"Hel", b"lo"]))
+            resp.add_background(self.calls.append, "streamed")
+            return resp
+
+        body = self.app.process_request(
+            self.make_environ("/stream/"), mock.Mock()
+        )
+        # Servers may call `len()` on anything that claims to have one.
+        self.assertFalse(hasattr(body, "__len__"))
+        self.assertEqual(b"".join(body), b"Hello")
+
+        body.close()
+        self.assertTrue(self.app.flush_background(5))
+        self.assertEqual(self.calls, ["streamed"])
+
+    def test_process_request_file_wrapper(self):
+        @self.app.get("/file/")
+        def download(request):
+            resp = self.app.render(request, io.BytesIO(b"Hello"))
+            resp.add_background(self.calls.append, "downloaded")
+            return resp
+
+        environ = self.make_environ("/file/")
+        environ["wsgi.file_wrapper"] = wsgiref.util.FileWrapper
+        body = self.app.process_request(environ, mock.Mock())
+        # Still the server's own wrapper, so it can use `sendfile`.
+        self.assertIsInstance(body, wsgiref.util.FileWrapper)
+        self.assertEqual(b"".join(body), b"Hello")
+
+        body.close()
+        self.assertTrue(body.filelike.closed)
+        self.assertTrue(self.app.flush_background(5))
+        self.assertEqual(self.calls, ["downloaded"])
+
+    def test_flush_background_timeout(self):
+        release = threading.Event()
+        self.app.background.submit([(release.wait, (5,), {})])
+
+        with self.assertLogs("itty3", level="WARNING"):
+            self.assertFalse(self.app.flush_background(0.01))
+
+        release.set()
+        self.assertTrue(self.app.flush_background())
+
+    def test_coalesced(self):
+        @self.app.get("/coalesced/", coalesce=True)
+        def coalesced(request):
+            resp = self.app.render(request, "Hello")
+            resp.add_background(self.calls.append, "warm")
+            return resp
+
+        resp = self.app.dispatch(itty3.HttpRequest("/coalesced/", "GET"))
+        self.assertEqual(len(resp.background), 1)
+
+
+class TestAppAsyncViews(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.threads = []
+
+        @self.app.get("/slow/")
+        async def slow(request):
+            self.threads.append(threading.current_thread())
+            await asyncio.sleep(0.2)
+            return self.app.render(request, "Slow")
+
+        @self.app.get("/broken/")
+        async def broken(request):
+            raise ValueError("Nope")
+
+    def test_dispatch(self):
+        resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.body, "Slow")
+
+        resp = self.app.dispatch(itty3.HttpRequest("/broken/", "GET"))
+        self.assertEqual(resp.status_code, 500)
+
+        # One long-lived loop, off of the calling thread.
+        self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+        self.assertEqual(self.threads[0], self.threads[1])
+        self.assertEqual(self.threads[0].name, "itty3-loop")
+
+    def test_dispatch_overlaps(self):
+        threads = [
+            threading.Thread(
+                target=self.app.dispatch,
+                args=(itty3.HttpRequest("/slow/", "GET"),),
+            )
+            for _ in range(4)
+        ]
+        start = time.time()
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(self.threads), 4)
+        self.assertLess(time.time() - start, 0.6)
+
+    @unittest.skipIf(not hasattr(os, "fork"), "No `os.fork`")
+    def test_get_loop_after_fork(self):
+        loop = self.app.get_loop()
+        self.assertIs(self.app.get_loop(), loop)
+        pid = os.fork()
+
+        if pid == 0:
+            try:
+                status = 0 if self.app.get_loop() is not loop else 1
+                resp = self.app.dispatch(itty3.HttpRequest("/slow/", "GET"))
+
+                if resp.body != "Slow":
+                    status = 1
+            finally:
+                os._exit(status)
+
+        self.assertEqual(os.waitpid(pid, 0)[1], 0)
+
+
+class TestAppStreaming(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.req = itty3.HttpRequest("/stream/", "GET")
+        self.closed = threading.Event()
+
+    def records(self, count=3, wait=None):
+        try:
+            for i in range(count):
+                if wait is not None:
+                    wait.wait(5)
+
+                yield {"id": i}
+        finally:
+            self.closed.set()
+
+    def test_render_ndjson(self):
+        resp = self.app.render_ndjson(self.req, self.records())
+        self.assertEqual(resp.content_type, itty3.NDJSON)
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+        self.assertEqual(resp.headers["X-Accel-Buffering"], "no")
+        self.assertEqual(
+            list(resp.iter_content()),
+            [b'{"id": 0}\n', b'{"id": 1}\n', b'{"id": 2}\n'],
+        )
+        self.assertTrue(self.closed.is_set())
+
+    def test_render_ndjson_disconnect(self):
+        resp = self.app.render_ndjson(self.req, self.records())
+        chunks = resp.iter_content()
+        self.assertEqual(next(chunks), b'{"id": 0}\n')
+        chunks.close()
+        self.assertTrue(self.closed.is_set())
+
+    def test_render_sse(self):
+        events = [
+            "Hello",
+            {"id": 1},
+            itty3.ServerSentEvent("Bye", event="goodbye"),
+        ]
+        resp = self.app.render_sse(
+            self.req, iter(events), heartbeat=None, retry=2000
+        )
+        self.assertEqual(resp.content_type, itty3.EVENT_STREAM)
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+        self.assertEqual(
+            list(resp.iter_content()),
+            [
+                b"retry: 2000\n\n",
+                b"data: Hello\n\n",
+                b'data: {"id": 1}\n\n',
+                b"event: goodbye\ndata: Bye\n\n",
+            ],
+        )
+
+    def test_render_sse_heartbeat(self):
+        release = threading.Event()
+        resp = self.app.render_sse(
+            self.req, self.records(count=1, wait=release), heartbeat=0.01
+        )
+        chunks = resp.iter_content()
+
+        self.assertEqual(next(chunks), b": keep-alive\n\n")
+        release.set()
+
+        remaining = [chunk for chunk in chunks if not chunk.startswith(b":")]
+        self.assertEqual(remaining, [b'data: {"id": 0}\n\n'])
+        self.assertTrue(self.closed.wait(5))
+
+    def test_render_sse_disconnect(self):
+        release = threading.Event()
+        resp = self.app.render_sse(
+            self.req, self.records(count=100, wait=release), heartbeat=0.01
+        )
+        chunks = resp.iter_content()
+        self.assertEqual(next(chunks), b": keep-alive\n\n")
+
+        # The client goes away.
+        chunks.close()
+        release.set()
+        self.assertTrue(self.closed.wait(5))
+
+    def test_render_headers_not_modified(self):
+        headers = {"X-Stream": "1"}
+        resp = self.app.render_ndjson(self.req, [], headers=headers)
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+        resp = self.app.render_sse(self.req, [], headers=headers)
+        self.assertEqual(resp.headers["X-Stream"], "1")
+        self.assertEqual(headers, {"X-Stream": "1"})
+
+    def test_heartbeat_never_iterated(self):
+        # Like a `HEAD` request, the source still gets closed.
+        source = io.BytesIO(b"")
+        stream = itty3.HeartbeatStream(source, 0.01, b": keep-alive\n\n")
+        stream.close()
+        self.assertTrue(source.closed)
+
+    def test_sse_not_compressed(self):
+        app = itty3.App(compress=True, compress_min_size=1)
+        req = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Encoding": "gzip"}
+        )
+        resp = app.render_sse(req, iter(["Hi"]), heartbeat=None)
+        resp = app.compress_response(req, resp)
+        self.assertFalse("Content-Encoding" in resp.headers)
+
+
+class TestAppRanges(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.app.static_root = os.path.join(
+            os.path.dirname(__file__), "test_static_assets",
+        )
+        self.body = b"0123456789abcdefghij"
+
+    def make_request(self, **headers):
+        return itty3.HttpRequest("/", "GET", headers=headers)
+
+    def test_parse_range(self):
+        parse = self.app.parse_range
+        self.assertEqual(parse("bytes=0-4", 20), [(0, 4)])
+        self.assertEqual(parse("bytes=5-", 20), [(5, 19)])
+        self.assertEqual(parse("bytes=-5", 20), [(15, 19)])
+        self.assertEqual(parse("bytes=-50", 20), [(0, 19)])
+        self.assertEqual(parse("bytes=10-50", 20), [(10, 19)])
+        self.assertEqual(parse("bytes=0-1, 5-6", 20), [(0, 1), (5, 6)])
+        # Unsatisfiable.
+        self.assertEqual(parse("bytes=20-30", 20), [])
+        self.assertEqual(parse("bytes=-0", 20), [])
+        # Invalid.
+        self.assertEqual(parse("items=0-4", 20), None)
+        self.assertEqual(parse("bytes=", 20), None)
+        self.assertEqual(parse("bytes=4-2", 20), None)
+        self.assertEqual(parse("bytes=a-b", 20), None)
+        self.assertEqual(parse("bytes=5", 20), None)
+        self.assertEqual(parse("bytes=" + ",".join(["0-1"] * 17), 20), None)
+
+    def test_range_response_no_range(self):
+        resp = self.app.range_response(
+            self.make_request(), itty3.HttpResponse(self.body)
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers["Accept-Ranges"], "bytes")
+        self.assertEqual(resp.body, self.body)
+
+        # `str` bodies are ranged over their encoded form.
+        resp = self.app.range_response(
+            self.make_request(Range="bytes=0-1"), itty3.HttpResponse("Hiya")
+        )
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.headers["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(resp.iter_content()), b"Hi")
+
+        # Not for streamed bodies.
+        resp = self.app.range_response(
+            self.make_request(Range="bytes=0-1"),
+            itty3.HttpResponse(iter([b"Hi"])),
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse("Accept-Ranges" in resp.headers)
+
+    def test_range_cached_route(self):
+        app = itty3.App()
+
+        for method in ["GET", "HEAD"]:
+            app.add_route(
+                method, "/", lambda req: app.render(req, "Hello"), cache_ttl=60
+            )
+
+        # Fresh & cached copies agree on `Accept-Ranges`, as does `HEAD`.
+        fresh = app.dispatch(itty3.HttpRequest("/", "GET"))
+        cached = app.dispatch(itty3.HttpRequest("/", "GET"))
+        head = app.dispatch(itty3.HttpRequest("/", "HEAD"))
+        self.assertIsInstance(cached.body, bytes)
+        self.assertEqual(fresh.headers["Accept-Ranges"], "bytes")
+        self.assertEqual(cached.headers, fresh.headers)
+        self.assertEqual(head.headers, fresh.headers)
+
+    def test_range_response_single(self):
+        resp = self.app.range_response(
+            self.make_request(Range="bytes=5-9"),
+            itty3.HttpResponse(self.body),
+        )
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.headers["Content-Range"], "bytes 5-9/20")
+        self.assertEqual(resp.headers["Content-Length"], "5")
+        self.assertEqual(b"".join(resp.iter_content()), b"56789")
+
+    def test_range_response_multiple(self):
+        resp = self.app.range_response(
+            self.make_request(Range="bytes=0-1,-2"),
+            itty3.HttpResponse(self.body),
+        )
+        self.assertEqual(resp.status_code, 206)
+        content_type = resp.headers["Content-Type"]
+        self.assertTrue(content_type.startswith("multipart/byteranges; "))
+        boundary = content_type.split("boundary=")[1]
+
+        body = b"".join(resp.iter_content())
+        self.assertEqual(resp.headers["Content-Length"], str(len(body)))
+        self.assertEqual(
+            body,
+            (
+                "--{0}\r\n"
+                "Content-Type: text/plain\r\n"
+                "Content-Range: bytes 0-1/20\r\n\r\n"
+                "01\r\n"
+                "--{0}\r\n"
+                "Content-Type: text/plain\r\n"
+                "Content-Range: bytes 18-19/20\r\n\r\n"
+                "ij\r\n"
+                "--{0}--\r\n"
+            )
+            .format(boundary)
+            .encode("utf-8"),
+        )
+
+    def test_range_response_unsatisfiable(self):
+        resp = self.app.range_response(
+            self.make_request(Range="bytes=50-60"),
+            itty3.HttpResponse(self.body),
+        )
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp.headers["Content-Range"], "bytes */20")
+        self.assertEqual(resp.body, "")
+
+    def test_range_response_if_range(self):
+        resp = itty3.HttpResponse(self.body)
+        resp.set_etag("abc")
+        resp.set_last_modified(0)
+
+        req = self.make_request(Range="bytes=0-1", **{"If-Range": '"abc"'})
+        self.assertEqual(self.app.range_response(req, resp).status_code, 206)
+
+        for if_range in ('"old"', 'W/"abc"', "Fri, 02 Jan 1970 00:00:00 GMT"):
+            resp = itty3.HttpResponse(self.body)
+            resp.set_etag("abc")
+            resp.set_last_modified(0)
+            req = self.make_request(
+                Range="bytes=0-1", **{"If-Range": if_range}
+            )
+            resp = self.app.range_response(req, resp)
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.body, self.body)
+
+        resp = itty3.HttpResponse(self.body)
+        resp.set_last_modified(0)
+        req = self.make_request(
+            Range="bytes=0-1",
+            **{"If-Range": "Thu, 01 Jan 1970 00:00:00 GMT"}
+        )
+        self.assertEqual(self.app.range_response(req, resp).status_code, 206)
+
+    def test_range_response_static(self):
+        req = self.make_request(Range="bytes=0-3, 1400-")
+        resp = self.app.render_static(req, "itty.png")
+        resp = self.app.range_response(req, resp)
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.headers["Accept-Ranges"], "bytes")
+
+        body = b"".join(resp.iter_content())
+        self.assertTrue(b"Content-Range: bytes 0-3/1473" in body)
+        self.assertTrue(b"\x89PNG" in body)
+        self.assertTrue(b"Content-Range: bytes 1400-1472/1473" in body)
+        self.assertEqual(resp.headers["Content-Length"], str(len(body)))
+
+    def test_dispatch_range(self):
+        app = itty3.App(compress=True, compress_min_size=1)
+        app.static_root = self.app.static_root
+        app.add_route(
+            itty3.GET, "/static/<any:asset_path>", app.render_static
+        )
+        req = itty3.HttpRequest(
+            "/static/css/default.css",
+            "GET",
+            headers={"Range": "bytes=0-6", "Accept-Encoding": "gzip"},
+        )
+        resp = app.dispatch(req)
+        self.assertEqual(resp.status_code, 206)
+        # Partial responses aren't compressed.
+        self.assertFalse("Content-Encoding" in resp.headers)
+        self.assertEqual(b"".join(resp.iter_content()), b"/* Rese")
+
+
+class TestAppServer(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.app.static_root = os.path.join(
+            os.path.dirname(__file__), "test_static_assets",
+        )
+        self.app.add_route(
+            itty3.GET, "/static/<any:asset_path>", self.app.render_static
+        )
+        self.httpd = self.app.make_server("127.0.0.1", 0)
+
+    def tearDown(self):
+        self.httpd.server_close()
+
+    def fetch(self, path):
+        thread = threading.Thread(target=self.httpd.handle_request)
+        thread.start()
+        conn = http.client.HTTPConnection(
+            "127.0.0.1", self.httpd.server_port, timeout=5
+        )
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+        thread.join(5)
+        return resp, body
+
+    @unittest.skipIf(not hasattr(os, "sendfile"), "No `os.sendfile`")
+    def test_sendfile(self):
+        with mock.patch("itty3.os.sendfile", wraps=os.sendfile) as sendfile:
+            resp, body = self.fetch("/static/itty.png")
+
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(resp.getheader("Content-Length"), "1473")
+        self.assertEqual(len(body), 1473)
+        self.assertTrue(body.startswith(b"\x89PNG"))
+        self.assertTrue(sendfile.called)
+
+    def test_not_a_file(self):
+        resp, body = self.fetch("/static/nope.css")
+        self.assertEqual(resp.status, 404)
+        self.assertEqual(body, b"Not Found")
+
+
+class TestThreadPoolServer(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+        def slow(req):
+            self.started.set()
+            self.release.wait(5)
+            return self.app.render(req, "Slow")
+
+        def fast(req):
+            return self.app.render(req, "Fast")
+
+        self.app.add_route(itty3.GET, "/slow/", slow)
+        self.app.add_route(itty3.GET, "/fast/", fast)
+
+    def serve(self, **kwargs):
+        httpd = self.app.make_server("127.0.0.1", 0, **kwargs)
+        thread = threading.Thread(target=httpd.serve_forever)
+        thread.start()
+
+        def stop():
+            self.release.set()
+            httpd.shutdown()
+            thread.join(5)
+            httpd.server_close()
+
+        self.addCleanup(stop)
+        return httpd
+
+    def fetch(self, httpd, path, results=None):
+        conn = http.client.HTTPConnection(
+            "127.0.0.1", httpd.server_port, timeout=5
+        )
+        conn.request("GET", path)
+        resp = conn.getresponse()
+        body = resp.read()
+        conn.close()
+
+        if results is not None:
+            results.append((resp.status, body))
+
+        return resp, body
+
+    def wait_for(self, check):
+        for _ in range(500):
+            if check():
+                return
+
+            time.sleep(0.01)
+
+        self.fail("Timed out waiting")
+
+    def test_make_server(self):
+        httpd = self.app.make_server("127.0.0.1", 0)
+        self.addCleanup(httpd.server_close)
+        self.assertNotIsInstance(httpd, itty3.ThreadPoolWSGIServer)
+
+        httpd = self.app.make_server("127.0.0.1", 0, threads=4)
+        self.addCleanup(httpd.server_close)
+        self.assertIsInstance(httpd, itty3.ThreadPoolWSGIServer)
+        self.assertTrue(httpd.multithread)
+        self.assertEqual(
+            httpd.stats(), {"threads": 4, "queued": 0, "rejected": 0}
+        )
+        self.assertEqual(httpd.queue_size, 32)
+
+    def test_concurrent(self):
+        httpd = self.serve(threads=2)
+        results = []
+        slow = threading.Thread(
+            target=self.fetch, args=(httpd, "/slow/", results)
+        )
+        slow.start()
+        self.assertTrue(self.started.wait(5))
+
+        # The slow view doesn't hold up other requests.
+        resp, body = self.fetch(httpd, "/fast/")
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(body, b"Fast")
+        self.assertEqual(results, [])
+
+        self.release.set()
+        slow.join(5)
+        self.assertEqual(results, [(200, b"Slow")])
+
+    def test_close_open_stream(self):
+        closed = threading.Event()
+
+        def events(req):
+            def forever():
+                try:
+                    while True:
+                        yield "data: Hi\n\n"
+                        time.sleep(0.01)
+                finally:
+                    closed.set()
+
+            return self.app.render(req, forever())
+
+        self.app.add_route(itty3.GET, "/events/", events)
+        httpd = self.app.make_server("127.0.0.1", 0, threads=1)
+        httpd.graceful_timeout = 0.2
+        thread = threading.Thread(target=httpd.serve_forever)
+        thread.start()
+
+        conn = http.client.HTTPConnection(
+            "127.0.0.1", httpd.server_port, timeout=5
+        )
+        self.addCleanup(conn.close)
+        conn.request("GET", "/events/")
+        resp = conn.getresponse()
+        self.assertEqual(resp.read(10), b"data: Hi\n\n")
+
+        start = time.time()
+        httpd.shutdown()
+        thread.join(5)
+        httpd.server_close()
+
+        # Doesn't wait on the client, & the stream gets closed.
+        self.assertLess(time.time() - start, 2)
+        self.assertTrue(closed.wait(5))
+
+    def test_queue_full(self):
+        httpd = self.serve(threads=1, queue_size=1)
+        results = []
+        slow = threading.Thread(
+            target=self.fetch, args=(httpd, "/slow/", results)
+        )
+        slow.start()
+        self.assertTrue(self.started.wait(5))
+
+        queued = threading.Thread(
+            target=self.fetch, args=(httpd, "/fast/", results)
+        )
+        queued.start()
+        self.wait_for(lambda: httpd.stats()["queued"] == 1)
+
+        resp, body = self.fetch(httpd, "/fast/")
+        self.assertEqual(resp.status, 503)
+        self.assertEqual(resp.getheader("Retry-After"), "1")
+        self.assertEqual(httpd.stats()["rejected"], 1)
+
+        self.release.set()
+        slow.join(5)
+        queued.join(5)
+        self.assertEqual(sorted(results), [(200, b"Fast"), (200, b"Slow")])
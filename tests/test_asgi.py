@@ -0,0 +1,405 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import unittest
+
+import itty3
+
+
+def make_scope(path="/", method="GET", headers=None, query_string=b""):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": query_string,
+        "headers": headers or [(b"host", b"example.com")],
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def run(app, scope, messages=None):
+    incoming = list(messages or [{"type": "http.request", "body": b""}])
+    sent = []
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+
+        # Nothing more is coming, like a client that's still connected.
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    await app.asgi(scope, receive, send)
+    return sent
+
+
+def call(app, scope, messages=None):
+    return asyncio.run(run(app, scope, messages))
+
+
+class TestAsgi(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.app = itty3.App()
+
+    def test_get(self):
+        threads = []
+
+        @self.app.get("/greet/<str:name>/")
+        def greet(request, name):
+            threads.append(threading.current_thread())
+            resp = self.app.render(
+                request,
+                "Hello, {}{}".format(name, request.GET.get("punc", "")),
+            )
+            resp.set_cookie("visited", "yes")
+            return resp
+
+        sent = call(
+            self.app, make_scope("/greet/Daniel/", query_string=b"punc=!")
+        )
+        self.assertEqual(sent[0]["type"], "http.response.start")
+        self.assertEqual(sent[0]["status"], 200)
+        headers = sent[0]["headers"]
+        self.assertIn((b"Content-Type", b"text/html"), headers)
+        self.assertIn((b"Set-Cookie", b"visited=yes; Path=/"), headers)
+        self.assertEqual(
+            sent[1], {"type": "http.response.body", "body": b"Hello, Daniel!"}
+        )
+
+        # Sync views stay off of the event loop's thread.
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_post_body(self):
+        @self.app.post("/echo/")
+        def echo(request):
+            return self.app.render(request, request.body)
+
+        sent = call(
+            self.app,
+            make_scope("/echo/", method="POST"),
+            [
+                {
+                    "type": "http.request",
+                    "body": b"Hello, ",
+                    "more_body": True,
+                },
+                {"type": "http.request", "body": b"world"},
+            ],
+        )
+        self.assertEqual(sent[1]["body"], b"Hello, world")
+
+    def test_not_found(self):
+        sent = call(self.app, make_scope("/nope/"))
+        self.assertEqual(sent[0]["status"], 404)
+
+    def test_head(self):
+        self.app.add_route(
+            "HEAD", "/", lambda req: self.app.render(req, "Hello")
+        )
+        sent = call(self.app, make_scope("/", method="HEAD"))
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(sent[1]["body"], b"")
+
+    def test_streaming(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield "Hello, "
+                yield b""
+                yield b"world"
+            finally:
+                closed.append(True)
+
+        self.app.add_route(
+            "GET", "/", lambda req: self.app.render(req, chunks())
+        )
+        sent = call(self.app, make_scope("/"))
+        self.assertEqual(
+            sent[1:],
+            [
+                {
+                    "type": "http.response.body",
+                    "body": b"Hello, ",
+                    "more_body": True,
+                },
+                {
+                    "type": "http.response.body",
+                    "body": b"world",
+                    "more_body": True,
+                },
+                {"type": "http.response.body", "body": b""},
+            ],
+        )
+        self.assertEqual(closed, [True])
+
+    def test_streaming_disconnect(self):
+        closed = []
+
+        def chunks():
+            try:
+                while True:
+                    yield b"data"
+            finally:
+                closed.append(True)
+
+        self.app.add_route(
+            "GET", "/", lambda req: self.app.render(req, chunks())
+        )
+        sent = call(
+            self.app,
+            make_scope("/"),
+            [{"type": "http.request"}, {"type": "http.disconnect"}],
+        )
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(closed, [True])
+
+    def test_sse_heartbeat(self):
+        # A single executor thread, which an idle stream mustn't hold.
+        self.app.executor = concurrent.futures.ThreadPoolExecutor(1)
+        release = threading.Event()
+        closed = threading.Event()
+
+        def events():
+            try:
+                release.wait(5)
+                yield "Hi"
+            finally:
+                closed.set()
+
+        self.app.add_route(
+            "GET",
+            "/events/",
+            lambda req: self.app.render_sse(req, events(), heartbeat=0.5),
+        )
+        self.app.add_route(
+            "GET", "/", lambda req: self.app.render(req, "Hello")
+        )
+
+        async def main():
+            stream = asyncio.ensure_future(
+                run(self.app, make_scope("/events/"))
+            )
+            await asyncio.sleep(0.1)
+            sent = await asyncio.wait_for(run(self.app, make_scope("/")), 0.3)
+            # Long enough for a keep-alive.
+            await asyncio.sleep(0.6)
+            release.set()
+            return sent, await stream
+
+        sent, streamed = asyncio.run(main())
+        self.assertEqual(sent[1]["body"], b"Hello")
+        bodies = [message["body"] for message in streamed[1:]]
+        self.assertIn(b": keep-alive\n\n", bodies)
+        self.assertIn(b"data: Hi\n\n", bodies)
+        self.assertEqual(bodies[-1], b"")
+        self.assertTrue(closed.wait(5))
+
+    def test_sse_disconnect(self):
+        closed = threading.Event()
+
+        def events():
+            try:
+                while True:
+                    time.sleep(0.01)
+                    yield "Hi"
+            finally:
+                closed.set()
+
+        self.app.add_route(
+            "GET",
+            "/",
+            lambda req: self.app.render_sse(req, events(), heartbeat=1),
+        )
+        sent = call(
+            self.app,
+            make_scope("/"),
+            [{"type": "http.request"}, {"type": "http.disconnect"}],
+        )
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertTrue(closed.wait(5))
+
+    def test_async_view(self):
+        threads = []
+
+        @self.app.get("/slow/<int:delay>/")
+        async def slow(request, delay):
+            threads.append(threading.current_thread())
+            await asyncio.sleep(delay / 10)
+            return self.app.render(request, "Slept {}".format(delay))
+
+        async def main():
+            # Overlapping requests share the one loop.
+            results = await asyncio.gather(
+                *[run(self.app, make_scope("/slow/2/")) for _ in range(5)]
+            )
+            return results
+
+        start = time.time()
+        results = asyncio.run(main())
+        self.assertLess(time.time() - start, 0.8)
+
+        for sent in results:
+            self.assertEqual(sent[0]["status"], 200)
+            self.assertEqual(sent[1]["body"], b"Slept 2")
+
+        # Awaited on the loop itself, not on a worker thread.
+        self.assertEqual(threads, [threading.main_thread()] * 5)
+
+    def test_concurrency_limit(self):
+        @self.app.get("/slow/", max_concurrency=1, concurrency_queue=1)
+        async def slow(request):
+            await asyncio.sleep(0.1)
+            return self.app.render(request, "Slow")
+
+        async def main():
+            return await asyncio.gather(
+                *[run(self.app, make_scope("/slow/")) for _ in range(3)]
+            )
+
+        results = asyncio.run(main())
+        statuses = sorted([sent[0]["status"] for sent in results])
+        # One runs, one waits its turn & the last is turned away.
+        self.assertEqual(statuses, [200, 200, 503])
+        rejected = [sent for sent in results if sent[0]["status"] == 503]
+        self.assertIn((b"Retry-After", b"1"), rejected[0][0]["headers"])
+
+    def test_priority(self):
+        app = itty3.App(max_concurrency=2, reserved_concurrency=1)
+        release = threading.Event()
+
+        @app.get("/report/")
+        def report(request):
+            release.wait(5)
+            return app.render(request, "Report")
+
+        @app.get("/health/", priority="high")
+        async def health(request):
+            return app.render(request, "OK")
+
+        async def main():
+            report = asyncio.ensure_future(run(app, make_scope("/report/")))
+
+            while app.limiter.stats()["active"] != 1:
+                await asyncio.sleep(0.01)
+
+            rejected = await run(app, make_scope("/report/"))
+            health = await run(app, make_scope("/health/"))
+            release.set()
+            return rejected, health, await report
+
+        rejected, health, report = asyncio.run(main())
+        self.assertEqual(rejected[0]["status"], 503)
+        self.assertEqual(health[0]["status"], 200)
+        self.assertEqual(report[0]["status"], 200)
+
+    def test_deadline(self):
+        app = itty3.App(deadline=0.1)
+        release = threading.Event()
+
+        @app.get("/slow/")
+        def slow(request):
+            release.wait(5)
+            return app.render(request, "Slow")
+
+        @app.get("/slow-async/")
+        async def slow_async(request):
+            await asyncio.sleep(5)
+            return app.render(request, "Slow")
+
+        try:
+            start = time.time()
+            sent = call(app, make_scope("/slow/"))
+            self.assertEqual(sent[0]["status"], 504)
+            sent = call(app, make_scope("/slow-async/"))
+            self.assertEqual(sent[0]["status"], 504)
+            self.assertLess(time.time() - start, 1)
+        finally:
+            release.set()
+
+        self.assertEqual(app.concurrency_stats()["deadlines_exceeded"], 2)
+
+    def test_deadline_slots_held_until_done(self):
+        app = itty3.App(deadline=0.1, max_concurrency=2)
+        release = threading.Event()
+
+        @app.get("/slow/")
+        def slow(request):
+            release.wait(5)
+            return app.render(request, "Slow")
+
+        try:
+            sent = call(app, make_scope("/slow/"))
+            self.assertEqual(sent[0]["status"], 504)
+            self.assertEqual(app.limiter.stats()["active"], 1)
+            self.assertIsNone(app.executor)
+        finally:
+            release.set()
+
+        while app.limiter.stats()["active"]:
+            time.sleep(0.01)
+
+    def test_background(self):
+        calls = []
+
+        @self.app.get("/")
+        async def index(request):
+            resp = self.app.render(request, "Hello")
+            resp.add_background(calls.append, "audit")
+            return resp
+
+        sent = call(self.app, make_scope("/"))
+        self.assertEqual(sent[1]["body"], b"Hello")
+        self.assertTrue(self.app.flush_background(5))
+        self.assertEqual(calls, ["audit"])
+
+    def test_lifespan(self):
+        calls = []
+
+        @self.app.on_startup
+        def connect():
+            calls.append("startup")
+
+        @self.app.on_shutdown
+        async def disconnect():
+            calls.append("shutdown")
+
+        self.app.get_executor()
+        sent = call(
+            self.app,
+            {"type": "lifespan"},
+            [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}],
+        )
+        self.assertEqual(
+            sent,
+            [
+                {"type": "lifespan.startup.complete"},
+                {"type": "lifespan.shutdown.complete"},
+            ],
+        )
+        self.assertEqual(calls, ["startup", "shutdown"])
+        self.assertIsNone(self.app.executor)
+
+    def test_lifespan_failed(self):
+        @self.app.on_startup
+        def connect():
+            raise ValueError("No database")
+
+        sent = call(
+            self.app, {"type": "lifespan"}, [{"type": "lifespan.startup"}]
+        )
+        self.assertEqual(
+            sent,
+            [{"type": "lifespan.startup.failed", "message": "No database"}],
+        )
+
+    def test_unsupported_scope(self):
+        with self.assertRaises(itty3.IttyException):
+            call(self.app, {"type": "websocket"})
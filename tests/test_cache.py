@@ -0,0 +1,381 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import itty3
+
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = itty3.MemoryCache(max_entries=3, max_bytes=20)
+
+    def test_get_set(self):
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(self.cache.get("a", "nope"), "nope")
+
+        self.cache.set("a", b"hello")
+        self.assertEqual(self.cache.get("a"), b"hello")
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.total_bytes, 5)
+
+        # Replacing shouldn't double-count.
+        self.cache.set("a", b"hi")
+        self.assertEqual(self.cache.total_bytes, 2)
+
+    def test_ttl(self):
+        with mock.patch("itty3.time.monotonic", return_value=100.0):
+            self.cache.set("a", b"hello", ttl=10)
+
+        with mock.patch("itty3.time.monotonic", return_value=105.0):
+            self.assertEqual(self.cache.get("a"), b"hello")
+
+        with mock.patch("itty3.time.monotonic", return_value=110.0):
+            self.assertEqual(self.cache.get("a"), None)
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.total_bytes, 0)
+
+    def test_lru_max_entries(self):
+        self.cache.set("a", b"1")
+        self.cache.set("b", b"2")
+        self.cache.set("c", b"3")
+        # Touch "a", so "b" is now the least-recently-used.
+        self.cache.get("a")
+        self.cache.set("d", b"4")
+
+        self.assertEqual(self.cache.get("b"), None)
+        self.assertEqual(self.cache.get("a"), b"1")
+        self.assertEqual(self.cache.get("d"), b"4")
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_lru_max_bytes(self):
+        self.cache.set("a", b"0123456789")
+        self.cache.set("b", ("", [b"0123456789"]))
+        self.assertEqual(self.cache.total_bytes, 20)
+
+        self.cache.set("c", b"01234")
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(self.cache.total_bytes, 15)
+
+        # Too big to ever fit.
+        self.cache.set("d", b"x" * 21)
+        self.assertEqual(self.cache.get("d"), None)
+        self.assertEqual(self.cache.get("c"), b"01234")
+
+    def test_delete_clear(self):
+        self.cache.set("a", b"1")
+        self.cache.set("b", b"2")
+        self.cache.delete("a")
+        self.cache.delete("nope")
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(
+            self.cache.stats(), {"entries": 1, "bytes": 1, "evictions": 0}
+        )
+
+        self.cache.clear()
+        self.assertEqual(
+            self.cache.stats(), {"entries": 0, "bytes": 0, "evictions": 0}
+        )
+
+
+class TestSQLiteCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "cache.db")
+        self.cache = itty3.SQLiteCache(
+            self.path, max_entries=3, max_bytes=1000, purge_interval=None
+        )
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_get_set(self):
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(self.cache.get("a", "nope"), "nope")
+
+        value = ("response", 200, [("Content-Type", "text/html")], b"Hi")
+        self.cache.set("a", value)
+        self.assertEqual(self.cache.get("a"), value)
+
+        self.cache.set("a", ("vary", ["Accept-Language"]))
+        self.assertEqual(self.cache.get("a"), ("vary", ["Accept-Language"]))
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_persistent(self):
+        self.cache.set("a", b"hello")
+        self.cache.close()
+
+        cache = itty3.SQLiteCache(self.path, purge_interval=None)
+        self.assertEqual(cache.get("a"), b"hello")
+        cache.close()
+
+    def test_encode_decode(self):
+        small = self.cache.encode(b"hello")
+        self.assertEqual(small[:1], b"m")
+        self.assertEqual(self.cache.decode(small), b"hello")
+
+        big = self.cache.encode(b"hello" * 1000)
+        self.assertEqual(big[:1], b"z")
+        self.assertTrue(len(big) < 1000)
+        self.assertEqual(self.cache.decode(big), b"hello" * 1000)
+
+    def test_make_key(self):
+        self.assertEqual(len(self.cache.make_key("GET\n/\n")), 16)
+
+    def test_corrupt_entry(self):
+        conn = self.cache.get_connection()
+
+        for key, data in [
+            ("a", b"m"),
+            ("b", b"m\xff\xff"),
+            ("c", b"zgarbage"),
+            ("d", self.cache.encode(b"hello" * 1000)[:20]),
+        ]:
+            self.cache.set(key, b"hello")
+            conn.execute(
+                "UPDATE itty3_cache SET value = ? WHERE key = ?",
+                (data, self.cache.make_key(key)),
+            )
+            # A miss, rather than an error.
+            self.assertEqual(self.cache.get(key, "nope"), "nope")
+
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_ttl(self):
+        with mock.patch("itty3.time.time", return_value=100.0):
+            self.cache.set("a", b"hello", ttl=10)
+            self.cache.set("b", b"world")
+
+        with mock.patch("itty3.time.time", return_value=105.0):
+            self.assertEqual(self.cache.get("a"), b"hello")
+
+        with mock.patch("itty3.time.time", return_value=110.0):
+            self.assertEqual(self.cache.get("a"), None)
+            self.cache.set("a", b"hello", ttl=10)
+
+        with mock.patch("itty3.time.time", return_value=130.0):
+            self.assertEqual(self.cache.purge(), 1)
+
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_lru_max_entries(self):
+        with mock.patch("itty3.time.time", return_value=100.0):
+            self.cache.set("a", b"1")
+            self.cache.set("b", b"2")
+            self.cache.set("c", b"3")
+
+        with mock.patch("itty3.time.time", return_value=102.0):
+            # Touch "a", so "b" is now the least-recently-used.
+            self.cache.get("a")
+
+        with mock.patch("itty3.time.time", return_value=103.0):
+            self.cache.set("d", b"4")
+
+        self.assertEqual(self.cache.get("b"), None)
+        self.assertEqual(self.cache.get("a"), b"1")
+        self.assertEqual(self.cache.get("d"), b"4")
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_lru_max_bytes(self):
+        with mock.patch("itty3.time.time", return_value=100.0):
+            self.cache.set("a", os.urandom(600))
+
+        with mock.patch("itty3.time.time", return_value=101.0):
+            self.cache.set("b", os.urandom(300))
+            self.cache.set("c", os.urandom(300))
+
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertTrue(self.cache.stats()["bytes"] <= 1000)
+
+        # Too big to ever fit.
+        self.cache.set("d", os.urandom(1200))
+        self.assertEqual(self.cache.get("d"), None)
+
+    def test_delete_clear(self):
+        self.cache.set("a", b"1")
+        self.cache.set("b", b"2")
+        self.cache.delete("a")
+        self.cache.delete("nope")
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+        self.cache.clear()
+        self.assertEqual(
+            self.cache.stats(), {"entries": 0, "bytes": 0, "evictions": 0}
+        )
+
+    def test_running_totals(self):
+        statements = []
+        self.cache.get_connection().set_trace_callback(statements.append)
+        self.cache.set("a", b"1" * 100)
+        self.cache.set("b", b"2" * 100)
+        # Replacing swaps out the old size.
+        self.cache.set("a", b"1" * 50)
+        self.cache.get_connection().set_trace_callback(None)
+
+        # Writes don't scan the table.
+        self.assertFalse(any("COUNT(" in sql for sql in statements))
+        self.assertEqual(self.cache.stats()["entries"], 2)
+        self.assertEqual(
+            self.cache.stats()["bytes"],
+            len(self.cache.encode(b"1" * 50))
+            + len(self.cache.encode(b"2" * 100)),
+        )
+
+        self.cache.delete("b")
+        self.assertEqual(
+            self.cache.stats()["bytes"], len(self.cache.encode(b"1" * 50))
+        )
+
+    def test_running_totals_existing(self):
+        self.cache.set("a", b"hello")
+        self.cache.set("b", b"world")
+        self.cache.get_connection().executescript(
+            "DROP TABLE itty3_cache_totals;"
+            "DROP TRIGGER itty3_cache_inserted;"
+        )
+        self.cache.close()
+
+        # Entries from before the totals existed are counted.
+        cache = itty3.SQLiteCache(self.path, purge_interval=None)
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.close()
+
+    def test_purger(self):
+        cache = itty3.SQLiteCache(self.path, purge_interval=0.01)
+
+        with mock.patch.object(cache, "purge") as mock_purge:
+            cache.get("a")
+
+            while not mock_purge.called:
+                pass
+
+        cache.close()
+        cache._purger.join(5)
+        self.assertFalse(cache._purger.is_alive())
+
+    def test_response_cache(self):
+        response_cache = itty3.ResponseCache(backend=self.cache)
+        req = itty3.HttpRequest("/", "GET")
+        response_cache.set(req, itty3.HttpResponse("Hello"), ttl=60)
+        self.assertEqual(response_cache.get(req).body, b"Hello")
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = itty3.ResponseCache()
+
+    def test_make_key(self):
+        req_1 = itty3.HttpRequest("/list/?b=2&a=1&a=0", "GET")
+        req_2 = itty3.HttpRequest("/list/?a=1&a=0&b=2", "GET")
+        self.assertEqual(
+            self.cache.make_key(req_1), self.cache.make_key(req_2)
+        )
+        self.assertEqual(
+            self.cache.make_key(req_1), "GET\n/list/\na=1&a=0&b=2"
+        )
+
+        req_3 = itty3.HttpRequest(
+            "/list/", "GET", headers={"Accept-Language": "en"}
+        )
+        self.assertEqual(
+            self.cache.make_key(req_3, vary=["Accept-Language"]),
+            "GET\n/list/\n\naccept-language=en",
+        )
+
+    def test_is_cacheable(self):
+        self.assertTrue(self.cache.is_cacheable(itty3.HttpResponse("Hi")))
+        self.assertFalse(
+            self.cache.is_cacheable(itty3.HttpResponse("", status_code=404))
+        )
+        self.assertFalse(
+            self.cache.is_cacheable(itty3.HttpResponse(iter(["Hi"])))
+        )
+        self.assertFalse(
+            self.cache.is_cacheable(
+                itty3.HttpResponse("", headers={"Cache-Control": "private"})
+            )
+        )
+        self.assertFalse(
+            self.cache.is_cacheable(
+                itty3.HttpResponse("", headers={"Vary": "*"})
+            )
+        )
+
+        resp = itty3.HttpResponse("Hi")
+        resp.set_cookie("session", "abc123")
+        self.assertFalse(self.cache.is_cacheable(resp))
+
+    def test_get_set(self):
+        req = itty3.HttpRequest("/", "GET")
+        self.assertEqual(self.cache.get(req), None)
+
+        resp = itty3.HttpResponse(
+            "Hello", headers={"X-Thing": "1"}, content_type="text/html"
+        )
+        self.assertTrue(self.cache.set(req, resp, ttl=60))
+
+        cached = self.cache.get(req)
+        self.assertEqual(cached.body, b"Hello")
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached.content_type, "text/html")
+        self.assertEqual(
+            cached.headers, {"Content-Type": "text/html", "X-Thing": "1"}
+        )
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+        # Not cacheable.
+        self.assertFalse(
+            self.cache.set(req, itty3.HttpResponse("", status_code=500))
+        )
+
+    def test_credentialed(self):
+        resp = itty3.HttpResponse("Hello")
+
+        for headers in [
+            {"Cookie": "session=alice"},
+            {"Authorization": "Bearer alice"},
+        ]:
+            req = itty3.HttpRequest("/", "GET", headers=headers)
+            self.assertTrue(self.cache.is_credentialed(req))
+            self.assertFalse(self.cache.set(req, resp))
+
+        # An anonymous copy isn't handed out to credentialed requests.
+        self.assertTrue(self.cache.set(itty3.HttpRequest("/", "GET"), resp))
+        self.assertEqual(self.cache.get(req), None)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_get_set_vary(self):
+        req_en = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Language": "en"}
+        )
+        req_fr = itty3.HttpRequest(
+            "/", "GET", headers={"Accept-Language": "fr"}
+        )
+
+        resp = itty3.HttpResponse("Hello", headers={"Vary": "Accept-Language"})
+        self.cache.set(req_en, resp)
+
+        self.assertEqual(self.cache.get(req_en).body, b"Hello")
+        self.assertEqual(self.cache.get(req_fr), None)
+
+        resp = itty3.HttpResponse(
+            "Bonjour", headers={"Vary": "Accept-Language"}
+        )
+        self.cache.set(req_fr, resp)
+        self.assertEqual(self.cache.get(req_en).body, b"Hello")
+        self.assertEqual(self.cache.get(req_fr).body, b"Bonjour")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 1)
+
+        self.cache.clear()
+        self.assertEqual(self.cache.get(req_en), None)
@@ -0,0 +1,298 @@
+import asyncio
+import threading
+import unittest
+
+import itty3
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = itty3.SingleFlight(timeout=5)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def slow(self):
+        self.calls.append(1)
+        self.started.set()
+        self.release.wait(5)
+        return "result {}".format(len(self.calls))
+
+    def test_do_single(self):
+        self.release.set()
+        self.assertEqual(self.flight.do("a", self.slow), ("result 1", False))
+        self.assertEqual(self.flight.do("a", self.slow), ("result 2", False))
+
+    def test_do_shared(self):
+        results = []
+
+        def leader():
+            results.append(self.flight.do("a", self.slow))
+
+        def follower():
+            results.append(self.flight.do("a", self.slow))
+
+        lead = threading.Thread(target=leader)
+        lead.start()
+        self.started.wait(5)
+
+        followers = [threading.Thread(target=follower) for i in range(3)]
+
+        for thread in followers:
+            thread.start()
+
+        # Wait until everyone is parked on the flight.
+        while self.flight.stats()["waiting"] != 3:
+            pass
+
+        self.release.set()
+        lead.join(5)
+
+        for thread in followers:
+            thread.join(5)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results.count(("result 1", False)), 1)
+        self.assertEqual(results.count(("result 1", True)), 3)
+        self.assertEqual(self.flight.stats()["shared"], 3)
+
+    def test_do_leader_fails(self):
+        results = []
+        errors = []
+
+        def broken():
+            self.started.set()
+            self.release.wait(5)
+            raise ValueError("Nope")
+
+        def leader():
+            try:
+                self.flight.do("a", broken)
+            except ValueError as err:
+                errors.append(err)
+
+        def follower():
+            results.append(self.flight.do("a", lambda: "fallback"))
+
+        lead = threading.Thread(target=leader)
+        lead.start()
+        self.started.wait(5)
+        follow = threading.Thread(target=follower)
+        follow.start()
+        self.release.set()
+        lead.join(5)
+        follow.join(5)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, [("fallback", False)])
+
+    def test_do_timeout(self):
+        flight = itty3.SingleFlight(timeout=0.01)
+        results = []
+
+        lead = threading.Thread(target=flight.do, args=("a", self.slow))
+        lead.start()
+        self.started.wait(5)
+
+        results.append(flight.do("a", lambda: "impatient"))
+        self.release.set()
+        lead.join(5)
+
+        self.assertEqual(results, [("impatient", False)])
+        self.assertEqual(flight.stats()["fallbacks"], 1)
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+    def test_acquire_release(self):
+        limiter = itty3.ConcurrencyLimiter(2)
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+        self.assertFalse(limiter.acquire())
+
+        limiter.release()
+        self.assertTrue(limiter.acquire())
+        self.assertEqual(
+            limiter.stats(),
+            {
+                "limit": 2,
+                "reserved": 0,
+                "active": 2,
+                "queued": 0,
+                "queued_high": 0,
+                "rejected": 1,
+                "timed_out": 0,
+            },
+        )
+
+    def test_queue(self):
+        limiter = itty3.ConcurrencyLimiter(1, queue_size=1, timeout=5)
+        self.assertTrue(limiter.acquire())
+        results = []
+
+        waiter = threading.Thread(
+            target=lambda: results.append(limiter.acquire())
+        )
+        waiter.start()
+
+        while limiter.stats()["queued"] != 1:
+            pass
+
+        # The queue is full & a free slot goes to the waiter first.
+        self.assertFalse(limiter.acquire())
+        self.assertFalse(limiter.try_acquire())
+
+        limiter.release()
+        waiter.join(5)
+        self.assertEqual(results, [True])
+        self.assertEqual(limiter.stats()["active"], 1)
+        self.assertEqual(limiter.stats()["rejected"], 1)
+
+    def test_timeout(self):
+        limiter = itty3.ConcurrencyLimiter(1, queue_size=1, timeout=0.05)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire())
+        self.assertEqual(limiter.stats()["queued"], 0)
+        self.assertEqual(limiter.stats()["rejected"], 1)
+        self.assertEqual(limiter.stats()["timed_out"], 1)
+
+    def test_reserved(self):
+        limiter = itty3.ConcurrencyLimiter(2, reserved=1)
+        self.assertTrue(limiter.acquire())
+        # The last slot is only for high priority requests.
+        self.assertFalse(limiter.acquire())
+        self.assertTrue(limiter.acquire(itty3.PRIORITY_HIGH))
+        self.assertFalse(limiter.acquire(itty3.PRIORITY_HIGH))
+
+        with self.assertRaises(itty3.IttyException):
+            limiter.acquire("urgent")
+
+    def test_high_priority_first(self):
+        limiter = itty3.ConcurrencyLimiter(1, queue_size=2, timeout=5)
+        self.assertTrue(limiter.acquire())
+        order = []
+
+        def wait(priority):
+            limiter.acquire(priority)
+            order.append(priority)
+            limiter.release()
+
+        threads = []
+
+        for priority in (itty3.PRIORITY_NORMAL, itty3.PRIORITY_HIGH):
+            thread = threading.Thread(target=wait, args=(priority,))
+            thread.start()
+            threads.append(thread)
+
+            while limiter.stats()["queued"] != len(threads):
+                pass
+
+        self.assertEqual(limiter.stats()["queued_high"], 1)
+        limiter.release()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order, [itty3.PRIORITY_HIGH, itty3.PRIORITY_NORMAL])
+
+    def test_acquire_async(self):
+        limiter = itty3.ConcurrencyLimiter(1, queue_size=1, timeout=5)
+
+        async def main():
+            self.assertTrue(await limiter.acquire_async())
+            waiter = asyncio.ensure_future(limiter.acquire_async())
+
+            while limiter.stats()["queued"] != 1:
+                await asyncio.sleep(0)
+
+            # Full queue.
+            self.assertFalse(await limiter.acquire_async())
+            # Freed from another thread, like a view on the executor.
+            await asyncio.get_running_loop().run_in_executor(
+                None, limiter.release
+            )
+            return await waiter
+
+        self.assertTrue(asyncio.run(main()))
+        self.assertEqual(limiter.stats()["active"], 1)
+        self.assertEqual(limiter.stats()["rejected"], 1)
+
+    def test_acquire_async_cancelled(self):
+        limiter = itty3.ConcurrencyLimiter(1, queue_size=1)
+
+        async def main():
+            await limiter.acquire_async()
+            waiter = asyncio.ensure_future(limiter.acquire_async())
+
+            while limiter.stats()["queued"] != 1:
+                await asyncio.sleep(0)
+
+            waiter.cancel()
+
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(main())
+        self.assertEqual(limiter.stats()["queued"], 0)
+        self.assertEqual(limiter.stats()["timed_out"], 0)
+
+
+class TestBackgroundQueue(unittest.TestCase):
+    def setUp(self):
+        self.background = itty3.BackgroundQueue(workers=1, queue_size=2)
+        self.calls = []
+
+    def record(self, value, suffix=""):
+        self.calls.append(value + suffix)
+
+    def test_submit(self):
+        self.background.submit(
+            [
+                (self.record, ("a",), {}),
+                (self.record, ("b",), {"suffix": "!"}),
+            ]
+        )
+        self.assertTrue(self.background.flush(5))
+        self.assertEqual(self.calls, ["a", "b!"])
+        self.assertEqual(self.background.stats()["completed"], 2)
+        self.assertEqual(
+            self.background._threads[0].name, "itty3-background-0"
+        )
+
+    def test_failure(self):
+        def broken():
+            raise ValueError("Nope")
+
+        with self.assertLogs("itty3", level="ERROR"):
+            self.background.submit(
+                [(broken, (), {}), (self.record, ("a",), {})]
+            )
+            self.assertTrue(self.background.flush(5))
+
+        self.assertEqual(self.calls, ["a"])
+        self.assertEqual(self.background.stats()["failed"], 1)
+        self.assertEqual(self.background.stats()["completed"], 1)
+
+    def test_full(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        self.background.submit([(block, (), {})])
+        started.wait(5)
+
+        # Two fit in the queue & the third runs right away.
+        self.background.submit(
+            [(self.record, (value,), {}) for value in "abc"]
+        )
+        self.assertEqual(self.calls, ["c"])
+        self.assertFalse(self.background.flush(0.01))
+        self.assertEqual(self.background.stats()["unfinished"], 3)
+
+        release.set()
+        self.assertTrue(self.background.flush(5))
+        self.assertEqual(self.calls, ["c", "a", "b"])
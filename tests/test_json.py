@@ -0,0 +1,102 @@
+import dataclasses
+import datetime
+import json
+import unittest
+import uuid
+from unittest import mock
+
+import itty3
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+class TestJSONEncoder(unittest.TestCase):
+    def test_default(self):
+        data = {
+            "point": Point(1, 2),
+            "when": datetime.datetime(2020, 1, 21, 20, 26, 8),
+            "day": datetime.date(2020, 1, 21),
+            "id": uuid.UUID("5fdd79e5-c417-42d7-8235-e7b6c6e10c06"),
+        }
+        self.assertEqual(
+            json.loads(json.dumps(data, cls=itty3.JSONEncoder)),
+            {
+                "point": {"x": 1, "y": 2},
+                "when": "2020-01-21T20:26:08",
+                "day": "2020-01-21",
+                "id": "5fdd79e5-c417-42d7-8235-e7b6c6e10c06",
+            },
+        )
+
+    def test_default_unknown(self):
+        with self.assertRaises(TypeError):
+            json.dumps({"nope": object()}, cls=itty3.JSONEncoder)
+
+
+class TestJSONBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = itty3.JSONBackend(chunk_size=10)
+
+    def test_dumps(self):
+        self.assertEqual(self.backend.dumps({"a": 1}), b'{"a": 1}')
+        self.assertEqual(
+            self.backend.dumps({"a": 1}, pretty=True), b'{\n    "a": 1\n}'
+        )
+        self.assertEqual(self.backend.dumps({"a": "☃"}), b'{"a": "\\u2603"}')
+
+    def test_is_array_like(self):
+        self.assertTrue(self.backend.is_array_like([]))
+        self.assertTrue(self.backend.is_array_like(()))
+        self.assertTrue(self.backend.is_array_like(i for i in range(2)))
+        self.assertFalse(self.backend.is_array_like({}))
+        self.assertFalse(self.backend.is_array_like("abc"))
+        self.assertFalse(self.backend.is_array_like(3))
+
+    def test_iterencode_array(self):
+        rows = ({"id": i} for i in range(5))
+        chunks = list(self.backend.iterencode(rows))
+        self.assertTrue(len(chunks) > 1)
+        self.assertTrue(all([isinstance(c, bytes) for c in chunks]))
+        self.assertEqual(
+            json.loads(b"".join(chunks)), [{"id": i} for i in range(5)]
+        )
+
+        self.assertEqual(b"".join(self.backend.iterencode([])), b"[]")
+        self.assertEqual(
+            json.loads(b"".join(self.backend.iterencode([1, 2], pretty=True))),
+            [1, 2],
+        )
+
+    def test_iterencode_object(self):
+        data = {"rows": list(range(20))}
+        chunks = list(self.backend.iterencode(data))
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(json.loads(b"".join(chunks)), data)
+
+
+class TestOrjsonBackend(unittest.TestCase):
+    def test_missing(self):
+        with mock.patch("itty3.orjson", None):
+            with self.assertRaises(itty3.IttyException):
+                itty3.OrjsonBackend()
+
+    @unittest.skipIf(itty3.orjson is None, "orjson isn't installed")
+    def test_dumps(self):
+        backend = itty3.OrjsonBackend()
+        self.assertEqual(
+            backend.dumps({"point": Point(1, 2), "a": [1]}),
+            b'{"point":{"x":1,"y":2},"a":[1]}',
+        )
+
+    @unittest.skipIf(itty3.orjson is None, "orjson isn't installed")
+    def test_iterencode(self):
+        backend = itty3.OrjsonBackend()
+        rows = ({"id": i} for i in range(3))
+        self.assertEqual(
+            b"".join(backend.iterencode(rows)),
+            b'[{"id":0},{"id":1},{"id":2}]',
+        )
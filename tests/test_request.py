@@ -43,6 +43,17 @@ class TestHttpRequest(unittest.TestCase):
         self.assertEqual(req.query["name"], ["Daniel"])
         self.assertEqual(req.fragment, "visited")
 
+    def test_deadline_remaining(self):
+        self.assertIsNone(self.request.deadline_remaining())
+
+        self.request.set_deadline(10)
+        remaining = self.request.deadline_remaining()
+        self.assertGreater(remaining, 9)
+        self.assertLessEqual(remaining, 10)
+
+        self.request.set_deadline(-1)
+        self.assertEqual(self.request.deadline_remaining(), 0)
+
     def test_split_uri(self):
         bits = self.request.split_uri(
             "https://foo.com:8080/this/is/a/crazy/path?name=Joe"
@@ -91,6 +102,58 @@ class TestHttpRequest(unittest.TestCase):
         self.assertEqual(req.COOKIES["session"], "abc123")
         self.assertEqual(req.COOKIES["moof"], "dogcow")
 
+    def test_from_asgi(self):
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "https",
+            "path": "/secure/checkout",
+            "query_string": b"step=2",
+            "headers": [
+                (b"host", b"example.com"),
+                (b"content-type", b"application/json"),
+                (b"x-authorized", b"heckyeah"),
+                (b"accept", b"text/html"),
+                (b"accept", b"application/json"),
+                (b"cookie", b"session=abc123; moof=dogcow"),
+            ],
+            "server": ("10.0.0.1", 443),
+        }
+
+        req = itty3.HttpRequest.from_asgi(scope, b'{"hello": "world"}')
+        self.assertEqual(req.method, "POST")
+        self.assertEqual(req.body, b'{"hello": "world"}')
+        self.assertEqual(req.scheme, "https")
+        self.assertEqual(req.host, "example.com")
+        self.assertEqual(req.port, 443)
+        self.assertEqual(req.path, "/secure/checkout")
+        self.assertEqual(req.GET["step"], "2")
+        self.assertEqual(req.content_type(), "application/json")
+        self.assertEqual(req.headers.get("X-Authorized"), "heckyeah")
+        self.assertEqual(
+            req.headers.get("Accept"), "text/html, application/json"
+        )
+        self.assertEqual(req.content_length, 18)
+        self.assertEqual(req.request_protocol, "HTTP/1.1")
+        self.assertEqual(req.COOKIES["session"], "abc123")
+        self.assertEqual(req.COOKIES["moof"], "dogcow")
+
+    def test_from_asgi_no_host(self):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/hello world/",
+            "server": ("127.0.0.1", 8000),
+        }
+
+        req = itty3.HttpRequest.from_asgi(scope)
+        self.assertEqual(req.host, "127.0.0.1")
+        self.assertEqual(req.port, 8000)
+        self.assertEqual(req.path, "/hello%20world/")
+        self.assertEqual(req.body, b"")
+        self.assertEqual(req.content_length, 0)
+
     def test_content_type_simple(self):
         self.assertEqual(self.request.content_type(), "text/html")
 
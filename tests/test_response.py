@@ -1,4 +1,5 @@
 import datetime
+import io
 import unittest
 from unittest import mock
 
@@ -121,3 +122,163 @@ class TestHttpResponse(unittest.TestCase):
                 ),
             ],
         )
+
+    def test_get_header(self):
+        self.assertEqual(
+            self.complex_resp.get_header("x-auth-token"), "abcdef1234567890"
+        )
+        self.assertEqual(self.complex_resp.get_header("X-Nope"), None)
+        self.assertEqual(self.complex_resp.get_header("X-Nope", "a"), "a")
+
+    def test_remove_header(self):
+        self.complex_resp.remove_header("x-auth-token")
+        self.assertEqual(
+            self.complex_resp.headers, {"Content-Type": "application/json"}
+        )
+
+        # Shouldn't fail if it's not there.
+        self.complex_resp.remove_header("x-auth-token")
+
+    def test_add_vary(self):
+        self.response.add_vary("Accept-Encoding")
+        self.assertEqual(self.response.headers["Vary"], "Accept-Encoding")
+
+        self.response.add_vary("Cookie")
+        self.response.add_vary("accept-encoding")
+        self.assertEqual(
+            self.response.headers["Vary"], "Accept-Encoding, Cookie"
+        )
+
+    def test_is_streaming(self):
+        self.assertFalse(self.response.is_streaming())
+        self.assertFalse(itty3.HttpResponse(b"bytes").is_streaming())
+        self.assertTrue(itty3.HttpResponse(iter(["a", "b"])).is_streaming())
+
+    def test_write_bytes(self):
+        mock_start_response = mock.Mock()
+        resp = itty3.HttpResponse(b"\x89PNG", content_type="image/png")
+        resp.start_response = mock_start_response
+
+        res = resp.write()
+        self.assertEqual(res, [b"\x89PNG"])
+
+    def test_write_streaming(self):
+        mock_start_response = mock.Mock()
+        closed = []
+
+        def body():
+            try:
+                yield "Hello, "
+                yield ""
+                yield b"world!"
+            finally:
+                closed.append(True)
+
+        resp = itty3.HttpResponse(body())
+        resp.start_response = mock_start_response
+
+        res = resp.write()
+        self.assertEqual(list(res), [b"Hello, ", b"world!"])
+        self.assertEqual(closed, [True])
+        mock_start_response.assert_called_once_with(
+            "200 OK", [("Content-Type", "text/plain")]
+        )
+
+    def test_set_etag(self):
+        self.response.set_etag("abc")
+        self.assertEqual(self.response.headers["ETag"], '"abc"')
+
+        self.response.set_etag("abc", weak=True)
+        self.assertEqual(self.response.headers["ETag"], 'W/"abc"')
+
+        self.response.set_etag('W/"def"', weak=True)
+        self.assertEqual(self.response.headers["ETag"], 'W/"def"')
+
+    def test_set_last_modified(self):
+        self.response.set_last_modified(
+            datetime.datetime(2020, 1, 21, 20, 26, 8)
+        )
+        self.assertEqual(
+            self.response.headers["Last-Modified"],
+            "Tue, 21 Jan 2020 20:26:08 GMT",
+        )
+
+        self.response.set_last_modified(0)
+        self.assertEqual(
+            self.response.headers["Last-Modified"],
+            "Thu, 01 Jan 1970 00:00:00 GMT",
+        )
+
+    def test_copy(self):
+        self.response.set_cookie("session", "abc123")
+        self.response.start_response = mock.Mock()
+
+        resp = self.response.copy()
+        self.assertEqual(resp.body, "Hello, world!")
+        self.assertEqual(resp.headers, self.response.headers)
+        self.assertEqual(resp.start_response, None)
+
+        resp.set_header("X-New", "1")
+        resp.delete_cookie("session")
+        self.assertFalse("X-New" in self.response.headers)
+        self.assertEqual(self.response._cookies["session"].value, "abc123")
+
+    def test_add_background(self):
+        self.assertEqual(self.response.background, [])
+        task = mock.Mock()
+        self.response.add_background(task, "audit", level=2)
+        self.assertEqual(
+            self.response.background, [(task, ("audit",), {"level": 2})]
+        )
+
+        # Copies don't run the tasks a second time.
+        self.assertEqual(self.response.copy().background, [])
+
+    def test_write_file(self):
+        mock_start_response = mock.Mock()
+        body = io.BytesIO(b"x" * 100)
+        resp = itty3.HttpResponse(body)
+        resp.block_size = 40
+        resp.start_response = mock_start_response
+
+        res = resp.write()
+        self.assertEqual(
+            [len(chunk) for chunk in res], [40, 40, 20],
+        )
+        self.assertTrue(body.closed)
+
+    def test_write_file_wrapper(self):
+        body = io.BytesIO(b"x" * 100)
+        resp = itty3.HttpResponse(body)
+        resp.start_response = mock.Mock()
+        resp.file_wrapper = mock.Mock(return_value="wrapped")
+
+        self.assertEqual(resp.write(), "wrapped")
+        resp.file_wrapper.assert_called_once_with(body, resp.block_size)
+
+        # Non-file bodies are unaffected.
+        self.response.start_response = mock.Mock()
+        self.response.file_wrapper = mock.Mock()
+        self.assertEqual(self.response.write(), [b"Hello, world!"])
+        self.response.file_wrapper.assert_not_called()
+
+
+class TestServerSentEvent(unittest.TestCase):
+    def test_encode_simple(self):
+        event = itty3.ServerSentEvent("Hello")
+        self.assertEqual(event.encode(), b"data: Hello\n\n")
+
+    def test_encode_complex(self):
+        event = itty3.ServerSentEvent(
+            "Hello\nworld", event="greeting", id="42", retry=1000
+        )
+        self.assertEqual(
+            event.encode(),
+            (
+                b"event: greeting\nid: 42\nretry: 1000\n"
+                b"data: Hello\ndata: world\n\n"
+            ),
+        )
+
+    def test_encode_empty(self):
+        self.assertEqual(itty3.ServerSentEvent("").encode(), b"data: \n\n")
@@ -36,6 +36,25 @@ class TestRoute(unittest.TestCase):
         self.assertEqual(self.route_1._regex, re.compile("^/$"))
         self.assertEqual(self.route_1._type_conversions, {})
 
+    def test_is_async(self):
+        self.assertFalse(self.route_1.is_async)
+
+        async def async_view(request):
+            pass
+
+        route = itty3.Route("GET", "/async/", async_view)
+        self.assertTrue(route.is_async)
+
+    def test_priority(self):
+        self.assertEqual(self.route_1.priority, itty3.PRIORITY_NORMAL)
+        route = itty3.Route(
+            "GET", "/health/", self.mock_simple_view, priority="high"
+        )
+        self.assertEqual(route.priority, itty3.PRIORITY_HIGH)
+
+        with self.assertRaises(itty3.IttyException):
+            itty3.Route("GET", "/", self.mock_simple_view, priority="urgent")
+
     def test_attributes_simple(self):
         self.assertEqual(self.route_2.method, "GET")
         self.assertEqual(self.route_2.path, "/greet/")
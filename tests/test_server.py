@@ -0,0 +1,648 @@
+import http.client
+import os
+import re
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from unittest import mock
+
+import itty3
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = textwrap.dedent(
+    """
+    import os
+    import sys
+
+    sys.path.insert(0, {root!r})
+    import itty3
+
+    app = itty3.App()
+
+    @app.get("/pid/")
+    def pid(request):
+        return app.render(request, str(os.getpid()))
+
+    @app.get("/crash/")
+    def crash(request):
+        os._exit(3)
+
+    app.run(port=0, workers=2, **{options!r})
+    """
+)
+
+
+class TestMemoryUsage(unittest.TestCase):
+    def test_memory_usage(self):
+        rollup = (
+            "00400000-7ffd [rollup]\n"
+            "Rss:               20480 kB\n"
+            "Pss:               10240 kB\n"
+            "Shared_Clean:      12288 kB\n"
+            "Shared_Dirty:       2048 kB\n"
+            "Private_Clean:      1024 kB\n"
+            "Private_Dirty:      5120 kB\n"
+        )
+
+        with mock.patch("builtins.open", mock.mock_open(read_data=rollup)):
+            usage = itty3.memory_usage(1234)
+
+        self.assertEqual(
+            usage,
+            {
+                "rss": 20480 * 1024,
+                "pss": 10240 * 1024,
+                "shared": 14336 * 1024,
+                "private": 6144 * 1024,
+            },
+        )
+
+    def test_memory_usage_unavailable(self):
+        with mock.patch("builtins.open", side_effect=FileNotFoundError):
+            self.assertIsNone(itty3.memory_usage())
+
+    @unittest.skipIf(
+        not os.path.exists("/proc/self/smaps_rollup"), "No `smaps_rollup`"
+    )
+    def test_memory_usage_self(self):
+        usage = itty3.memory_usage()
+        self.assertGreater(usage["rss"], 0)
+        self.assertGreater(usage["private"], 0)
+
+
+class TestWSGIServer(unittest.TestCase):
+    def test_handled(self):
+        app = itty3.App()
+        app.add_route("GET", "/", lambda req: app.render(req, "Hello"))
+        httpd = app.make_server("127.0.0.1", 0)
+        self.addCleanup(httpd.server_close)
+        self.assertIsInstance(httpd, itty3.WSGIServer)
+        after_request = mock.Mock()
+        httpd.after_request = after_request
+
+        for count in (1, 2):
+            thread = threading.Thread(target=httpd.handle_request)
+            thread.start()
+            conn = http.client.HTTPConnection(
+                "127.0.0.1", httpd.server_port, timeout=5
+            )
+            conn.request("GET", "/")
+            self.assertEqual(conn.getresponse().read(), b"Hello")
+            conn.close()
+            thread.join(5)
+            self.assertEqual(httpd.handled, count)
+
+        after_request.assert_called_with(httpd)
+        self.assertEqual(after_request.call_count, 2)
+
+    def test_resident_memory(self):
+        self.assertGreater(itty3.resident_memory(), 1024 * 1024)
+
+
+class TestAsyncioServer(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+
+        @self.app.get("/")
+        def index(request):
+            return self.app.render(request, "Hello")
+
+        @self.app.get("/stream/")
+        def stream(request):
+            return self.app.render(request, (str(i) for i in range(3)))
+
+        @self.app.post("/echo/")
+        def echo(request):
+            return self.app.render(request, request.body)
+
+        @self.app.get("/async/")
+        async def async_view(request):
+            return self.app.render(request, "Async")
+
+        self.httpd = self.app.make_server("127.0.0.1", 0, server="asyncio")
+        self.httpd.keepalive_timeout = 0.5
+        self.assertIsInstance(self.httpd, itty3.AsyncioServer)
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+        self.thread.start()
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join(5)
+
+    def connect(self):
+        conn = http.client.HTTPConnection(
+            "127.0.0.1", self.httpd.server_port, timeout=5
+        )
+        self.addCleanup(conn.close)
+        return conn
+
+    def raw_connect(self):
+        sock = socket.create_connection(
+            ("127.0.0.1", self.httpd.server_port), timeout=5
+        )
+        self.addCleanup(sock.close)
+        return sock
+
+    def read_all(self, sock):
+        chunks = []
+
+        while True:
+            chunk = sock.recv(65536)
+
+            if not chunk:
+                return b"".join(chunks)
+
+            chunks.append(chunk)
+
+    def test_keep_alive(self):
+        conn = self.connect()
+
+        for path, body in [
+            ("/", b"Hello"),
+            ("/async/", b"Async"),
+            ("/nope/", b"Not Found"),
+        ]:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            self.assertEqual(resp.read(), body)
+            self.assertEqual(resp.getheader("Content-Length"), str(len(body)))
+            self.assertIsNotNone(resp.getheader("Date"))
+
+        # All over the one connection.
+        self.assertEqual(self.httpd.stats()["connections"], 1)
+        self.assertEqual(self.httpd.handled, 3)
+
+    def test_chunked(self):
+        conn = self.connect()
+        conn.request("GET", "/stream/")
+        resp = conn.getresponse()
+        self.assertEqual(resp.getheader("Transfer-Encoding"), "chunked")
+        self.assertEqual(resp.read(), b"012")
+
+        conn.request(
+            "POST",
+            "/echo/",
+            body=iter([b"Hello, ", b"world"]),
+            encode_chunked=True,
+        )
+        resp = conn.getresponse()
+        self.assertEqual(resp.read(), b"Hello, world")
+
+    def test_pipelining(self):
+        sock = self.raw_connect()
+        sock.sendall(
+            b"GET / HTTP/1.1\r\nHost: example.com\r\n\r\n"
+            b"POST /echo/ HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc"
+            b"GET /async/ HTTP/1.1\r\nConnection: close\r\n\r\n"
+        )
+        data = self.read_all(sock)
+        self.assertEqual(data.count(b"HTTP/1.1 200 OK"), 3)
+        self.assertLess(data.index(b"Hello"), data.index(b"abc"))
+        self.assertLess(data.index(b"abc"), data.index(b"Async"))
+        self.assertIn(b"Connection: close", data)
+
+    def test_streamed_keep_alive(self):
+        sock = self.raw_connect()
+        sock.sendall(
+            b"GET /stream/ HTTP/1.1\r\nHost: example.com\r\n\r\n"
+            b"GET /stream/ HTTP/1.1\r\nHost: example.com\r\n\r\n"
+            b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n"
+        )
+        data = self.read_all(sock)
+        # Finishing one stream doesn't spoil the connection for the next.
+        self.assertEqual(data.count(b"HTTP/1.1 200 OK"), 3)
+        self.assertEqual(data.count(b"1\r\n0\r\n1\r\n1\r\n1\r\n2"), 2)
+        self.assertTrue(data.endswith(b"Hello"))
+
+    def test_http_1_0(self):
+        sock = self.raw_connect()
+        sock.sendall(b"GET /stream/ HTTP/1.0\r\n\r\n")
+        data = self.read_all(sock)
+        # No chunking. The body ends with the connection.
+        self.assertNotIn(b"chunked", data)
+        self.assertTrue(data.endswith(b"\r\n\r\n012"))
+
+    def test_idle_timeout(self):
+        sock = self.raw_connect()
+        start = time.time()
+        self.assertEqual(sock.recv(1), b"")
+        self.assertLess(time.time() - start, 2)
+
+    def test_bad_request(self):
+        sock = self.raw_connect()
+        sock.sendall(b"NONSENSE\r\n\r\n")
+        self.assertTrue(
+            self.read_all(sock).startswith(b"HTTP/1.1 400 Bad Request")
+        )
+
+    def test_bad_lengths(self):
+        for head in [
+            b"Content-Length: -5\r\n",
+            b"Content-Length: +5\r\n",
+            b"Content-Length: 3\r\nContent-Length: 5\r\n",
+        ]:
+            sock = self.raw_connect()
+            sock.sendall(b"POST /echo/ HTTP/1.1\r\n" + head + b"\r\nabcde")
+            self.assertTrue(
+                self.read_all(sock).startswith(b"HTTP/1.1 400 Bad Request")
+            )
+
+        for size in [b"-5", b"0x5", b"0_5", b" 5"]:
+            sock = self.raw_connect()
+            sock.sendall(
+                b"POST /echo/ HTTP/1.1\r\nTransfer-Encoding: chunked\r\n"
+                b"\r\n" + size + b"\r\nabcde\r\n0\r\n\r\n"
+            )
+            self.assertTrue(
+                self.read_all(sock).startswith(b"HTTP/1.1 400 Bad Request")
+            )
+
+        # Repeating the same length is fine.
+        sock = self.raw_connect()
+        sock.sendall(
+            b"POST /echo/ HTTP/1.1\r\nContent-Length: 3\r\n"
+            b"Content-Length: 3\r\nConnection: close\r\n\r\nabc"
+        )
+        self.assertTrue(self.read_all(sock).endswith(b"\r\n\r\nabc"))
+
+    def test_body_too_large(self):
+        self.httpd.max_body_size = 10
+
+        sock = self.raw_connect()
+        sock.sendall(
+            b"POST /echo/ HTTP/1.1\r\nContent-Length: 11\r\n"
+            b"Expect: 100-continue\r\n\r\n"
+        )
+        # Turned away before the body is sent (& without a `100`).
+        self.assertTrue(
+            self.read_all(sock).startswith(b"HTTP/1.1 413 Payload Too Large")
+        )
+
+        sock = self.raw_connect()
+        sock.sendall(
+            b"POST /echo/ HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"6\r\nHello,\r\n6\r\n world\r\n0\r\n\r\n"
+        )
+        self.assertTrue(self.read_all(sock).startswith(b"HTTP/1.1 413"))
+
+        conn = self.connect()
+        conn.request("POST", "/echo/", body=b"0123456789")
+        self.assertEqual(conn.getresponse().read(), b"0123456789")
+
+    def test_body_read_timeout(self):
+        self.httpd.read_timeout = 0.3
+        self.httpd.keepalive_timeout = 5
+        sock = self.raw_connect()
+        sock.sendall(b"POST /echo/ HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc")
+        start = time.time()
+        self.assertEqual(self.read_all(sock), b"")
+        self.assertLess(time.time() - start, 2)
+
+    def test_chunked_in_pieces(self):
+        self.httpd.read_timeout = 2
+        sock = self.raw_connect()
+        data = (
+            b"POST /echo/ HTTP/1.1\r\nTransfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+            + b"".join(b"5\r\n%05d\r\n" % i for i in range(200))
+            + b"0\r\n\r\n"
+        )
+
+        # Every piece is parsed as it arrives.
+        for offset in range(0, len(data), 97):
+            sock.sendall(data[offset : offset + 97])
+            time.sleep(0.001)
+
+        body = self.read_all(sock).split(b"\r\n\r\n", 1)[1]
+        self.assertEqual(body, b"".join(b"%05d" % i for i in range(200)))
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=5):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+@unittest.skipIf(not hasattr(socket, "AF_UNIX"), "No `AF_UNIX`")
+class TestSocketBinding(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.app.add_route(
+            "GET",
+            "/",
+            lambda req: self.app.render(req, "Hello from {}".format(req.host)),
+        )
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "app.sock")
+
+    def serve(self, httpd):
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            httpd.shutdown()
+            httpd.server_close()
+            thread.join(5)
+
+        self.addCleanup(stop)
+
+    def fetch_unix(self):
+        conn = UnixHTTPConnection(self.path)
+
+        try:
+            conn.request("GET", "/")
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        finally:
+            conn.close()
+
+    def test_unix_socket(self):
+        for server in ("wsgiref", "asyncio"):
+            httpd = self.app.make_server(
+                unix_socket=self.path, unix_socket_mode=0o600, server=server
+            )
+            self.assertEqual(httpd.location(), "unix:{}".format(self.path))
+            mode = os.stat(self.path).st_mode
+            self.assertTrue(stat.S_ISSOCK(mode))
+            self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+            thread = threading.Thread(target=httpd.serve_forever)
+            thread.start()
+
+            try:
+                self.assertEqual(
+                    self.fetch_unix(), (200, b"Hello from localhost")
+                )
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+                thread.join(5)
+
+            # The socket file is cleaned up.
+            self.assertFalse(os.path.exists(self.path))
+
+    def test_unix_socket_stale(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+
+        httpd = self.app.make_server(unix_socket=self.path, threads=2)
+        self.serve(httpd)
+        self.assertEqual(self.fetch_unix()[0], 200)
+
+    def test_unix_socket_not_a_socket(self):
+        with open(self.path, "w") as not_a_socket:
+            not_a_socket.write("Important!")
+
+        with self.assertRaises(itty3.IttyException):
+            self.app.make_server(unix_socket=self.path)
+
+        with open(self.path) as not_a_socket:
+            self.assertEqual(not_a_socket.read(), "Important!")
+
+    def test_reuse_port_conflict(self):
+        with self.assertRaises(itty3.IttyException):
+            self.app.make_server(unix_socket=self.path, reuse_port=True)
+
+    def test_fd(self):
+        for server in ("wsgiref", "asyncio"):
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.bind(("127.0.0.1", 0))
+            listener.listen(5)
+            port = listener.getsockname()[1]
+
+            httpd = self.app.make_server(fd=listener.detach(), server=server)
+            self.assertEqual(httpd.server_port, port)
+            self.assertEqual(
+                httpd.location(), "http://127.0.0.1:{}".format(port)
+            )
+            self.serve(httpd)
+
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            self.addCleanup(conn.close)
+            conn.request("GET", "/")
+            self.assertEqual(conn.getresponse().status, 200)
+
+    def test_listen_fds(self):
+        environ = {"LISTEN_FDS": "2", "LISTEN_PID": str(os.getpid())}
+
+        with mock.patch.dict(os.environ, environ):
+            self.assertEqual(itty3.listen_fds(unset_environment=False), [3, 4])
+            self.assertEqual(itty3.listen_fds(), [3, 4])
+            self.assertNotIn("LISTEN_FDS", os.environ)
+            self.assertEqual(itty3.listen_fds(), [])
+
+        # Meant for some other process.
+        environ = {"LISTEN_FDS": "1", "LISTEN_PID": "1"}
+
+        with mock.patch.dict(os.environ, environ):
+            self.assertEqual(itty3.listen_fds(), [])
+
+
+class TestRecycling(unittest.TestCase):
+    def test_jitter(self):
+        server = itty3.PreforkServer(itty3.App(), max_requests=1000)
+        self.assertEqual(server.max_requests_jitter, 100)
+
+        server = itty3.PreforkServer(
+            itty3.App(), max_requests=1000, max_requests_jitter=5
+        )
+        self.assertEqual(server.max_requests_jitter, 5)
+
+        server = itty3.PreforkServer(itty3.App())
+        self.assertEqual(server.max_requests_jitter, 0)
+
+    def test_recycle_reason(self):
+        server = itty3.PreforkServer(itty3.App(), max_rss_mb=100)
+        self.assertIsNone(server.recycle_reason(10))
+        self.assertIsNone(server.recycle_reason(10, max_requests=11))
+        self.assertEqual(
+            server.recycle_reason(11, max_requests=11), "handled 11 requests"
+        )
+
+        with mock.patch("itty3.resident_memory", return_value=101 * 1048576):
+            self.assertEqual(
+                server.recycle_reason(10), "using 101.0Mb (limit 100Mb)"
+            )
+
+
+@unittest.skipIf(not hasattr(os, "fork"), "No `os.fork`")
+class TestPreforkServer(unittest.TestCase):
+    def start(self, **options):
+        self.lines = []
+        self.proc = subprocess.Popen(
+            [sys.executable, "-c", SCRIPT.format(root=ROOT, options=options)],
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            start_new_session=True,
+        )
+        self.addCleanup(self.cleanup)
+        self.reader = threading.Thread(target=self.read_logs, daemon=True)
+        self.reader.start()
+
+        line = self.wait_for_log("Now serving requests")
+        self.location = re.search(r" at (\S+) with 2 workers", line).group(1)
+
+        if self.location.startswith("http://"):
+            self.port = int(self.location.rsplit(":", 1)[1])
+
+        self.wait_for_log("Started worker", count=2)
+
+        # Workers may still be binding (with `reuse_port`).
+        for _ in range(500):
+            try:
+                self.fetch("/pid/")
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.01)
+
+    def cleanup(self):
+        # Take any stray workers down too.
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        self.proc.wait(10)
+        self.reader.join(10)
+        self.proc.stderr.close()
+
+    def read_logs(self):
+        for line in self.proc.stderr:
+            self.lines.append(line)
+
+    def wait_for_log(self, text, count=1):
+        for _ in range(1000):
+            found = [line for line in self.lines if text in line]
+
+            if len(found) >= count:
+                return found[-1]
+
+            time.sleep(0.01)
+
+        self.fail("Never saw {!r} in:\n{}".format(text, "".join(self.lines)))
+
+    def fetch(self, path):
+        if self.location.startswith("unix:"):
+            conn = UnixHTTPConnection(self.location[5:])
+        else:
+            conn = http.client.HTTPConnection(
+                "127.0.0.1", self.port, timeout=5
+            )
+
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        finally:
+            conn.close()
+
+    def worker_pids(self):
+        pids = set()
+
+        for _ in range(20):
+            status, body = self.fetch("/pid/")
+            self.assertEqual(status, 200)
+            pids.add(int(body))
+
+        self.assertNotIn(self.proc.pid, pids)
+        return pids
+
+    def test_serve(self):
+        self.start()
+        self.worker_pids()
+
+        # A crashed worker is replaced.
+        with self.assertRaises((http.client.HTTPException, OSError)):
+            self.fetch("/crash/")
+
+        self.wait_for_log("exited with 3. Replacing it")
+        self.wait_for_log("Started worker", count=3)
+        self.worker_pids()
+
+        # `SIGHUP` replaces all the workers.
+        self.proc.send_signal(signal.SIGHUP)
+        self.wait_for_log("Started worker", count=5)
+        self.worker_pids()
+
+        # `SIGTERM` stops everything.
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
+
+    def test_max_requests(self):
+        self.start(max_requests=3)
+        pids = set()
+
+        # Every request is served, while the workers are replaced.
+        for _ in range(12):
+            status, body = self.fetch("/pid/")
+            self.assertEqual(status, 200)
+            pids.add(int(body))
+
+        self.assertGreater(len(pids), 2)
+        self.wait_for_log("handled 3 requests")
+
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
+
+    @unittest.skipIf(
+        not os.path.exists("/proc/self/smaps_rollup"), "No `smaps_rollup`"
+    )
+    def test_preload_memory(self):
+        self.start(preload=True)
+        self.worker_pids()
+
+        self.proc.send_signal(signal.SIGUSR1)
+        self.wait_for_log("Mb shared", count=2)
+
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
+
+    @unittest.skipIf(not hasattr(socket, "AF_UNIX"), "No `AF_UNIX`")
+    def test_unix_socket(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = os.path.join(tmp_dir.name, "app.sock")
+        self.start(unix_socket=path, server="asyncio")
+        self.assertEqual(self.location, "unix:{}".format(path))
+        self.worker_pids()
+
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
+        self.assertFalse(os.path.exists(path))
+
+    def test_asyncio_workers(self):
+        self.start(server="asyncio")
+        self.worker_pids()
+
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
+
+    @unittest.skipIf(
+        not hasattr(itty3.socket, "SO_REUSEPORT"), "No `SO_REUSEPORT`"
+    )
+    def test_reuse_port_threads(self):
+        self.start(reuse_port=True, threads=2)
+        self.worker_pids()
+
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(self.proc.wait(10), 0)
@@ -0,0 +1,453 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import itty3
+
+
+STATIC_ROOT = os.path.join(os.path.dirname(__file__), "test_static_assets")
+
+
+class TestStaticAsset(unittest.TestCase):
+    def test_from_path(self):
+        asset = itty3.StaticAsset.from_path(
+            "css/default.css", os.path.join(STATIC_ROOT, "css", "default.css")
+        )
+        self.assertEqual(asset.name, "css/default.css")
+        self.assertEqual(asset.size, 146)
+        self.assertEqual(asset.content_type, "text/css")
+        self.assertEqual(asset.headers["Content-Length"], "146")
+        self.assertEqual(asset.headers["ETag"], asset.etag)
+        self.assertTrue(asset.etag.startswith('"'))
+        self.assertTrue(asset.headers["Last-Modified"].endswith(" GMT"))
+
+    def test_from_path_missing(self):
+        self.assertIsNone(
+            itty3.StaticAsset.from_path("nope.css", "/does/not/exist.css")
+        )
+        # Directories aren't assets either.
+        self.assertIsNone(itty3.StaticAsset.from_path("css", STATIC_ROOT))
+
+
+class TestStaticManifest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.temp_dir, "js"))
+        os.makedirs(os.path.join(self.temp_dir, ".git"))
+        self.write("js/app.js", b"console.log('hi');")
+        self.write("big.bin", b"x" * 2048)
+        self.write(".secret", b"nope")
+        self.write(".git/config", b"nope")
+
+        self.manifest = itty3.StaticManifest(
+            self.temp_dir, hot_max_bytes=4096, hot_file_max_size=1024
+        )
+
+    def tearDown(self):
+        self.manifest.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, content):
+        with open(os.path.join(self.temp_dir, name), "wb") as out:
+            out.write(content)
+
+    def test_scan(self):
+        assets = self.manifest.scan()
+        self.assertEqual(
+            sorted(assets),
+            ["big.1d1801f7.bin", "big.bin", "js/app.57b43dfc.js", "js/app.js"],
+        )
+        self.assertEqual(assets["js/app.js"].size, 18)
+        self.assertEqual(assets["js/app.js"].content_type, "text/javascript")
+        self.assertFalse(assets["js/app.js"].immutable)
+
+        hashed = assets["js/app.57b43dfc.js"]
+        self.assertTrue(hashed.immutable)
+        self.assertEqual(hashed.path, assets["js/app.js"].path)
+        self.assertEqual(hashed.content_type, "text/javascript")
+        self.assertEqual(
+            hashed.headers["Cache-Control"],
+            "public, max-age=31536000, immutable",
+        )
+
+    def test_scan_rehash(self):
+        self.manifest.scan()
+        asset = self.manifest.get("js/app.js")
+
+        # Unchanged files aren't hashed again.
+        with mock.patch.object(itty3.StaticAsset, "hash_contents") as hasher:
+            self.manifest.scan()
+            hasher.assert_not_called()
+
+        self.write("js/app.js", b"console.log('changed');")
+        os.utime(asset.path, (asset.mtime + 10, asset.mtime + 10))
+        self.manifest.scan()
+        self.assertNotEqual(
+            self.manifest.get("js/app.js").digest, asset.digest
+        )
+        self.assertIsNone(self.manifest.get(asset.hashed_name))
+
+    def test_scan_gzip(self):
+        self.write("js/app.js.gz", b"fake")
+        self.write("big.bin.gz", b"fake")
+        big = os.path.join(self.temp_dir, "big.bin")
+        os.utime(big, (time.time() + 60, time.time() + 60))
+        self.manifest.scan()
+
+        self.assertEqual(
+            self.manifest.get("js/app.js").gzip.name, "js/app.js.gz"
+        )
+        self.assertEqual(
+            self.manifest.get("js/app.57b43dfc.js").gzip.name, "js/app.js.gz"
+        )
+        # Stale compressed copies are ignored.
+        self.assertIsNone(self.manifest.get("big.bin").gzip)
+
+    def test_hashed_name(self):
+        self.manifest.scan()
+        self.assertEqual(
+            self.manifest.hashed_name("/js/app.js"), "js/app.57b43dfc.js"
+        )
+        self.assertIsNone(self.manifest.hashed_name("js/app.57b43dfc.js"))
+        self.assertIsNone(self.manifest.hashed_name("missing.css"))
+
+    def test_get(self):
+        self.manifest.scan()
+        self.assertEqual(self.manifest.get("js/app.js").name, "js/app.js")
+        self.assertEqual(self.manifest.get("/js/app.js").name, "js/app.js")
+        self.assertIsNone(self.manifest.get("js/../.secret"))
+        self.assertIsNone(self.manifest.get("missing.css"))
+
+    def test_read(self):
+        self.manifest.scan()
+        asset = self.manifest.get("js/app.js")
+        self.assertEqual(self.manifest.read(asset), b"console.log('hi');")
+        self.assertEqual(self.manifest.hot_files.stats()["entries"], 1)
+
+        # Served from memory from now on.
+        os.remove(asset.path)
+        self.assertEqual(self.manifest.read(asset), b"console.log('hi');")
+
+        # Too large to hold.
+        self.assertIsNone(self.manifest.read(self.manifest.get("big.bin")))
+        self.assertEqual(self.manifest.hot_files.stats()["entries"], 1)
+
+    def test_watch(self):
+        self.manifest.watch_interval = 0.01
+        self.manifest.scan()
+        self.manifest.watch()
+
+        self.write("new.css", b"body {}")
+
+        for _ in range(200):
+            if self.manifest.get("new.css") is not None:
+                break
+
+            time.sleep(0.01)
+
+        self.assertEqual(self.manifest.get("new.css").size, 7)
+
+
+class TestAppScanStatic(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+
+    def test_scan_static(self):
+        manifest = self.app.scan_static(STATIC_ROOT)
+        self.assertIs(self.app.static_manifest, manifest)
+        self.assertEqual(self.app.static_root, STATIC_ROOT)
+        self.assertEqual(manifest.get("itty.png").name, "itty.png")
+
+        req = itty3.HttpRequest("/static/css/default.css", "GET")
+        resp = self.app.render_static(req, "css/default.css")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content_type, "text/css")
+        self.assertEqual(resp.headers["Content-Length"], "146")
+        # Small files come straight from memory.
+        self.assertTrue(resp.body.startswith(b"/* Reset"))
+
+        resp = self.app.render_static(req, "../test_app.py")
+        self.assertEqual(resp.status_code, 404)
+
+    def test_static_url(self):
+        self.assertEqual(
+            self.app.static_url("css/default.css"), "/static/css/default.css"
+        )
+
+        self.app.static_url_path = "/assets/"
+        self.app.scan_static(STATIC_ROOT)
+        url = self.app.static_url("css/default.css")
+        self.assertEqual(url, "/assets/css/default.e3398619.css")
+        self.assertEqual(self.app.static_url("nope.js"), "/assets/nope.js")
+
+        req = itty3.HttpRequest(url, "GET")
+        resp = self.app.render_static(req, "css/default.e3398619.css")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content_type, "text/css")
+        self.assertEqual(
+            resp.headers["Cache-Control"],
+            "public, max-age=31536000, immutable",
+        )
+        self.assertTrue(resp.body.startswith(b"/* Reset"))
+
+    def test_render_static_gzip(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        content = b"body { color: red; }" * 10
+
+        with open(os.path.join(temp_dir, "app.css"), "wb") as out:
+            out.write(content)
+
+        with open(os.path.join(temp_dir, "app.css.gz"), "wb") as out:
+            out.write(gzip.compress(content))
+
+        self.app.static_root = temp_dir
+
+        for scan in (False, True):
+            if scan:
+                self.app.scan_static()
+
+            req = itty3.HttpRequest(
+                "/static/app.css",
+                "GET",
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+            resp = self.app.render_static(req, "app.css")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.content_type, "text/css")
+            self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+            self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+            body = b"".join(resp.iter_content())
+            self.assertEqual(gzip.decompress(body), content)
+
+            # Clients that can't take `gzip` get the original.
+            req = itty3.HttpRequest(
+                "/static/app.css",
+                "GET",
+                headers={"Accept-Encoding": "deflate"},
+            )
+            resp = self.app.render_static(req, "app.css")
+            self.assertNotIn("Content-Encoding", resp.headers)
+            self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+            self.assertEqual(resp.headers["Content-Length"], "200")
+            self.assertEqual(b"".join(resp.iter_content()), content)
+
+
+class TestStaticMount(unittest.TestCase):
+    def test_init(self):
+        mount = itty3.StaticMount("static", STATIC_ROOT)
+        self.assertEqual(mount.prefix, "/static/")
+        self.assertEqual(mount.root, STATIC_ROOT)
+        self.assertIsNone(mount.cache_control)
+        self.assertIsNone(mount.manifest)
+
+        self.assertEqual(itty3.StaticMount("/", STATIC_ROOT).prefix, "/")
+
+    def test_can_handle(self):
+        mount = itty3.StaticMount("/static/", STATIC_ROOT)
+        self.assertTrue(mount.can_handle("GET", "/static/itty.png"))
+        self.assertTrue(mount.can_handle("HEAD", "/static/itty.png"))
+        self.assertFalse(mount.can_handle("POST", "/static/itty.png"))
+        self.assertFalse(mount.can_handle("GET", "/staticky/itty.png"))
+        self.assertFalse(mount.can_handle("GET", "/static"))
+
+    def test_find(self):
+        mount = itty3.StaticMount("/static/", STATIC_ROOT)
+        self.assertEqual(mount.find("css/default.css").size, 146)
+        self.assertIsNone(mount.find("css"))
+        self.assertIsNone(mount.find(""))
+        self.assertIsNone(mount.find("../test_static.py"))
+        self.assertIsNone(mount.find("/etc/passwd"))
+
+
+class TestAppStaticMounts(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App()
+        self.media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_dir)
+
+        with open(os.path.join(self.media_dir, "upload.txt"), "wb") as out:
+            out.write(b"Hello")
+
+        self.view_calls = []
+
+        def greet(req, path):
+            self.view_calls.append(path)
+            return self.app.render(req, "Hi from {}".format(path))
+
+        self.app.add_route("GET", "/<any:path>", greet)
+
+    def test_add_static(self):
+        static = self.app.add_static(
+            "/static/", STATIC_ROOT, cache_control="public, max-age=3600"
+        )
+        media = self.app.add_static("media", self.media_dir)
+        nested = self.app.add_static("/static/css/", self.media_dir)
+        self.assertEqual(self.app.static_mounts, [nested, static, media])
+
+        # Replaces the existing mount at the same prefix.
+        replaced = self.app.add_static("/media/", STATIC_ROOT)
+        self.assertEqual(self.app.static_mounts, [nested, static, replaced])
+
+    def test_add_static_scan(self):
+        mount = self.app.add_static("/static/", STATIC_ROOT, scan=True)
+        self.assertEqual(mount.manifest.root, STATIC_ROOT)
+        self.assertEqual(mount.manifest.get("itty.png").size, 1473)
+        self.assertEqual(
+            self.app.static_url("css/default.css"),
+            "/static/css/default.e3398619.css",
+        )
+        self.assertEqual(
+            self.app.static_url("upload.txt", prefix="media"),
+            "/media/upload.txt",
+        )
+
+    def test_dispatch(self):
+        self.app.add_static(
+            "/static/", STATIC_ROOT, cache_control="public, max-age=3600"
+        )
+        self.app.add_static("/media/", self.media_dir)
+
+        req = itty3.HttpRequest("/static/css/default.css", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content_type, "text/css")
+        self.assertEqual(resp.headers["Cache-Control"], "public, max-age=3600")
+        self.assertTrue(b"".join(resp.iter_content()).startswith(b"/* Reset"))
+
+        req = itty3.HttpRequest("/media/upload.txt", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("Cache-Control", resp.headers)
+        self.assertEqual(b"".join(resp.iter_content()), b"Hello")
+
+        # Misses under a mount don't fall through to the routes.
+        req = itty3.HttpRequest("/media/missing.txt", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(self.view_calls, [])
+
+        # Anything else is routed as normal.
+        req = itty3.HttpRequest("/about/", "GET")
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.body, "Hi from about/")
+
+    def test_dispatch_error(self):
+        self.app.add_static("/media/", self.media_dir)
+        req = itty3.HttpRequest("/media/upload.txt", "GET")
+
+        with mock.patch.object(
+            self.app, "serve_asset", side_effect=PermissionError
+        ):
+            resp = self.app.dispatch(req)
+
+        self.assertEqual(resp.status_code, 500)
+
+
+class TestAppOffload(unittest.TestCase):
+    def setUp(self):
+        self.app = itty3.App(etags=True)
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.path = os.path.join(self.temp_dir, "big file.zip")
+
+        with open(self.path, "wb") as out:
+            out.write(b"PK" * 100)
+
+    def test_offload_location(self):
+        offload_map = {
+            self.temp_dir: "/protected/",
+            os.path.dirname(self.temp_dir): "/elsewhere",
+        }
+        self.assertEqual(
+            self.app.offload_location(
+                self.path, itty3.X_ACCEL_REDIRECT, offload_map
+            ),
+            "/protected/big%20file.zip",
+        )
+        self.assertEqual(
+            self.app.offload_location(
+                self.path, itty3.X_SENDFILE, offload_map
+            ),
+            "/protected/big file.zip",
+        )
+        # Sendfile can fall back to the real path, but nginx can't.
+        self.assertEqual(
+            self.app.offload_location(self.path, itty3.X_SENDFILE), self.path
+        )
+        self.assertIsNone(
+            self.app.offload_location(
+                self.path, itty3.X_ACCEL_REDIRECT, {"/nope": "/protected"}
+            )
+        )
+
+    def test_mount_offload(self):
+        self.app.add_static(
+            "/downloads/",
+            self.temp_dir,
+            cache_control="private",
+            offload=itty3.X_ACCEL_REDIRECT,
+            offload_map={self.temp_dir: "/internal"},
+        )
+        req = itty3.HttpRequest(
+            "/downloads/big file.zip", "GET", headers={"Range": "bytes=0-1"}
+        )
+        resp = self.app.dispatch(req)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.is_offloaded())
+        self.assertEqual(resp.body, "")
+        self.assertEqual(
+            resp.headers["X-Accel-Redirect"], "/internal/big%20file.zip"
+        )
+        self.assertEqual(resp.headers["Content-Type"], "application/zip")
+        self.assertEqual(resp.headers["Cache-Control"], "private")
+        # Left to the front-end server.
+        self.assertNotIn("ETag", resp.headers)
+
+        req = itty3.HttpRequest("/downloads/missing.zip", "GET")
+        self.assertEqual(self.app.dispatch(req).status_code, 404)
+
+    def test_mount_offload_unmapped(self):
+        self.app.add_static(
+            "/downloads/", self.temp_dir, offload=itty3.X_ACCEL_REDIRECT
+        )
+        req = itty3.HttpRequest("/downloads/big file.zip", "GET")
+        resp = self.app.dispatch(req)
+        self.assertFalse(resp.is_offloaded())
+        self.assertEqual(b"".join(resp.iter_content()), b"PK" * 100)
+
+    def test_send_file(self):
+        req = itty3.HttpRequest("/export/", "GET")
+        resp = self.app.send_file(req, self.path)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content_type, "application/zip")
+        self.assertEqual(resp.headers["Content-Length"], "200")
+        self.assertNotIn("Content-Disposition", resp.headers)
+        self.assertEqual(b"".join(resp.iter_content()), b"PK" * 100)
+
+        resp = self.app.send_file(req, os.path.join(self.temp_dir, "nope"))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_send_file_offload(self):
+        req = itty3.HttpRequest("/export/", "GET")
+        resp = self.app.send_file(
+            req,
+            self.path,
+            content_type="application/octet-stream",
+            filename="données.zip",
+            offload=itty3.X_SENDFILE,
+        )
+        self.assertEqual(resp.body, "")
+        self.assertEqual(resp.headers["X-Sendfile"], self.path)
+        self.assertEqual(
+            resp.headers["Content-Type"], "application/octet-stream"
+        )
+        self.assertEqual(
+            resp.headers["Content-Disposition"],
+            "attachment; filename=\"donn?es.zip\"; "
+            "filename*=UTF-8''donn%C3%A9es.zip",
+        )